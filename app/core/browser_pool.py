@@ -0,0 +1,497 @@
+# job_monitor/app/core/browser_pool.py
+"""Shared Playwright browser pool module.
+
+Launching Chromium is the most expensive step of a screenshot. This module
+keeps one headless browser alive for the lifetime of the process and hands
+out warm pages (each in its own context) to callers, recycling the browser
+after a number of uses or when its memory usage grows too large.
+
+Playwright objects are bound to the event loop that created them, so the
+pool owns a dedicated thread running its own loop. Synchronous callers block
+on `screenshot`, async callers await `screenshot_async`, and both can be used
+from any thread.
+
+How pages are loaded is set by a `LoadProfile` (BROWSER_LOAD_PROFILE):
+- "full" loads everything and waits for the network to go idle;
+- "lean" (default) blocks media, third-party images, fonts, frames and
+  beacons, and known analytics hosts; with a selector it waits for the
+  element instead of the whole page, and the capture is clipped to it;
+- "text" also blocks every image and font.
+
+Callers that already downloaded the page can pass its HTML: the navigation
+to the URL is then answered with it (route.fulfill), so the page keeps its
+origin for relative links and scripts without being downloaded again.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import asyncio
+import atexit
+import threading
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Coroutine, Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Hosts serving analytics, tag managers and ads, blocked by the lean profiles
+TRACKER_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "connect.facebook.com",
+    "hotjar.com",
+    "segment.io",
+    "segment.com",
+    "intercom.io",
+    "clarity.ms",
+    "ads.linkedin.com",
+    "snap.licdn.com",
+)
+
+
+@dataclass(frozen=True)
+class LoadProfile:
+    """How the pages of the pool are loaded before a screenshot."""
+
+    # Playwright load state awaited by goto, with and without a target selector
+    element_wait_until: str = "networkidle"
+    page_wait_until: str = "networkidle"
+    # Playwright resource types blocked from any origin, and from other sites
+    blocked_types: FrozenSet[str] = frozenset()
+    third_party_blocked_types: FrozenSet[str] = frozenset()
+    blocked_hosts: Tuple[str, ...] = ()  # Host suffixes blocked entirely
+    viewport: Tuple[int, int] = (1920, 1080)
+    clip_to_element: bool = False  # Capture the element's box from the page
+
+    @property
+    def intercepts(self) -> bool:
+        """Whether requests need to be routed through `should_block`."""
+        return bool(self.blocked_types or self.third_party_blocked_types or self.blocked_hosts)
+
+    def should_block(self, url: str, resource_type: str, page_url: str) -> bool:
+        """Whether a request of a page is aborted.
+
+        Args:
+            url: The requested URL.
+            resource_type: The Playwright resource type, e.g. "image".
+            page_url: The URL of the page making the request.
+        """
+        if resource_type in self.blocked_types:
+            return True
+        host = urlsplit(url).hostname or ""
+        if any(host == blocked or host.endswith("." + blocked) for blocked in self.blocked_hosts):
+            return True
+        return resource_type in self.third_party_blocked_types and _site(host) != _site(
+            urlsplit(page_url).hostname or ""
+        )
+
+
+def _same_document(first: str, second: str) -> bool:
+    """Whether two URLs address the same document, as Chromium normalizes them."""
+    a, b = urlsplit(first), urlsplit(second)
+    return (a.scheme, a.netloc.lower(), a.path or "/", a.query) == (
+        b.scheme,
+        b.netloc.lower(),
+        b.path or "/",
+        b.query,
+    )
+
+
+def _site(host: str) -> str:
+    """Approximates the registrable domain of a host by its last two labels."""
+    return ".".join(host.split(".")[-2:])
+
+
+LOAD_PROFILES: Dict[str, LoadProfile] = {
+    "full": LoadProfile(),
+    "lean": LoadProfile(
+        element_wait_until="domcontentloaded",
+        page_wait_until="load",
+        blocked_types=frozenset({"media"}),
+        # "document" here only matches frames: the page itself is first-party
+        third_party_blocked_types=frozenset({"image", "font", "document", "ping", "other"}),
+        blocked_hosts=TRACKER_HOSTS,
+        viewport=(1280, 900),
+        clip_to_element=True,
+    ),
+    "text": LoadProfile(
+        element_wait_until="domcontentloaded",
+        page_wait_until="load",
+        blocked_types=frozenset({"media", "image", "font"}),
+        third_party_blocked_types=frozenset({"document", "ping", "other"}),
+        blocked_hosts=TRACKER_HOSTS,
+        viewport=(1280, 900),
+        clip_to_element=True,
+    ),
+}
+
+
+@dataclass
+class ScreenshotJob:
+    """A single screenshot request."""
+
+    url: str
+    screenshot_path: str
+    selector: Optional[str] = None
+    html: Optional[bytes] = None  # The downloaded page, see the module docstring
+
+
+def browser_rss_mb() -> float:
+    """Returns the resident memory of all child processes, in MB.
+
+    Chromium runs as children of the Playwright driver, which is itself a
+    child of this process. Returns 0 if psutil is not available.
+    """
+    try:
+        import psutil
+    except ImportError:
+        return 0.0
+
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """A pool of warm Chromium pages shared by all screenshot callers."""
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_uses: int = 100,
+        max_rss_mb: float = 1024,
+        viewport: Optional[dict] = None,
+        timeout_ms: int = 30000,
+        profile: Optional[LoadProfile] = None,
+    ) -> None:
+        """Initializes the pool. The browser is only launched on first use.
+
+        Args:
+            size: Maximum number of pages in use at the same time.
+            max_uses: Screenshots taken before the browser is relaunched.
+            max_rss_mb: Browser memory usage that triggers a relaunch.
+            viewport: The viewport of every page.
+            timeout_ms: Default timeout of page operations.
+            profile: How pages are loaded. Defaults to the "full" profile.
+        """
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.profile = profile or LOAD_PROFILES["full"]
+        width, height = self.profile.viewport
+        self.viewport = viewport or {"width": width, "height": height}
+        self.timeout_ms = timeout_ms
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # Only touched from the pool thread
+        self._playwright = None
+        self._browser = None
+        self._idle_pages: List[Any] = []
+        self._in_use = 0
+        self._uses = 0
+        self._recycle_pending = False
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _submit(self, coro: Coroutine) -> Future:
+        """Schedules a coroutine on the pool thread, starting it if needed."""
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="browser-pool", daemon=True
+                )
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _launch(self) -> None:
+        """(Re)launches the browser, dropping every idle page."""
+        await self._close_browser()
+        if self._playwright is None:
+            # Imported on the first screenshot, runs without one never load it
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self._uses = 0
+        self._recycle_pending = False
+
+    async def _close_browser(self) -> None:
+        """Closes the browser and all its idle pages."""
+        for page in self._idle_pages:
+            try:
+                await page.context.close()
+            except Exception:
+                pass
+        self._idle_pages = []
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                print(f"Error closing browser: {e}")
+            self._browser = None
+
+    @asynccontextmanager
+    async def _lease(self) -> AsyncIterator[Any]:
+        """Hands out a warm page, waiting while the pool is full or recycling."""
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+
+        async with self._cond:
+            # While a recycle is pending, let in-flight pages finish first.
+            await self._cond.wait_for(
+                lambda: self._in_use < self.size
+                and not (self._recycle_pending and self._in_use > 0)
+            )
+            if self._browser is None or self._recycle_pending:
+                await self._launch()
+            self._in_use += 1
+
+        page = None
+        healthy = False
+        try:
+            if self._idle_pages:
+                page = self._idle_pages.pop()
+            else:
+                context = await self._browser.new_context(viewport=self.viewport)
+                if self.profile.intercepts:
+                    await context.route("**/*", self._route)
+                page = await context.new_page()
+                page.set_default_timeout(self.timeout_ms)
+            yield page
+            healthy = True
+        finally:
+            async with self._cond:
+                self._in_use -= 1
+                self._uses += 1
+                if page is not None:
+                    if healthy and not page.is_closed():
+                        await page.context.clear_cookies()
+                        self._idle_pages.append(page)
+                    else:
+                        try:
+                            await page.context.close()
+                        except Exception:
+                            pass
+                if self._uses >= self.max_uses or (
+                    self.max_rss_mb and browser_rss_mb() > self.max_rss_mb
+                ):
+                    self._recycle_pending = True
+                self._cond.notify_all()
+
+    async def _route(self, route: Any) -> None:
+        """Aborts the requests the load profile blocks, continues the others."""
+        request = route.request
+        try:
+            frame = request.frame
+            if request.is_navigation_request() and frame.parent_frame is None:
+                blocked = False  # The page itself
+            else:
+                blocked = self.profile.should_block(
+                    request.url, request.resource_type, frame.page.main_frame.url
+                )
+        except Exception:
+            # e.g. service worker requests have no frame
+            blocked = False
+        if blocked:
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    async def _screenshot(
+        self,
+        url: str,
+        screenshot_path: str,
+        selector: Optional[str] = None,
+        html: Optional[bytes] = None,
+    ) -> None:
+        """Takes a screenshot on a leased page."""
+        async with self._lease() as page:
+            if html is None:
+                await self._capture(page, url, screenshot_path, selector)
+                return
+
+            def is_document(request_url: str) -> bool:
+                return _same_document(request_url, url)
+
+            async def fulfill(route: Any) -> None:
+                if route.request.is_navigation_request():
+                    await route.fulfill(status=200, content_type="text/html", body=html)
+                else:
+                    await route.fallback()
+
+            await page.route(is_document, fulfill)
+            try:
+                await self._capture(page, url, screenshot_path, selector)
+            finally:
+                await page.unroute(is_document, fulfill)
+
+    async def _capture(
+        self, page: Any, url: str, screenshot_path: str, selector: Optional[str]
+    ) -> None:
+        """Loads a page as the load profile says and saves its screenshot."""
+        profile = self.profile
+        if not selector:
+            await page.goto(url, wait_until=profile.page_wait_until)
+            await page.screenshot(path=screenshot_path, full_page=True)
+            return
+
+        await page.goto(url, wait_until=profile.element_wait_until)
+        locator = page.locator(selector).first
+        # Ready as soon as the element is, whatever else is still loading
+        await locator.wait_for(state="visible")
+        box = await locator.bounding_box() if profile.clip_to_element else None
+        if not box or box["width"] < 1 or box["height"] < 1:
+            await locator.screenshot(path=screenshot_path)
+            return
+        # The box is relative to the viewport, the full page clip to the page
+        scroll_x, scroll_y = await page.evaluate("[window.scrollX, window.scrollY]")
+        await page.screenshot(
+            path=screenshot_path,
+            full_page=True,
+            clip={
+                "x": box["x"] + scroll_x,
+                "y": box["y"] + scroll_y,
+                "width": box["width"],
+                "height": box["height"],
+            },
+        )
+
+    def screenshot(
+        self,
+        url: str,
+        screenshot_path: str,
+        selector: Optional[str] = None,
+        html: Optional[bytes] = None,
+    ) -> None:
+        """Takes a screenshot, blocking until it is saved.
+
+        Args:
+            url: The URL to take a screenshot of.
+            screenshot_path: The path to save the screenshot.
+            selector: Optional CSS selector to capture specific element.
+            html: The downloaded page, rendered instead of downloading it again.
+        """
+        self._submit(self._screenshot(url, screenshot_path, selector, html)).result()
+
+    async def screenshot_async(
+        self,
+        url: str,
+        screenshot_path: str,
+        selector: Optional[str] = None,
+        html: Optional[bytes] = None,
+    ) -> None:
+        """Takes a screenshot from within any running event loop.
+
+        Args:
+            url: The URL to take a screenshot of.
+            screenshot_path: The path to save the screenshot.
+            selector: Optional CSS selector to capture specific element.
+            html: The downloaded page, rendered instead of downloading it again.
+        """
+        await asyncio.wrap_future(
+            self._submit(self._screenshot(url, screenshot_path, selector, html))
+        )
+
+    def screenshot_many(self, jobs: List[ScreenshotJob]) -> List[Optional[Exception]]:
+        """Takes several screenshots concurrently, up to the pool size at once.
+
+        Args:
+            jobs: The screenshots to take.
+
+        Returns:
+            One entry per job: None on success, or the raised exception.
+        """
+        futures = [
+            self._submit(
+                self._screenshot(job.url, job.screenshot_path, job.selector, job.html)
+            )
+            for job in jobs
+        ]
+        return [future.exception() for future in futures]
+
+    async def _shutdown(self) -> None:
+        """Closes the browser and stops Playwright."""
+        await self._close_browser()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self) -> None:
+        """Closes the browser and stops the pool thread."""
+        with self._start_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=30)
+        except Exception as e:
+            print(f"Error shutting down browser pool: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        self._cond = None
+
+
+def load_profile(name: str) -> LoadProfile:
+    """Returns a load profile by name.
+
+    Raises:
+        ValueError: If no profile has that name.
+    """
+    if name not in LOAD_PROFILES:
+        raise ValueError(f"Invalid browser load profile: {name}")
+    return LOAD_PROFILES[name]
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Returns the process wide browser pool, configured from the settings."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from core.config import Settings
+
+            settings = Settings()
+            _pool = BrowserPool(
+                size=settings.BROWSER_POOL_SIZE,
+                max_uses=settings.BROWSER_MAX_USES,
+                max_rss_mb=settings.BROWSER_MAX_RSS_MB,
+                timeout_ms=int(settings.BROWSER_TIMEOUT_SECONDS * 1000),
+                profile=load_profile(settings.BROWSER_LOAD_PROFILE),
+            )
+            atexit.register(_pool.close)
+        return _pool
+
+
+# Performance characteristics:
+# - Chromium is launched once per `max_uses` screenshots instead of once per
+#   screenshot; pages and contexts are reused while healthy.
+# - The lean profiles skip media, trackers and third-party assets, and stop
+#   waiting as soon as the target element is visible.
+# Resource usage details:
+# - At most `size` pages are open; the browser is relaunched when the memory
+#   of the child processes exceeds `max_rss_mb`. Blocked requests are never
+#   downloaded or decoded by Chromium.
+# Threading considerations:
+# - All Playwright objects live on the pool thread; the public methods are
+#   safe to call from any thread or event loop.
+# Error handling approach:
+# - Screenshot errors propagate to the caller; a page that failed is closed
+#   instead of being returned to the pool.
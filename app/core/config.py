@@ -15,6 +15,101 @@ class Settings(BaseSettings):
     TELEGRAM_BOT_TOKEN: str = Field(..., env="TELEGRAM_BOT_TOKEN")
     TELEGRAM_CHAT_ID: str = Field(..., env="TELEGRAM_CHAT_ID")
     DATABASE_URL: str = Field("sqlite:///job_monitor.db", env="DATABASE_URL")
+    DB_POOL_SIZE: int = Field(10, env="DB_POOL_SIZE")  # Ignored for SQLite
+    DB_MAX_OVERFLOW: int = Field(20, env="DB_MAX_OVERFLOW")  # Ignored for SQLite
+    DB_BATCH_SIZE: int = Field(500, env="DB_BATCH_SIZE")
+
+    # Only screenshot and report websites whose content changed
+    CHANGE_DRIVEN_MODE: bool = Field(True, env="CHANGE_DRIVEN_MODE")
+    # "browser" attaches a Chromium screenshot to alerts, "card" a summary card
+    # drawn from the scraped data (see core/cards.py), "none" sends text only
+    SCREENSHOT_MODE: str = Field("browser", env="SCREENSHOT_MODE")
+    # Page rendered by the browser: "fetched" reuses the scraped HTML, "network" reloads it
+    SCREENSHOT_SOURCE: str = Field("fetched", env="SCREENSHOT_SOURCE")
+    # Sent when the browser screenshot fails: "card" or "none"
+    SCREENSHOT_FALLBACK: str = Field("card", env="SCREENSHOT_FALLBACK")
+
+    # Screenshot store (see core/screenshot_store.py)
+    SCREENSHOT_FORMAT: str = Field("webp", env="SCREENSHOT_FORMAT")  # or "jpeg", "png"
+    SCREENSHOT_QUALITY: int = Field(80, env="SCREENSHOT_QUALITY")
+    SCREENSHOT_MAX_WIDTH: int = Field(0, env="SCREENSHOT_MAX_WIDTH")  # 0 keeps the width
+    SCREENSHOT_HISTORY_FILES: int = Field(500, env="SCREENSHOT_HISTORY_FILES")
+    SCREENSHOT_HISTORY_MB: int = Field(500, env="SCREENSHOT_HISTORY_MB")
+
+    # Visual diff (see core/visual_diff.py): alert only on visible changes
+    VISUAL_DIFF_MODE: bool = Field(False, env="VISUAL_DIFF_MODE")
+    VISUAL_DIFF_TILE: int = Field(32, env="VISUAL_DIFF_TILE")  # Tile edge, pixels
+    VISUAL_DIFF_THRESHOLD: float = Field(8.0, env="VISUAL_DIFF_THRESHOLD")  # 0-255
+    VISUAL_DIFF_MARGIN: int = Field(64, env="VISUAL_DIFF_MARGIN")  # Context, pixels
+
+    # Run ledger (see core/run_ledger.py)
+    RUN_RESUME_SECONDS: int = Field(6 * 3600, env="RUN_RESUME_SECONDS")  # 0 disables
+    RUN_HISTORY_DAYS: int = Field(7, env="RUN_HISTORY_DAYS")
+
+    # Monitoring pipeline
+    MONITOR_MODE: str = Field("sequential", env="MONITOR_MODE")  # or "async"
+    MAX_CONCURRENCY: int = Field(16, env="MAX_CONCURRENCY")
+    PER_HOST_CONCURRENCY: int = Field(2, env="PER_HOST_CONCURRENCY")
+    SCREENSHOT_CONCURRENCY: int = Field(2, env="SCREENSHOT_CONCURRENCY")
+    NOTIFY_CONCURRENCY: int = Field(1, env="NOTIFY_CONCURRENCY")
+    PIPELINE_QUEUE_SIZE: int = Field(64, env="PIPELINE_QUEUE_SIZE")
+
+    # Scheduler daemon (run.py --daemon), intervals in seconds
+    SCHEDULER_DEFAULT_INTERVAL: int = Field(8 * 3600, env="SCHEDULER_DEFAULT_INTERVAL")
+    SCHEDULER_MIN_INTERVAL: int = Field(900, env="SCHEDULER_MIN_INTERVAL")
+    SCHEDULER_MAX_INTERVAL: int = Field(24 * 3600, env="SCHEDULER_MAX_INTERVAL")
+    SCHEDULER_BACKOFF_FACTOR: float = Field(1.5, env="SCHEDULER_BACKOFF_FACTOR")
+    SCHEDULER_SPEEDUP_FACTOR: float = Field(0.5, env="SCHEDULER_SPEEDUP_FACTOR")
+    SCHEDULER_RELOAD_SECONDS: int = Field(300, env="SCHEDULER_RELOAD_SECONDS")
+
+    # Sharding across processes and replicas (see core/sharding.py)
+    SHARDING_ENABLED: bool = Field(False, env="SHARDING_ENABLED")
+    WORKER_ID: str = Field("", env="WORKER_ID")  # Defaults to <hostname>-<pid>
+    WORKER_HEARTBEAT_SECONDS: int = Field(30, env="WORKER_HEARTBEAT_SECONDS")
+    WORKER_TIMEOUT_SECONDS: int = Field(120, env="WORKER_TIMEOUT_SECONDS")
+    LEASE_SECONDS: int = Field(900, env="LEASE_SECONDS")
+    HASH_RING_VNODES: int = Field(64, env="HASH_RING_VNODES")
+
+    # Instrumentation (see core/metrics.py)
+    METRICS_TEXTFILE: str = Field("", env="METRICS_TEXTFILE")  # Prometheus textfile
+    METRICS_PORT: int = Field(0, env="METRICS_PORT")  # 0 disables /metrics
+    METRICS_SPANS_FILE: str = Field("", env="METRICS_SPANS_FILE")  # JSON lines
+    PROFILE_MODE: str = Field("", env="PROFILE_MODE")  # "cprofile" or "pyinstrument"
+    PROFILE_DIR: str = Field("profiles", env="PROFILE_DIR")
+
+    # Telegram delivery queue
+    TELEGRAM_API_URL: str = Field("https://api.telegram.org/bot", env="TELEGRAM_API_URL")
+    TELEGRAM_COALESCE_SECONDS: float = Field(1.0, env="TELEGRAM_COALESCE_SECONDS")
+    TELEGRAM_GLOBAL_RATE: float = Field(30, env="TELEGRAM_GLOBAL_RATE")
+    TELEGRAM_CHAT_RATE: float = Field(1, env="TELEGRAM_CHAT_RATE")
+    # Send every alert to TELEGRAM_CHAT_ID as well as to the matching
+    # subscriptions (see core/subscriptions.py); summaries always go there
+    ALERT_DEFAULT_CHAT: bool = Field(True, env="ALERT_DEFAULT_CHAT")
+
+    # HTML parser: "bs4", "lxml", "selectolax" or "strainer"
+    PARSER_BACKEND: str = Field("bs4", env="PARSER_BACKEND")
+
+    # HTTP client
+    HTTP_TIMEOUT: float = Field(10, env="HTTP_TIMEOUT")
+    HTTP_CACHE_SIZE: int = Field(256, env="HTTP_CACHE_SIZE")
+    HTTP_CACHE_MB: float = Field(64, env="HTTP_CACHE_MB")  # Page bodies in the run cache
+    HTTP_MAX_PAGE_MB: float = Field(20, env="HTTP_MAX_PAGE_MB")  # Larger pages fail
+    HTTP_RETRIES: int = Field(2, env="HTTP_RETRIES")  # Per fetch, on transient errors
+    HTTP_BACKOFF_SECONDS: float = Field(1, env="HTTP_BACKOFF_SECONDS")
+    HTTP_MIN_TIMEOUT: float = Field(2, env="HTTP_MIN_TIMEOUT")
+    HTTP_TIMEOUT_MULTIPLIER: float = Field(3, env="HTTP_TIMEOUT_MULTIPLIER")  # x p95
+
+    # Per-host circuit breakers (see core/host_health.py)
+    CIRCUIT_FAILURE_THRESHOLD: int = Field(3, env="CIRCUIT_FAILURE_THRESHOLD")
+    CIRCUIT_OPEN_SECONDS: float = Field(300, env="CIRCUIT_OPEN_SECONDS")
+    CIRCUIT_MAX_OPEN_SECONDS: float = Field(6 * 3600, env="CIRCUIT_MAX_OPEN_SECONDS")
+
+    # Screenshot browser pool
+    BROWSER_POOL_SIZE: int = Field(2, env="BROWSER_POOL_SIZE")
+    BROWSER_MAX_USES: int = Field(100, env="BROWSER_MAX_USES")
+    BROWSER_MAX_RSS_MB: int = Field(1024, env="BROWSER_MAX_RSS_MB")
+    BROWSER_TIMEOUT_SECONDS: float = Field(30, env="BROWSER_TIMEOUT_SECONDS")
+    BROWSER_LOAD_PROFILE: str = Field("lean", env="BROWSER_LOAD_PROFILE")  # "full", "lean", "text"
 
     class Config:
         """Loads the env vars from a .env file."""
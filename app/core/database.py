@@ -1,5 +1,5 @@
 # job_monitor/app/core/database.py
-"""Database setup module."""
+"""Database setup and repository module."""
 
 # Add future imports here if needed
 from __future__ import annotations
@@ -7,29 +7,335 @@ from __future__ import annotations
 # Set encode as utf-8
 # -*- coding: utf-8 -*-
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import MetaData, create_engine, event, inspect, text, update
+from sqlalchemy.orm import Session, sessionmaker
 
 from core.config import Settings
+from core.jobs import JobDiff, apply_job_diff
+from core.metrics import span
+from core.utils import utcnow
+from data_models import RunSite, Website, WebsiteTag
 
 settings = Settings()
 
-# Using a persistent file-based SQLite database for simplicity.
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Only for SQLite
-)
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+
+if IS_SQLITE:
+    # Using a persistent file-based SQLite database for simplicity.
+    engine = create_engine(
+        settings.DATABASE_URL,
+        connect_args={"check_same_thread": False},  # Only for SQLite
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        """Tunes every new SQLite connection.
+
+        WAL lets readers proceed while a cycle commits, NORMAL synchronous is
+        durable enough in WAL mode, and busy_timeout makes concurrent writers
+        wait for the lock instead of failing immediately.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+else:
+    # Server databases (e.g. Postgres) get a connection pool sized for the
+    # concurrent pipeline; stale connections are detected before use.
+    engine = create_engine(
+        settings.DATABASE_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+    )
 
 # echo=True enables logging of SQL statements, useful for debugging.
 # engine = create_engine(settings.DATABASE_URL, echo=True)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def add_missing_columns(metadata: MetaData) -> None:
+    """Adds model columns that are missing from already existing tables.
+
+    `create_all` only creates missing tables, so databases created by an older
+    version would otherwise never get new columns. New columns are added as
+    nullable, with their server default if any, and their indexes are created.
+
+    Args:
+        metadata: The metadata of the declarative models.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            missing = [column for column in table.columns if column.name not in existing]
+            for column in missing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                if column.server_default is not None:
+                    # Existing rows get the default instead of NULL
+                    default = column.server_default.arg
+                    if not isinstance(default, str):
+                        default = default.compile(dialect=engine.dialect)
+                    ddl += f" DEFAULT {default}"
+                conn.execute(text(ddl))
+            if missing:
+                for index in table.indexes:
+                    index.create(bind=conn, checkfirst=True)
+
+
+def create_tables() -> None:
+    """Creates the missing tables and columns of the data models."""
+    from data_models import Base
+
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(Base.metadata)
+
+
+def _dialect_insert(table):
+    """Returns an INSERT supporting ON CONFLICT, or None for other dialects."""
+    if engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(table)
+
+
+def upsert_websites(
+    db: Session,
+    rows: Sequence[Dict[str, object]],
+    update_columns: Sequence[str] = (),
+) -> None:
+    """Inserts websites in one statement, skipping or updating existing URLs.
+
+    The caller is responsible for committing the session.
+
+    Args:
+        db: The database session.
+        rows: One dict of Website column values per website; "url" is required.
+        update_columns: Columns overwritten when the URL already exists. If
+            empty, existing websites are left untouched.
+    """
+    if not rows:
+        return
+    statement = _dialect_insert(Website.__table__)
+    if statement is None:
+        # Generic fallback: one query for all URLs, then insert the missing ones
+        urls = [row["url"] for row in rows]
+        existing = {
+            website.url: website
+            for website in db.query(Website).filter(Website.url.in_(urls))
+        }
+        for row in rows:
+            website = existing.get(row["url"])
+            if website is None:
+                db.add(Website(**row))
+            else:
+                for column in update_columns:
+                    setattr(website, column, row.get(column))
+        return
+
+    if update_columns:
+        statement = statement.on_conflict_do_update(
+            index_elements=["url"],
+            set_={column: statement.excluded[column] for column in update_columns},
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=["url"])
+    db.execute(statement, list(rows))
+
+
+def tag_websites(db: Session, website_ids: Sequence[int], tags: Sequence[str]) -> None:
+    """Adds tags to websites in one statement, skipping tags they already have.
+
+    The caller is responsible for committing the session.
+
+    Args:
+        db: The database session.
+        website_ids: The websites to tag.
+        tags: The tags to add to every website.
+    """
+    rows = [{"tag": tag, "website_id": website_id} for website_id in website_ids for tag in tags]
+    if not rows:
+        return
+    statement = _dialect_insert(WebsiteTag.__table__)
+    if statement is None:
+        existing = set(
+            db.query(WebsiteTag.tag, WebsiteTag.website_id).filter(
+                WebsiteTag.website_id.in_(website_ids), WebsiteTag.tag.in_(tags)
+            )
+        )
+        db.add_all(
+            WebsiteTag(**row) for row in rows if (row["tag"], row["website_id"]) not in existing
+        )
+        return
+    db.execute(statement.on_conflict_do_nothing(index_elements=["tag", "website_id"]), rows)
+
+
+@dataclass
+class WebsiteUpdate:
+    """The new state of a website after it has been checked."""
+
+    website_id: int
+    content_hash: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    diff: Optional[JobDiff] = None
+    screenshot_hash: Optional[str] = None  # New visual diff baseline, if any
+
+
+class UpdateBatch:
+    """Collects website updates and writes them in a single transaction.
+
+    Monitoring adds one update per checked website; `flush` writes all hash
+    and validator updates with one bulk UPDATE and the job diffs in the same
+    transaction. The batch flushes itself once `max_size` updates are pending
+    so memory stays bounded on very large cycles. A failed flush keeps its
+    updates queued and raises; failed automatic flushes are retried by the
+    next one, so the caller's final `flush` is the one that must succeed.
+
+    With a `run_id`, the websites marked done are recorded in the run ledger
+    (see core/run_ledger.py) in the same transaction as their updates, so a
+    resumed run never skips a website whose update was lost.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, run_id: Optional[int] = None) -> None:
+        """Initializes an empty batch.
+
+        Args:
+            max_size: Pending updates that trigger an automatic flush.
+                Defaults to the DB_BATCH_SIZE setting.
+            run_id: The ledger run the websites marked done belong to, if any.
+        """
+        self.max_size = max_size or settings.DB_BATCH_SIZE
+        self.run_id = run_id
+        self._pending: List[WebsiteUpdate] = []
+        self._done: List[Tuple[int, str]] = []
+        self._lock = threading.Lock()
+
+    def add(self, website_update: WebsiteUpdate) -> None:
+        """Queues an update, flushing the batch when it is full."""
+        with self._lock:
+            self._pending.append(website_update)
+            full = len(self._pending) + len(self._done) >= self.max_size
+        if full:
+            self._flush_full()
+
+    def mark_done(self, website_id: int, outcome: str) -> None:
+        """Records that the run is done with a website, see the class docstring."""
+        if self.run_id is None:
+            return
+        with self._lock:
+            self._done.append((website_id, outcome))
+            full = len(self._pending) + len(self._done) >= self.max_size
+        if full:
+            self._flush_full()
+
+    def flush(self) -> None:
+        """Writes every pending update in one transaction.
+
+        Raises:
+            Exception: The database error, after the transaction is rolled
+                back. The updates stay queued, so a later flush retries them.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            done, self._done = self._done, []
+        if not pending and not done:
+            return
+
+        db = SessionLocal()
+        try:
+            with span("db_commit"):
+                if pending:
+                    db.execute(
+                        update(Website),
+                        [
+                            {
+                                "id": item.website_id,
+                                "last_content_hash": item.content_hash,
+                                "etag": item.etag,
+                                "last_modified": item.last_modified,
+                            }
+                            for item in pending
+                        ],
+                    )
+                screenshots = [
+                    {"id": item.website_id, "last_screenshot_hash": item.screenshot_hash}
+                    for item in pending
+                    if item.screenshot_hash is not None
+                ]
+                if screenshots:
+                    db.execute(update(Website), screenshots)
+                for item in pending:
+                    if item.diff is not None:
+                        apply_job_diff(db, item.website_id, item.diff)
+                if done:
+                    _insert_run_sites(db, self.run_id, done)
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error updating database: {e}")
+            # Keep the updates for the next flush instead of losing them
+            with self._lock:
+                self._pending[:0] = pending
+                self._done[:0] = done
+            raise
+        finally:
+            db.close()
+
+    def _flush_full(self) -> None:
+        """Flushes a full batch; on failure the updates wait for the next flush."""
+        try:
+            self.flush()
+        except Exception:
+            pass  # Reported by flush, raised again by the caller's final flush
+
+
+def _insert_run_sites(db: Session, run_id: int, done: List[Tuple[int, str]]) -> None:
+    """Inserts the run ledger rows of websites, skipping those already recorded."""
+    now = utcnow()
+    rows = [
+        {"run_id": run_id, "website_id": website_id, "outcome": outcome, "finished_at": now}
+        for website_id, outcome in done
+    ]
+    statement = _dialect_insert(RunSite.__table__)
+    if statement is None:
+        recorded = {
+            website_id
+            for (website_id,) in db.query(RunSite.website_id).filter(
+                RunSite.run_id == run_id,
+                RunSite.website_id.in_([row["website_id"] for row in rows]),
+            )
+        }
+        rows = [row for row in rows if row["website_id"] not in recorded]
+        if rows:
+            db.execute(RunSite.__table__.insert(), rows)
+        return
+    db.execute(statement.on_conflict_do_nothing(), rows)
+
+
 # Performance characteristics:
 # - Engine creation is relatively expensive, but only happens once.
 # - Session creation is lightweight.
+# - A monitoring cycle commits once per UpdateBatch flush instead of once per
+#   changed website; website upserts are a single INSERT ... ON CONFLICT.
 # Resource usage details:
-# - Connection pooling can be configured on the engine for resource efficiency.
+# - SQLite uses WAL; other databases use a pre-pinged connection pool.
 # Threading considerations:
 # - Engine is thread-safe. SessionLocal should be used in a thread-local context.
 # Error handling approach:
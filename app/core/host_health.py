@@ -0,0 +1,267 @@
+# job_monitor/app/core/host_health.py
+"""Per-host health tracking module.
+
+Every fetch of `HttpClient` reports its outcome here, per host:
+- a circuit breaker opens after `failure_threshold` consecutive failed
+  fetches; while it is open, requests to the host fail immediately with
+  `CircuitOpenError` instead of waiting for the timeout;
+- once the open period is over a single probe request is let through
+  (half-open): success closes the circuit, failure opens it again for twice
+  as long (jittered, up to `max_open_seconds`);
+- the timeout of a host adapts to its observed latency: a multiple of the
+  p95 of its recent successful fetches, within the configured bounds.
+
+Network errors, timeouts, 429 and 5xx answers count as failures, as does any
+other error raised by the fetch (invalid URL, redirect loop, undecodable
+body); a 404 of one tenant on a shared ATS host, or a page that is too
+large, says nothing about the host. The state is
+kept in memory during a run and stored in the `host_health` table between
+runs, so a dead host is not retried at full cost by every run.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import json
+import math
+import random
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Optional
+
+import requests
+
+from core.database import SessionLocal
+from core.utils import utcnow
+from data_models import HostHealth
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Successful fetches needed before the timeout adapts
+MIN_LATENCY_SAMPLES = 5
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of a request to a host whose circuit is open."""
+
+
+@dataclass
+class HostState:
+    """The health of one host."""
+
+    host: str
+    state: str = CLOSED
+    failures: int = 0  # Consecutive failed fetches
+    opens: int = 0  # Consecutive openings, doubles the open period
+    retry_at: Optional[datetime] = None  # UTC, end of the open period
+    latencies: Deque[float] = field(default_factory=deque)
+    probing: bool = False  # A half-open probe is in flight
+    dirty: bool = False  # Changed since it was loaded or saved
+
+
+class HostHealthTracker:
+    """Circuit breakers and adaptive timeouts of the hosts of a process."""
+
+    def __init__(
+        self,
+        timeout: float = 10,
+        min_timeout: float = 2,
+        timeout_multiplier: float = 3,
+        failure_threshold: int = 3,
+        open_seconds: float = 300,
+        max_open_seconds: float = 6 * 3600,
+        latency_samples: int = 50,
+    ) -> None:
+        """Initializes the tracker.
+
+        Args:
+            timeout: Timeout of hosts without enough latency samples, and the
+                upper bound of adapted timeouts, in seconds.
+            min_timeout: Lower bound of adapted timeouts, in seconds.
+            timeout_multiplier: Adapted timeout as a multiple of the p95 latency.
+            failure_threshold: Consecutive failed fetches that open the circuit.
+            open_seconds: First open period, doubled on every reopening.
+            max_open_seconds: Upper bound of the open period.
+            latency_samples: Recent latencies kept per host.
+        """
+        self.timeout = timeout
+        self.min_timeout = min_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.latency_samples = latency_samples
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, host: str) -> HostState:
+        """Returns the state of a host, creating it if needed. Caller holds the lock."""
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(
+                host, latencies=deque(maxlen=self.latency_samples)
+            )
+        return state
+
+    def check(self, host: str) -> None:
+        """Lets a request to a host through, or refuses it.
+
+        Raises:
+            CircuitOpenError: If the circuit of the host is open, or half-open
+                with its probe already in flight.
+        """
+        with self._lock:
+            state = self._get(host)
+            if state.state == CLOSED:
+                return
+            # A stored open circuit without retry time is probed right away
+            expired = state.retry_at is None or utcnow() >= state.retry_at
+            if state.state == OPEN and expired:
+                state.state = HALF_OPEN
+                state.probing = False
+                state.dirty = True
+            if state.state == HALF_OPEN and not state.probing:
+                state.probing = True
+                return
+            until = ""
+            if state.retry_at is not None:
+                until = f" until {state.retry_at:%Y-%m-%d %H:%M:%S} UTC"
+            raise CircuitOpenError(
+                f"Circuit open for {host}{until} after {state.failures} failures"
+            )
+
+    def timeout_for(self, host: str) -> float:
+        """Returns the request timeout of a host, in seconds."""
+        with self._lock:
+            latencies = sorted(self._get(host).latencies)
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return self.timeout
+        p95 = latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)]
+        return min(self.timeout, max(self.min_timeout, p95 * self.timeout_multiplier))
+
+    def record_success(self, host: str, seconds: float) -> None:
+        """Records a fetch answered by the host, closing its circuit."""
+        with self._lock:
+            state = self._get(host)
+            state.latencies.append(seconds)
+            state.state = CLOSED
+            state.failures = state.opens = 0
+            state.retry_at = None
+            state.probing = False
+            state.dirty = True
+
+    def record_failure(self, host: str) -> None:
+        """Records a failed fetch, opening the circuit at the threshold."""
+        with self._lock:
+            state = self._get(host)
+            state.failures += 1
+            state.dirty = True
+            if state.state == HALF_OPEN or state.failures >= self.failure_threshold:
+                state.opens += 1
+                seconds = min(
+                    self.max_open_seconds, self.open_seconds * 2 ** (state.opens - 1)
+                )
+                state.state = OPEN
+                state.retry_at = utcnow() + timedelta(
+                    seconds=seconds * random.uniform(0.8, 1.2)
+                )
+                state.probing = False
+                print(f"Circuit opened for {host} until {state.retry_at:%H:%M:%S} UTC")
+
+    def load(self) -> None:
+        """Replaces the in-memory state with the stored one, e.g. at the start of a run."""
+        db = SessionLocal()
+        try:
+            rows = db.query(HostHealth).all()
+        except Exception as e:
+            print(f"Error loading host health: {e}")
+            return
+        finally:
+            db.close()
+        with self._lock:
+            self._hosts = {}
+            for row in rows:
+                state = self._get(row.host)
+                state.state = row.state or CLOSED
+                state.failures = row.failures or 0
+                state.opens = row.opens or 0
+                state.retry_at = row.retry_at
+                state.latencies.extend(json.loads(row.latencies or "[]"))
+                if state.state == HALF_OPEN:
+                    # The probe of an interrupted run never reported back
+                    state.state = OPEN
+
+    def save(self) -> None:
+        """Stores the state of the hosts that changed since the last load or save."""
+        with self._lock:
+            dirty = [state for state in self._hosts.values() if state.dirty]
+            rows = [
+                HostHealth(
+                    host=state.host,
+                    state=state.state,
+                    failures=state.failures,
+                    opens=state.opens,
+                    retry_at=state.retry_at,
+                    latencies=json.dumps([round(s, 4) for s in state.latencies]),
+                    updated_at=utcnow(),
+                )
+                for state in dirty
+            ]
+            for state in dirty:
+                state.dirty = False
+        if not rows:
+            return
+        db = SessionLocal()
+        try:
+            for row in rows:
+                db.merge(row)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error saving host health: {e}")
+        finally:
+            db.close()
+
+
+_tracker: Optional[HostHealthTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_host_health() -> HostHealthTracker:
+    """Returns the process-wide tracker, configured from the settings."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            from core.config import Settings
+
+            settings = Settings()
+            _tracker = HostHealthTracker(
+                timeout=settings.HTTP_TIMEOUT,
+                min_timeout=settings.HTTP_MIN_TIMEOUT,
+                timeout_multiplier=settings.HTTP_TIMEOUT_MULTIPLIER,
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+                max_open_seconds=settings.CIRCUIT_MAX_OPEN_SECONDS,
+            )
+        return _tracker
+
+
+# Performance characteristics:
+# - An open circuit fails a request in microseconds instead of a timeout;
+#   timeouts shrink to a few times the normal latency of each host.
+# Resource usage details:
+# - A bounded deque of latencies per host.
+# Threading considerations:
+# - All state changes are serialized by one lock; the database is only
+#   touched by load and save.
+# Error handling approach:
+# - Database errors while loading or saving are reported; the tracker then
+#   keeps working from its in-memory state.
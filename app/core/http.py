@@ -0,0 +1,329 @@
+# job_monitor/app/core/http.py
+"""Shared HTTP client module.
+
+All scrapers download pages through one pooled `requests.Session`, so
+connections are kept alive between requests to the same host. Requests can be
+made conditional (ETag / Last-Modified) and successful responses are kept in a
+per-run cache, so a page is downloaded at most once per monitoring cycle even
+if it is needed again, e.g. to find a screenshot selector.
+
+Transient failures (network errors, timeouts, 429 and 502-504 answers) are
+retried with jittered exponential backoff. Every fetch reports to the
+per-host circuit breaker and uses the adaptive timeout of its host, see
+core/host_health.py.
+
+Bodies are streamed in chunks and refused once they exceed `max_page_bytes`,
+so an oversized page costs at most that much memory instead of its full
+size; the run cache is bounded by total body size as well as by count.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.host_health import HostHealthTracker, get_host_health
+from core.metrics import span
+
+# Answers worth retrying: rate limited or the host is temporarily unavailable
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Longest Retry-After honoured within a fetch, in seconds
+MAX_RETRY_AFTER = 30
+
+# Bytes read from the socket at a time
+CHUNK_SIZE = 64 * 1024
+
+
+class PageTooLargeError(requests.exceptions.RequestException):
+    """Raised when a page body exceeds the maximum download size."""
+
+
+@dataclass
+class FetchResult:
+    """A downloaded page together with its cache validators."""
+
+    url: str
+    status_code: int
+    content: bytes = b""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        """Whether the server answered a conditional request with 304."""
+        return self.status_code == 304
+
+
+class HttpClient:
+    """Pooled HTTP client with conditional requests and a per-run cache."""
+
+    def __init__(
+        self,
+        timeout: float = 10,
+        pool_size: int = 16,
+        cache_size: int = 256,
+        retries: int = 2,
+        backoff: float = 1,
+        health: Optional[HostHealthTracker] = None,
+        cache_bytes: int = 64 * 1024 * 1024,
+        max_page_bytes: int = 20 * 1024 * 1024,
+    ) -> None:
+        """Initializes the client.
+
+        Args:
+            timeout: Timeout of requests to hosts without latency history, in seconds.
+            pool_size: Number of keep-alive connections kept per host.
+            cache_size: Maximum number of responses kept in the run cache.
+            retries: Retries of a fetch after a transient failure.
+            backoff: Base of the exponential backoff between retries, in seconds.
+            health: The per-host circuit breakers and timeouts. An in-memory
+                tracker is used if None.
+            cache_bytes: Maximum total size of the bodies in the run cache.
+            max_page_bytes: Maximum size of a (decompressed) page body.
+        """
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.cache_bytes = cache_bytes
+        self.max_page_bytes = max_page_bytes
+        self.retries = retries
+        self.backoff = backoff
+        self.health = health or HostHealthTracker(timeout=timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._cache: "OrderedDict[str, FetchResult]" = OrderedDict()
+        self._cached_bytes = 0
+        self._cache_lock = threading.Lock()
+
+    def clear_cache(self) -> None:
+        """Forgets every cached response. Called at the start of each run."""
+        with self._cache_lock:
+            self._cache.clear()
+            self._cached_bytes = 0
+
+    def get(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> FetchResult:
+        """Downloads a page, reusing the run cache when possible.
+
+        Args:
+            url: The URL to download.
+            etag: The ETag of the last seen version, sent as If-None-Match.
+            last_modified: The Last-Modified value of the last seen version,
+                sent as If-Modified-Since.
+
+        Returns:
+            The downloaded page. `not_modified` is True (and `content` empty)
+            when the server confirmed the page has not changed.
+
+        Raises:
+            PageTooLargeError: If the page exceeds `max_page_bytes`.
+            requests.exceptions.RequestException: If the request fails.
+        """
+        with self._cache_lock:
+            cached = self._cache.get(url)
+            if cached is not None:
+                self._cache.move_to_end(url)
+                return cached
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        response, body = self._request(url, headers)
+        if response.status_code == 304:
+            return FetchResult(
+                url=url,
+                status_code=304,
+                etag=response.headers.get("ETag", etag),
+                last_modified=response.headers.get("Last-Modified", last_modified),
+            )
+        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+
+        result = FetchResult(
+            url=url,
+            status_code=response.status_code,
+            content=body,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        if len(body) > self.cache_bytes:
+            return result
+        with self._cache_lock:
+            previous = self._cache.pop(url, None)
+            if previous is not None:
+                self._cached_bytes -= len(previous.content)
+            self._cache[url] = result
+            self._cached_bytes += len(body)
+            while len(self._cache) > self.cache_size or self._cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted.content)
+        return result
+
+    def _request(self, url: str, headers: Dict[str, str]) -> Tuple[requests.Response, bytes]:
+        """Sends a GET request, retrying transient failures.
+
+        The fetch counts as one success or one failure of the host, whatever
+        the number of attempts.
+
+        Returns:
+            The response and its body, read with `_read_body`.
+
+        Raises:
+            PageTooLargeError: If the body exceeds `max_page_bytes`.
+            requests.exceptions.RequestException: If the circuit of the host
+                is open, or the last attempt failed.
+        """
+        # Services on other ports of the same host have their own health
+        parts = urlsplit(url)
+        host = f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname or ""
+        self.health.check(host)
+        settled = False  # Whether the fetch was counted for the host
+        try:
+            for attempt in range(self.retries + 1):
+                start = time.perf_counter()
+                retry_after = None
+                try:
+                    with span("fetch"):
+                        response = self.session.get(
+                            url,
+                            headers=headers,
+                            timeout=self.health.timeout_for(host),
+                            stream=True,
+                        )
+                        answered = (
+                            response.status_code < 500
+                            and response.status_code not in RETRY_STATUSES
+                        )
+                        # Error answers are not read; closing returns the connection
+                        body = self._read_body(response, url) if answered else b""
+                        response.close()
+                except PageTooLargeError:
+                    # The host answered; the page itself is the problem
+                    settled = True
+                    self.health.record_success(host, time.perf_counter() - start)
+                    raise
+                except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError,
+                ) as e:
+                    error: requests.exceptions.RequestException = e
+                else:
+                    if answered:
+                        settled = True
+                        self.health.record_success(host, time.perf_counter() - start)
+                        return response, body
+                    error = requests.exceptions.HTTPError(
+                        f"{response.status_code} Error for url: {url}", response=response
+                    )
+                    if response.status_code not in RETRY_STATUSES:
+                        break
+                    retry_after = _retry_after(response)
+                    if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                        break
+
+                if attempt < self.retries:
+                    # Full jitter: concurrent workers do not retry in lockstep
+                    delay = random.uniform(0, self.backoff * 2**attempt)
+                    time.sleep(retry_after if retry_after is not None else delay)
+            settled = True
+            self.health.record_failure(host)
+            raise error
+        finally:
+            if not settled:
+                # Any other error (invalid URL, redirect loop, undecodable body)
+                # is a failure too, or a half-open circuit would keep its
+                # probe in flight forever
+                self.health.record_failure(host)
+
+    def _read_body(self, response: requests.Response, url: str) -> bytes:
+        """Reads a streamed body in chunks, refusing it beyond `max_page_bytes`.
+
+        Raises:
+            PageTooLargeError: If the declared or the received size is too large.
+        """
+        try:
+            declared = int(response.headers.get("Content-Length", ""))
+        except ValueError:
+            declared = 0
+        if declared > self.max_page_bytes:
+            response.close()
+            raise PageTooLargeError(
+                f"{url} is {declared} bytes, more than {self.max_page_bytes}"
+            )
+        body = bytearray()
+        for chunk in response.iter_content(CHUNK_SIZE):
+            body += chunk
+            if len(body) > self.max_page_bytes:
+                response.close()
+                raise PageTooLargeError(f"{url} is more than {self.max_page_bytes} bytes")
+        return bytes(body)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Returns the Retry-After delay of a response in seconds, if given as such."""
+    value = response.headers.get("Retry-After", "")
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Returns the process wide HTTP client, configured from the settings."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from core.config import Settings
+
+            settings = Settings()
+            _client = HttpClient(
+                timeout=settings.HTTP_TIMEOUT,
+                pool_size=max(settings.MAX_CONCURRENCY, settings.PER_HOST_CONCURRENCY),
+                cache_size=settings.HTTP_CACHE_SIZE,
+                retries=settings.HTTP_RETRIES,
+                backoff=settings.HTTP_BACKOFF_SECONDS,
+                health=get_host_health(),
+                cache_bytes=int(settings.HTTP_CACHE_MB * 1024 * 1024),
+                max_page_bytes=int(settings.HTTP_MAX_PAGE_MB * 1024 * 1024),
+            )
+        return _client
+
+
+# Performance characteristics:
+# - Keep-alive connections avoid a TCP/TLS handshake per page.
+# - A 304 answer carries no body, so nothing needs to be parsed or hashed.
+# Resource usage details:
+# - The run cache holds at most `cache_size` page bodies and `cache_bytes`
+#   bytes (LRU); pages larger than that are not cached.
+# - A download holds at most `max_page_bytes` plus one chunk.
+# Threading considerations:
+# - The session and the cache can be shared between threads.
+# Error handling approach:
+# - Request errors and 4xx/5xx answers raise RequestException to the caller,
+#   after the retries of transient failures; an open circuit raises
+#   CircuitOpenError (a RequestException) without any request.
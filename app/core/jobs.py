@@ -0,0 +1,271 @@
+# job_monitor/app/core/jobs.py
+"""Job records and change detection module.
+
+Scrapers return a list of `JobRecord`s with stable IDs. The records of the
+last processed version of every website are stored in the `jobs` table, so a
+change can be reported as the postings that were added, removed or modified
+instead of "the page changed".
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import dataclasses
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from core.metrics import span
+from core.utils import fast_hash, fast_hash_lines, generate_md5_hash
+from data_models import Job
+
+# Maximum number of postings listed per section of a change message
+MESSAGE_JOB_LIMIT = 20
+
+# Length of the MD5 fingerprints stored by earlier versions
+LEGACY_FINGERPRINT_LENGTH = 32
+
+
+@dataclass(frozen=True)
+class JobRecord:
+    """A single job posting extracted by a scraper."""
+
+    job_id: str
+    title: str
+    location: str = ""
+    job_type: str = ""
+    date: str = ""
+    url: str = ""
+
+    def fingerprint(self) -> str:
+        """Returns a hash of every field, used to detect modified postings."""
+        return fast_hash(
+            "\x1f".join(
+                (self.title, self.location, self.job_type, self.date, self.url)
+            )
+        )
+
+    def describe(self) -> str:
+        """Returns a one line, human readable description of the posting."""
+        return " | ".join(
+            part for part in (self.title, self.location, self.job_type) if part
+        )
+
+
+def make_job_id(*parts: str) -> str:
+    """Builds a stable job ID from the identifying fields of a posting.
+
+    Args:
+        parts: The fields identifying the posting, e.g. title and location.
+
+    Returns:
+        A short hash of the normalized fields.
+    """
+    key = "|".join(" ".join(part.split()).lower() for part in parts)
+    return generate_md5_hash(key)[:16]
+
+
+def unique_job_ids(records: List[JobRecord]) -> List[JobRecord]:
+    """Makes job IDs unique by suffixing repeated IDs with their occurrence.
+
+    Suffixes are assigned in the order of the record fingerprints, not of
+    the page, so postings sharing an ID keep their suffix when the page
+    lists them in another order.
+
+    Args:
+        records: The scraped records.
+
+    Returns:
+        The records in page order, with "#2", "#3", ... appended to repeated IDs.
+    """
+    positions: Dict[str, List[int]] = defaultdict(list)
+    for index, record in enumerate(records):
+        positions[record.job_id].append(index)
+    repeated: Dict[int, int] = {}  # Record index -> occurrence
+    for indexes in positions.values():
+        if len(indexes) > 1:
+            indexes.sort(key=lambda i: records[i].fingerprint())
+            for occurrence, index in enumerate(indexes, 1):
+                repeated[index] = occurrence
+
+    unique = []
+    for index, record in enumerate(records):
+        occurrence = repeated.get(index, 1)
+        if occurrence > 1:
+            record = dataclasses.replace(record, job_id=f"{record.job_id}#{occurrence}")
+        unique.append(record)
+    return unique
+
+
+def content_hash(records: List[JobRecord]) -> str:
+    """Returns the hash of a whole website, independent of the job order.
+
+    Args:
+        records: The scraped records.
+
+    Returns:
+        The hash of the sorted record fingerprints.
+    """
+    with span("hash"):
+        return fast_hash_lines(sorted(f"{r.job_id}:{r.fingerprint()}" for r in records))
+
+
+@dataclass
+class JobDiff:
+    """The postings that changed since the last processed version."""
+
+    added: List[JobRecord] = field(default_factory=list)
+    removed: List[JobRecord] = field(default_factory=list)
+    modified: List[JobRecord] = field(default_factory=list)
+    # Unreported: stored with a fingerprint of an earlier version
+    rehashed: List[JobRecord] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        """Whether any posting was added, removed or modified."""
+        return bool(self.added or self.removed or self.modified)
+
+    def describe(self, limit: int = MESSAGE_JOB_LIMIT) -> str:
+        """Returns the changed postings as message text.
+
+        Args:
+            limit: Maximum number of postings listed per section.
+
+        Returns:
+            One section per kind of change, empty sections omitted.
+        """
+        sections = []
+        for name, marker, records in (
+            ("Added", "+", self.added),
+            ("Removed", "-", self.removed),
+            ("Modified", "~", self.modified),
+        ):
+            if not records:
+                continue
+            lines = [f"{name} ({len(records)}):"]
+            lines += [f"{marker} {record.describe()}" for record in records[:limit]]
+            if len(records) > limit:
+                lines.append(f"... and {len(records) - limit} more")
+            sections.append("\n".join(lines))
+        return "\n\n".join(sections)
+
+
+def _to_record(job: Job) -> JobRecord:
+    """Converts a stored job row back to a JobRecord."""
+    return JobRecord(
+        job_id=job.job_id,
+        title=job.title or "",
+        location=job.location or "",
+        job_type=job.job_type or "",
+        date=job.date or "",
+        url=job.url or "",
+    )
+
+
+def compute_job_diff(db: Session, website_id: int, records: List[JobRecord]) -> JobDiff:
+    """Compares scraped records with the stored postings of a website.
+
+    Only the (job_id, fingerprint) pairs are loaded to compute the set
+    difference; full rows are only loaded for the removed postings.
+
+    Args:
+        db: The database session.
+        website_id: The ID of the website the records belong to.
+        records: The scraped records.
+
+    Returns:
+        The added, removed and modified postings.
+    """
+    stored = dict(
+        db.query(Job.job_id, Job.fingerprint).filter(Job.website_id == website_id)
+    )
+    current = {record.job_id: record for record in records}
+
+    diff = JobDiff()
+    for job_id, record in current.items():
+        fingerprint = stored.get(job_id)
+        if fingerprint is None:
+            diff.added.append(record)
+        elif fingerprint != record.fingerprint():
+            if len(fingerprint) == LEGACY_FINGERPRINT_LENGTH:
+                # Not comparable: adopt the current version silently
+                diff.rehashed.append(record)
+            else:
+                diff.modified.append(record)
+
+    removed_ids = stored.keys() - current.keys()
+    if removed_ids:
+        diff.removed = [
+            _to_record(job)
+            for job in db.query(Job).filter(
+                Job.website_id == website_id, Job.job_id.in_(removed_ids)
+            )
+        ]
+    return diff
+
+
+def apply_job_diff(db: Session, website_id: int, diff: JobDiff) -> None:
+    """Writes a diff to the `jobs` table, touching only the changed rows.
+
+    The caller is responsible for committing the session.
+
+    Args:
+        db: The database session.
+        website_id: The ID of the website the diff belongs to.
+        diff: The diff returned by `compute_job_diff`.
+    """
+    if diff.removed:
+        db.query(Job).filter(
+            Job.website_id == website_id,
+            Job.job_id.in_([record.job_id for record in diff.removed]),
+        ).delete(synchronize_session=False)
+
+    for record in diff.modified + diff.rehashed:
+        db.query(Job).filter(
+            Job.website_id == website_id, Job.job_id == record.job_id
+        ).update(
+            {
+                Job.title: record.title,
+                Job.location: record.location,
+                Job.job_type: record.job_type,
+                Job.date: record.date,
+                Job.url: record.url,
+                Job.fingerprint: record.fingerprint(),
+            },
+            synchronize_session=False,
+        )
+
+    if diff.added:
+        db.execute(
+            insert(Job),
+            [
+                {
+                    "website_id": website_id,
+                    "job_id": record.job_id,
+                    "title": record.title,
+                    "location": record.location,
+                    "job_type": record.job_type,
+                    "date": record.date,
+                    "url": record.url,
+                    "fingerprint": record.fingerprint(),
+                }
+                for record in diff.added
+            ],
+        )
+
+
+# Performance characteristics:
+# - Diffing loads two short columns per stored posting through the
+#   (website_id, job_id) index; writes are proportional to the changed postings.
+# Resource usage details:
+# - Memory usage is proportional to the number of postings of one website.
+# Threading considerations:
+# - Stateless; sessions must not be shared between threads.
+# Error handling approach:
+# - Database errors propagate to the caller, which owns the transaction.
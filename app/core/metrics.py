@@ -0,0 +1,279 @@
+# job_monitor/app/core/metrics.py
+"""Timing instrumentation module.
+
+The hot path is wrapped in `span`s, one per stage: fetch, parse, hash,
+screenshot, db_commit and telegram_send, plus "site" (the end-to-end time of
+one website) and "cycle" (a whole run). Every span is added to a
+per-stage histogram and, if `METRICS_SPANS_FILE` is set, written as one JSON
+line tagged with the website being processed (see `site_context`).
+
+The histograms are exported in the Prometheus text format:
+- to `METRICS_TEXTFILE` at the end of every run, for the node_exporter
+  textfile collector;
+- on http://0.0.0.0:<METRICS_PORT>/metrics if `METRICS_PORT` is set.
+
+`profile_cycle` optionally profiles a whole monitoring run with cProfile or
+pyinstrument (`PROFILE_MODE`), writing one report per run to `PROFILE_DIR`.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Sequence
+
+from core.config import Settings
+
+# Upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# URL of the website being processed by the current thread or task
+current_site: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_site", default=None
+)
+
+
+class Histogram:
+    """A cumulative histogram of durations."""
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds: float, ok: bool = True) -> None:
+        """Adds one duration."""
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        if not ok:
+            self.errors += 1
+
+
+class Metrics:
+    """Per-stage histograms and the span log of the process."""
+
+    def __init__(self, spans_file: str = "") -> None:
+        """Initializes the registry.
+
+        Args:
+            spans_file: Path of the JSON lines span log, empty to disable it.
+        """
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._spans = open(spans_file, "a", buffering=1) if spans_file else None
+
+    def record(self, stage: str, seconds: float, ok: bool = True) -> None:
+        """Records one span of a stage."""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds, ok)
+            if self._spans is not None:
+                self._spans.write(
+                    json.dumps(
+                        {
+                            "ts": round(time.time(), 3),
+                            "site": current_site.get(),
+                            "stage": stage,
+                            "seconds": round(seconds, 6),
+                            "ok": ok,
+                        }
+                    )
+                    + "\n"
+                )
+
+    def render(self) -> str:
+        """Returns the histograms in the Prometheus text format."""
+        lines = [
+            "# HELP job_monitor_stage_duration_seconds Duration of the monitoring stages.",
+            "# TYPE job_monitor_stage_duration_seconds histogram",
+        ]
+        errors = [
+            "# HELP job_monitor_stage_errors_total Stage runs that raised an error.",
+            "# TYPE job_monitor_stage_errors_total counter",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                bounds = [str(bound) for bound in histogram.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        "job_monitor_stage_duration_seconds_bucket"
+                        f'{{stage="{stage}",le="{bound}"}} {cumulative}'
+                    )
+                lines.append(
+                    f'job_monitor_stage_duration_seconds_sum{{stage="{stage}"}} '
+                    f"{histogram.sum:.6f}"
+                )
+                lines.append(
+                    f'job_monitor_stage_duration_seconds_count{{stage="{stage}"}} '
+                    f"{histogram.count}"
+                )
+                errors.append(
+                    f'job_monitor_stage_errors_total{{stage="{stage}"}} {histogram.errors}'
+                )
+        return "\n".join(lines + errors) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically writes the histograms to a Prometheus textfile."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+def _serve(metrics: Metrics, port: int) -> None:
+    """Serves the histograms on /metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(
+        target=server.serve_forever, name="metrics-http", daemon=True
+    ).start()
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Returns the process-wide Metrics, starting the HTTP exporter if configured."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                settings = Settings()
+                metrics = Metrics(settings.METRICS_SPANS_FILE)
+                if settings.METRICS_PORT:
+                    try:
+                        _serve(metrics, settings.METRICS_PORT)
+                    except OSError as e:
+                        print(f"Could not serve metrics on port {settings.METRICS_PORT}: {e}")
+                _metrics = metrics
+    return _metrics
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Times the enclosed block as one run of a stage.
+
+    Args:
+        stage: The stage name, e.g. "fetch".
+    """
+    start = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        get_metrics().record(stage, time.perf_counter() - start, ok)
+
+
+@contextmanager
+def site_context(url: str) -> Iterator[None]:
+    """Tags the spans of the enclosed block with a website URL.
+
+    The tag follows asyncio tasks and `asyncio.to_thread` calls.
+    """
+    token = current_site.set(url)
+    try:
+        yield
+    finally:
+        current_site.reset(token)
+
+
+def export_metrics(settings: Optional[Settings] = None) -> None:
+    """Writes the Prometheus textfile, if configured."""
+    settings = settings or Settings()
+    if settings.METRICS_TEXTFILE:
+        try:
+            get_metrics().write_textfile(settings.METRICS_TEXTFILE)
+        except OSError as e:
+            print(f"Error writing metrics to {settings.METRICS_TEXTFILE}: {e}")
+
+
+@contextmanager
+def profile_cycle(settings: Optional[Settings] = None) -> Iterator[None]:
+    """Profiles the enclosed monitoring run if PROFILE_MODE is set.
+
+    "cprofile" writes a pstats file (calling thread only), "pyinstrument"
+    an HTML report (requires the optional pyinstrument package).
+    """
+    settings = settings or Settings()
+    mode = settings.PROFILE_MODE
+    if not mode:
+        yield
+        return
+
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    base = os.path.join(settings.PROFILE_DIR, f"cycle-{stamp}-{os.getpid()}")
+    if mode == "cprofile":
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(f"{base}.prof")
+    elif mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("PROFILE_MODE=pyinstrument requires the pyinstrument package")
+            yield
+            return
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(f"{base}.html", "w") as f:
+                f.write(profiler.output_html())
+    else:
+        raise ValueError(f"Invalid profile mode: {mode}")
+
+
+# Performance characteristics:
+# - A span costs two perf_counter calls and a short locked update; the span
+#   log is line buffered.
+# Resource usage details:
+# - One fixed-size histogram per stage.
+# Threading considerations:
+# - Recording is serialized by a lock; the HTTP exporter runs in a daemon thread.
+# Error handling approach:
+# - Spans record failures and re-raise; export errors are reported, never raised.
@@ -0,0 +1,160 @@
+# job_monitor/app/core/normalize.py
+"""Record normalization module.
+
+Scraped text carries noise that changes without the postings changing:
+relative dates ("Posted 2 days ago"), counters ("14 applicants"), tracking
+parameters in links, Unicode and whitespace variants. Hashing it as is makes
+every such change an alert, with its screenshot and database writes.
+
+`normalize_records` runs between parsing and hashing (see
+`BaseScraper.extract`) and applies the `NormalizationRules` of the scraper:
+- text fields are NFKC normalized, volatile tokens removed and whitespace
+  collapsed;
+- fields listed as volatile are cleared;
+- tracking query parameters are removed from links, and from job IDs that
+  are links, as are fragments unless they are routes ("#/job/123").
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import dataclasses
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import cached_property
+from typing import List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from core.jobs import JobRecord
+
+# Tokens that change over time without the posting changing
+VOLATILE_PATTERNS = (
+    # Relative dates: "2 days ago", "Posted an hour ago", "Today"
+    r"\b(?:posted\s+|updated\s+|added\s+)?(?:\d+|an?|one)\s+"
+    r"(?:second|minute|min|hour|hr|day|week|month|year)s?\s+ago\b",
+    r"\b(?:posted\s+|updated\s+|added\s+)?(?:just\s+now|today|yesterday)\b",
+    # Countdowns: "Closes in 3 days"
+    r"\b(?:closing|closes|expires?|ends?)\s+in\s+\d+\s+(?:minute|hour|day|week)s?\b",
+    # Counters: "14 applicants", "230 views"
+    r"\b\d+\s+(?:applicants?|applications?|views?|candidates?|people\s+applied)\b",
+)
+
+# Left behind by removed tokens: "Nurse (14 applicants)" -> "Nurse ()"
+EMPTY_BRACKETS = re.compile(r"\(\s*\)|\[\s*\]")
+SEPARATORS = " \t\r\n·|•-–—,:;"
+
+# Query parameters that identify a visit, not a posting: exact names, and
+# name prefixes
+TRACKING_PARAMS = ("fbclid", "gclid", "mc_cid", "mc_eid", "_ga", "sessionid", "sid")
+TRACKING_PREFIXES = ("utm_",)
+
+# Fragments of single page application routes, which identify the posting
+ROUTE_FRAGMENTS = ("/", "!")
+
+# JobRecord fields holding text
+TEXT_FIELDS = ("title", "location", "job_type", "date")
+
+
+@dataclass(frozen=True)
+class NormalizationRules:
+    """How the records of a scraper are normalized before hashing."""
+
+    patterns: Tuple[str, ...] = VOLATILE_PATTERNS  # Removed from every text field
+    volatile_fields: Tuple[str, ...] = ()  # Fields cleared entirely
+    tracking_params: Tuple[str, ...] = TRACKING_PARAMS  # Exact names
+    tracking_prefixes: Tuple[str, ...] = TRACKING_PREFIXES  # Name prefixes
+
+    def extend(self, *patterns: str, volatile_fields: Tuple[str, ...] = ()) -> NormalizationRules:
+        """Returns these rules with more volatile patterns and fields."""
+        return dataclasses.replace(
+            self,
+            patterns=self.patterns + patterns,
+            volatile_fields=self.volatile_fields + tuple(volatile_fields),
+        )
+
+    @cached_property
+    def regex(self) -> re.Pattern:
+        """All patterns compiled into one case-insensitive expression."""
+        return re.compile("|".join(f"(?:{p})" for p in self.patterns), re.IGNORECASE)
+
+
+DEFAULT_RULES = NormalizationRules()
+
+
+def normalize_text(text: str, rules: NormalizationRules = DEFAULT_RULES) -> str:
+    """Normalizes one text field.
+
+    Args:
+        text: The scraped text.
+        rules: The normalization rules.
+
+    Returns:
+        The NFKC normalized text without volatile tokens, whitespace collapsed.
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text)
+    if rules.patterns:
+        text, removed = rules.regex.subn(" ", text)
+        if removed:
+            text = EMPTY_BRACKETS.sub(" ", text).strip(SEPARATORS)
+    return " ".join(text.split())
+
+
+def normalize_url(url: str, rules: NormalizationRules = DEFAULT_RULES) -> str:
+    """Removes tracking query parameters and fragments other than routes from a link."""
+    if not url or ("?" not in url and "#" not in url):
+        return url.strip()
+    parts = urlsplit(url.strip())
+    query = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in rules.tracking_params
+        and not name.lower().startswith(rules.tracking_prefixes)
+    ]
+    fragment = parts.fragment if parts.fragment.startswith(ROUTE_FRAGMENTS) else ""
+    return urlunsplit(parts._replace(query=urlencode(query), fragment=fragment))
+
+
+def normalize_record(record: JobRecord, rules: NormalizationRules = DEFAULT_RULES) -> JobRecord:
+    """Normalizes the fields of one record, see the module docstring."""
+    changes = {
+        name: "" if name in rules.volatile_fields else normalize_text(getattr(record, name), rules)
+        for name in TEXT_FIELDS
+    }
+    url = normalize_url(record.url, rules)
+    changes["url"] = url
+    if record.job_id == record.url:
+        # Postings identified by their link keep following it
+        changes["job_id"] = url
+    return dataclasses.replace(record, **changes)
+
+
+def normalize_records(
+    records: List[JobRecord], rules: NormalizationRules = DEFAULT_RULES
+) -> List[JobRecord]:
+    """Normalizes scraped records, keeping their order.
+
+    Args:
+        records: The records returned by a scraper.
+        rules: The normalization rules of the scraper.
+
+    Returns:
+        The normalized records.
+    """
+    return [normalize_record(record, rules) for record in records]
+
+
+# Performance characteristics:
+# - One combined regex substitution per text field; links without a query
+#   string are returned without parsing.
+# Resource usage details:
+# - Creates one new record per scraped record.
+# Threading considerations:
+# - Stateless apart from the compiled regex cached on the rules.
+# Error handling approach:
+# - Pure string functions; no errors are expected.
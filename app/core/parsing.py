@@ -0,0 +1,438 @@
+# job_monitor/app/core/parsing.py
+"""HTML parsing backends module.
+
+Scrapers query pages through a small `Node` interface and module level
+`Selector`s, so the parser doing the work can be swapped with the
+`PARSER_BACKEND` setting:
+
+- "bs4": BeautifulSoup with the built-in html.parser (default, no extra
+  dependency).
+- "lxml": lxml.html with precompiled cssselect selectors.
+- "selectolax": selectolax's C HTML parser (lexbor engine when available).
+- "strainer": BeautifulSoup building only the subtrees a scraper asks for
+  (SoupStrainer), falling back to a full parse for scrapers that need the
+  whole document.
+
+lxml, cssselect and selectolax are optional; if the configured backend is
+not installed, "bs4" is used instead.
+
+Scrapers that only need repeated blocks of a page (e.g. one element per
+job) iterate them with `iter_strained`. The lxml backend parses the page
+incrementally and drops each block, and everything before it, once the
+scraper has processed it, so the tree of a page with thousands of postings
+never exists in full; the other backends build their tree and select.
+
+Pages that embed their data as a JavaScript assignment can skip the tree
+altogether with `extract_script_json`.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import json
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# A SoupStrainer spec: (tag name, attributes) of the subtrees to build. An
+# attribute value is an exact string or a compiled regex; like SoupStrainer,
+# both are matched against each class of a multi-valued class attribute
+Strain = Tuple[str, Dict[str, Union[str, re.Pattern]]]
+
+# Bytes fed to an incremental parser at a time
+FEED_SIZE = 64 * 1024
+
+
+class Node(ABC):
+    """A backend independent view of an HTML element."""
+
+    def __init__(self, element: Any, backend: "ParseBackend") -> None:
+        self.element = element
+        self.backend = backend
+
+    @property
+    @abstractmethod
+    def tag(self) -> str:
+        """The tag name of the element."""
+
+    @property
+    @abstractmethod
+    def parent(self) -> Optional["Node"]:
+        """The parent element, or None for the root."""
+
+    @abstractmethod
+    def text(self, separator: str = "") -> str:
+        """Returns the stripped text pieces of the element, joined by separator."""
+
+    @abstractmethod
+    def attr(self, name: str) -> Optional[str]:
+        """Returns an attribute value, or None if it is not set."""
+
+    def find_parent(self, tag: str) -> Optional["Node"]:
+        """Returns the closest ancestor with the given tag name."""
+        node = self.parent
+        while node is not None and node.tag != tag:
+            node = node.parent
+        return node
+
+
+class ParseBackend(ABC):
+    """Parses documents and evaluates compiled selectors on their nodes."""
+
+    name: str
+
+    @abstractmethod
+    def parse(self, content: bytes, strain: Optional[Strain] = None) -> Node:
+        """Parses a document and returns its root node.
+
+        Args:
+            content: The raw HTML.
+            strain: The subtrees the caller needs; only used by backends that
+                can skip building the rest of the tree.
+        """
+
+    @abstractmethod
+    def compile(self, css: str) -> Any:
+        """Compiles a CSS selector for this backend."""
+
+    @abstractmethod
+    def select(self, compiled: Any, node: Node) -> List[Node]:
+        """Returns the descendants of node matching a compiled selector."""
+
+    def iter_strained(
+        self, content: bytes, strain: Strain, selector: "Selector"
+    ) -> Iterator[Node]:
+        """Yields the elements of a document matching a strain, in document order.
+
+        Args:
+            content: The raw HTML.
+            strain: The elements to yield, as (tag name, attributes).
+            selector: The same elements as a CSS selector, for backends that
+                build the whole tree.
+        """
+        yield from selector.select(self.parse(content, strain))
+
+
+class _SoupNode(Node):
+    """Node wrapping a BeautifulSoup Tag."""
+
+    @property
+    def tag(self) -> str:
+        return self.element.name
+
+    @property
+    def parent(self) -> Optional[Node]:
+        parent = self.element.parent
+        return _SoupNode(parent, self.backend) if parent is not None else None
+
+    def text(self, separator: str = "") -> str:
+        return self.element.get_text(separator=separator, strip=True)
+
+    def attr(self, name: str) -> Optional[str]:
+        value = self.element.get(name)
+        # BeautifulSoup returns multi-valued attributes such as class as lists
+        return " ".join(value) if isinstance(value, list) else value
+
+
+class SoupBackend(ParseBackend):
+    """BeautifulSoup backend, optionally building only the strained subtrees."""
+
+    def __init__(self, strained: bool = False) -> None:
+        self.strained = strained
+        self.name = "strainer" if strained else "bs4"
+
+    def parse(self, content: bytes, strain: Optional[Strain] = None) -> Node:
+        from bs4 import BeautifulSoup, SoupStrainer
+
+        parse_only = None
+        if self.strained and strain is not None:
+            tag, attrs = strain
+            parse_only = SoupStrainer(tag, attrs=attrs)
+        return _SoupNode(
+            BeautifulSoup(content, "html.parser", parse_only=parse_only), self
+        )
+
+    def compile(self, css: str) -> Any:
+        import soupsieve
+
+        return soupsieve.compile(css)
+
+    def select(self, compiled: Any, node: Node) -> List[Node]:
+        return [_SoupNode(tag, self) for tag in compiled.select(node.element)]
+
+
+class _LxmlNode(Node):
+    """Node wrapping an lxml.html element."""
+
+    @property
+    def tag(self) -> str:
+        return self.element.tag
+
+    @property
+    def parent(self) -> Optional[Node]:
+        parent = self.element.getparent()
+        return _LxmlNode(parent, self.backend) if parent is not None else None
+
+    def text(self, separator: str = "") -> str:
+        return separator.join(
+            piece.strip() for piece in self.element.itertext() if piece.strip()
+        )
+
+    def attr(self, name: str) -> Optional[str]:
+        return self.element.get(name)
+
+
+class LxmlBackend(ParseBackend):
+    """lxml backend with precompiled cssselect selectors."""
+
+    name = "lxml"
+
+    def __init__(self) -> None:
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+
+        self._html = lxml.html
+        self._css_selector = CSSSelector
+
+    def parse(self, content: bytes, strain: Optional[Strain] = None) -> Node:
+        return _LxmlNode(self._html.document_fromstring(content), self)
+
+    def compile(self, css: str) -> Any:
+        return self._css_selector(css)
+
+    def select(self, compiled: Any, node: Node) -> List[Node]:
+        return [_LxmlNode(element, self) for element in compiled(node.element)]
+
+    def iter_strained(
+        self, content: bytes, strain: Strain, selector: "Selector"
+    ) -> Iterator[Node]:
+        """Parses incrementally, dropping every yielded element once it is processed."""
+        from lxml import etree
+
+        tag, attrs = strain
+        parser = etree.HTMLPullParser(events=("end",), tag=tag)
+        for start in range(0, len(content), FEED_SIZE):
+            parser.feed(content[start : start + FEED_SIZE])
+            yield from self._strained_events(parser, attrs)
+        parser.close()
+        yield from self._strained_events(parser, attrs)
+
+    def _strained_events(self, parser: Any, attrs: Dict[str, Any]) -> Iterator[Node]:
+        """Yields the completed elements matching attrs, then frees them."""
+        for _, element in parser.read_events():
+            if not all(_attr_matches(element.get(name), value) for name, value in attrs.items()):
+                continue
+            yield _LxmlNode(element, self)
+            # Processed: drop its subtree and the siblings parsed before it
+            element.clear()
+            parent = element.getparent()
+            while parent is not None and element.getprevious() is not None:
+                del parent[0]
+
+
+class _SelectolaxNode(Node):
+    """Node wrapping a selectolax node."""
+
+    @property
+    def tag(self) -> str:
+        return self.element.tag
+
+    @property
+    def parent(self) -> Optional[Node]:
+        parent = self.element.parent
+        return _SelectolaxNode(parent, self.backend) if parent is not None else None
+
+    def text(self, separator: str = "") -> str:
+        return self.element.text(separator=separator, strip=True)
+
+    def attr(self, name: str) -> Optional[str]:
+        return self.element.attributes.get(name)
+
+
+class SelectolaxBackend(ParseBackend):
+    """selectolax backend. Selectors are compiled by the engine on each query."""
+
+    name = "selectolax"
+
+    def __init__(self) -> None:
+        try:
+            from selectolax.lexbor import LexborHTMLParser as HTMLParser
+        except ImportError:
+            # selectolax < 0.3.13 only ships the Modest engine
+            from selectolax.parser import HTMLParser
+
+        self._parser = HTMLParser
+
+    def parse(self, content: bytes, strain: Optional[Strain] = None) -> Node:
+        return _SelectolaxNode(self._parser(content).root, self)
+
+    def compile(self, css: str) -> Any:
+        return css
+
+    def select(self, compiled: Any, node: Node) -> List[Node]:
+        return [_SelectolaxNode(element, self) for element in node.element.css(compiled)]
+
+
+def _attr_matches(actual: Optional[str], expected: Union[str, re.Pattern]) -> bool:
+    """Matches an attribute like SoupStrainer: class values match any of the classes."""
+    if actual is None:
+        return False
+    if isinstance(expected, re.Pattern):
+        return expected.search(actual) is not None or any(
+            expected.search(value) for value in actual.split()
+        )
+    return actual == expected or expected in actual.split()
+
+
+def _create_backend(name: str) -> ParseBackend:
+    """Instantiates a backend by name, falling back to bs4 if unavailable."""
+    factories = {
+        "bs4": SoupBackend,
+        "strainer": lambda: SoupBackend(strained=True),
+        "lxml": LxmlBackend,
+        "selectolax": SelectolaxBackend,
+    }
+    if name not in factories:
+        raise ValueError(f"Invalid parser backend: {name}")
+    try:
+        return factories[name]()
+    except ImportError as e:
+        print(f"Parser backend '{name}' is not available ({e}), using bs4")
+        return SoupBackend()
+
+
+_backends: Dict[str, ParseBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: Optional[str] = None) -> ParseBackend:
+    """Returns the shared instance of a parse backend.
+
+    Args:
+        name: The backend name. Defaults to the PARSER_BACKEND setting.
+    """
+    if name is None:
+        from core.config import Settings
+
+        name = Settings().PARSER_BACKEND
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = _create_backend(name)
+        return _backends[name]
+
+
+def parse_html(
+    content: bytes, strain: Optional[Strain] = None, backend: Optional[str] = None
+) -> Node:
+    """Parses a document with the configured backend.
+
+    Args:
+        content: The raw HTML.
+        strain: The subtrees the caller needs, used by the "strainer" backend.
+        backend: The backend name. Defaults to the PARSER_BACKEND setting.
+
+    Returns:
+        The root node of the document.
+    """
+    return get_backend(backend).parse(content, strain)
+
+
+def iter_strained(
+    content: bytes, strain: Strain, selector: "Selector", backend: Optional[str] = None
+) -> Iterator[Node]:
+    """Yields the elements of a document matching a strain, see the module docstring.
+
+    A yielded element may be freed as soon as the next one is requested, so
+    it must be processed before resuming the iteration.
+
+    Args:
+        content: The raw HTML.
+        strain: The elements to yield, as (tag name, attributes).
+        selector: The same elements as a CSS selector.
+        backend: The backend name. Defaults to the PARSER_BACKEND setting.
+    """
+    return get_backend(backend).iter_strained(content, strain, selector)
+
+
+class Selector:
+    """A CSS selector, compiled once per backend and reused for every page."""
+
+    def __init__(self, css: str) -> None:
+        self.css = css
+        self._compiled: Dict[str, Any] = {}
+
+    def _compiled_for(self, backend: ParseBackend) -> Any:
+        compiled = self._compiled.get(backend.name)
+        if compiled is None:
+            compiled = self._compiled[backend.name] = backend.compile(self.css)
+        return compiled
+
+    def select(self, node: Node) -> List[Node]:
+        """Returns the descendants of node matching the selector."""
+        return node.backend.select(self._compiled_for(node.backend), node)
+
+    def select_one(self, node: Node) -> Optional[Node]:
+        """Returns the first descendant of node matching the selector, or None."""
+        matches = self.select(node)
+        return matches[0] if matches else None
+
+
+def extract_script_json(content: bytes, marker: bytes) -> Optional[Any]:
+    """Decodes the JSON value assigned to a JavaScript variable in a page.
+
+    The assignment is located with a byte search, no HTML tree is built.
+
+    Args:
+        content: The raw HTML.
+        marker: The assigned name, e.g. b"window.initData".
+
+    Returns:
+        The decoded value, or None if the page has no such assignment or
+        its value is not valid JSON.
+    """
+    start = content.find(marker)
+    if start < 0:
+        return None
+    start = content.find(b"=", start + len(marker))
+    if start < 0:
+        return None
+    end = content.find(b"</script", start)
+    if end < 0:
+        end = len(content)
+    blob = content[start + 1 : end].strip().rstrip(b";").rstrip()
+    try:
+        return _json_loads(blob)
+    except ValueError:
+        pass
+    try:
+        # Other statements follow the assignment; decode the first value only
+        rest = content[start + 1 :].decode("utf-8", "replace").lstrip()
+        value, _ = json.JSONDecoder().raw_decode(rest)
+        return value
+    except ValueError:
+        return None
+
+
+# Performance characteristics:
+# - lxml and selectolax parse several times faster than html.parser; the
+#   strainer backend skips building the parts of the tree a scraper ignores.
+# - Selectors are compiled once per backend, not once per page.
+# - Embedded JSON is found with bytes.find and decoded with orjson when it is
+#   installed.
+# Resource usage details:
+# - The strainer backend keeps only the strained subtrees in memory; the
+#   lxml backend's `iter_strained` keeps about one strained subtree.
+# Threading considerations:
+# - Backends are stateless and shared; compiled selectors are read-only.
+# Error handling approach:
+# - Unknown backend names raise ValueError; missing optional dependencies
+#   fall back to bs4. Invalid embedded JSON is reported as None.
@@ -0,0 +1,223 @@
+# job_monitor/app/core/run_ledger.py
+"""Run ledger module.
+
+Records the progress of every monitoring run, so an interrupted run (crash,
+preempted node, deploy) can be resumed instead of started over:
+- `runs` holds one row per run, finished or not;
+- `run_sites` holds the websites a run has finished with, written in the
+  same transaction as their updates (see `UpdateBatch.mark_done`);
+- `notifications` holds every notification of a run by idempotency key,
+  "pending" when queued and "sent" once Telegram confirmed it.
+
+A run over the same websites as an unfinished run started less than
+RUN_RESUME_SECONDS ago resumes it: websites already done are skipped, and
+notifications already sent are not sent again, e.g. for a website that was
+interrupted between its alert and its database update.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import Future
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from core.config import Settings
+from core.database import SessionLocal
+from core.utils import fast_hash, utcnow
+from data_models import Notification, Run, RunSite
+
+PENDING = "pending"
+SENT = "sent"
+
+
+def run_scope(website_ids: Optional[List[int]]) -> str:
+    """Returns the key of the websites of a run, "all" for every website."""
+    if website_ids is None:
+        return "all"
+    return fast_hash(",".join(str(website_id) for website_id in sorted(website_ids)))
+
+
+class RunLedger:
+    """The ledger of one monitoring run."""
+
+    def __init__(self, run_id: int, done: Optional[Dict[int, str]] = None) -> None:
+        """Initializes the ledger.
+
+        Args:
+            run_id: The ID of the run.
+            done: The outcome of the websites already done, by website ID.
+        """
+        self.run_id = run_id
+        self.done: Dict[int, str] = done or {}
+
+    @classmethod
+    def start(
+        cls, website_ids: Optional[List[int]] = None, settings: Optional[Settings] = None
+    ) -> RunLedger:
+        """Resumes the unfinished run over the same websites, or starts a new one.
+
+        Args:
+            website_ids: The websites of the run. All websites if None.
+            settings: The application settings. Loaded from the environment if None.
+
+        Returns:
+            The ledger of the run.
+        """
+        settings = settings or Settings()
+        scope = run_scope(website_ids)
+        now = utcnow()
+        db = SessionLocal()
+        try:
+            _prune(db, now - timedelta(days=settings.RUN_HISTORY_DAYS))
+            run = None
+            if settings.RUN_RESUME_SECONDS:
+                run = (
+                    db.query(Run)
+                    .filter(
+                        Run.scope == scope,
+                        Run.finished_at.is_(None),
+                        Run.started_at >= now - timedelta(seconds=settings.RUN_RESUME_SECONDS),
+                    )
+                    .order_by(Run.started_at.desc())
+                    .first()
+                )
+            if run is not None:
+                done = dict(
+                    db.query(RunSite.website_id, RunSite.outcome).filter(
+                        RunSite.run_id == run.id
+                    )
+                )
+                print(f"Resuming run {run.id}: {len(done)} websites already done")
+                return cls(run.id, done)
+
+            run = Run(scope=scope, started_at=now)
+            db.add(run)
+            db.commit()
+            return cls(run.id)
+        finally:
+            db.close()
+
+    def finish(self) -> None:
+        """Marks the run as finished; it will not be resumed."""
+        db = SessionLocal()
+        try:
+            db.query(Run).filter(Run.id == self.run_id).update(
+                {Run.finished_at: utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error finishing run {self.run_id}: {e}")
+        finally:
+            db.close()
+
+    def _key(self, key: str) -> str:
+        """Scopes an idempotency key to the run."""
+        return f"{self.run_id}:{key}"
+
+    def was_sent(self, key: str) -> bool:
+        """Whether Telegram confirmed the notification with this key."""
+        db = SessionLocal()
+        try:
+            notification = db.get(Notification, self._key(key))
+            return notification is not None and notification.status == SENT
+        finally:
+            db.close()
+
+    def send_once(
+        self, key: str, send: Callable[[], Future], website_id: Optional[int] = None
+    ) -> Optional[Future]:
+        """Queues a notification unless it was already sent by this run.
+
+        Args:
+            key: The idempotency key, unique within the run.
+            send: Queues the notification, e.g. a partial of `send_alert`.
+            website_id: The website the notification is about, if any.
+
+        Returns:
+            The future of the queued notification, or None if it was skipped.
+        """
+        if self.was_sent(key):
+            print(f"Notification {key} was already sent")
+            return None
+        full_key = self._key(key)
+        db = SessionLocal()
+        try:
+            db.merge(
+                Notification(
+                    key=full_key,
+                    run_id=self.run_id,
+                    website_id=website_id,
+                    status=PENDING,
+                    created_at=utcnow(),
+                )
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error recording notification {key}: {e}")
+        finally:
+            db.close()
+
+        future = send()
+        future.add_done_callback(
+            lambda delivered: delivered.result() and self._mark_sent(full_key)
+        )
+        return future
+
+    def _mark_sent(self, full_key: str) -> None:
+        """Records that Telegram confirmed a notification."""
+        db = SessionLocal()
+        try:
+            db.query(Notification).filter(Notification.key == full_key).update(
+                {Notification.status: SENT, Notification.sent_at: utcnow()},
+                synchronize_session=False,
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error recording notification {full_key} as sent: {e}")
+        finally:
+            db.close()
+
+
+def send_once(
+    ledger: Optional[RunLedger],
+    key: str,
+    send: Callable[[], Future],
+    website_id: Optional[int] = None,
+) -> Optional[Future]:
+    """Queues a notification through the ledger, or directly without one."""
+    if ledger is None:
+        return send()
+    return ledger.send_once(key, send, website_id)
+
+
+def _prune(db, cutoff) -> None:
+    """Deletes the runs started before the cutoff, with their sites and notifications."""
+    old_runs = db.query(Run.id).filter(Run.started_at < cutoff)
+    db.query(RunSite).filter(RunSite.run_id.in_(old_runs.scalar_subquery())).delete(
+        synchronize_session=False
+    )
+    db.query(Notification).filter(
+        Notification.run_id.in_(old_runs.scalar_subquery())
+    ).delete(synchronize_session=False)
+    db.query(Run).filter(Run.started_at < cutoff).delete(synchronize_session=False)
+    db.commit()
+
+
+# Performance characteristics:
+# - Progress costs one row per website, inserted with the batched website
+#   updates; notifications cost a lookup and two small writes each.
+# Resource usage details:
+# - Rows older than RUN_HISTORY_DAYS are deleted when a run starts.
+# Threading considerations:
+# - Every call uses its own session; `_mark_sent` runs in the notifier thread.
+# Error handling approach:
+# - Ledger write errors are reported and never stop a run; a notification
+#   left "pending" is sent again if its run is resumed before its website
+#   was stored as done.
@@ -0,0 +1,300 @@
+# job_monitor/app/core/screenshot_store.py
+"""Content-addressed screenshot store module.
+
+Captured screenshots are stored under the SHA-256 of the captured PNG:
+- the image is re-encoded (WebP or JPEG) and optionally downscaled before
+  it is stored and uploaded; full-page PNGs of long job boards are several MB;
+- an identical capture maps to the same stored file, and the Telegram
+  `file_id` of its first upload is reused instead of uploading it again;
+- the history is bounded by file count and total size, evicting the least
+  recently used screenshots.
+
+Pillow is optional: without it, screenshots are stored as captured (PNG).
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import hashlib
+import io
+import os
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from core.config import Settings
+from core.database import SessionLocal
+from core.utils import utcnow
+from data_models import Screenshot
+
+# Screenshots used this recently are never evicted: they may still be
+# waiting in the Telegram queue
+EVICTION_GRACE = timedelta(hours=1)
+
+# Largest dimension WebP can encode; taller pages are stored as JPEG
+WEBP_MAX_DIMENSION = 16383
+
+# File extension of each SCREENSHOT_FORMAT
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg", "png": "png"}
+
+
+@dataclass
+class StoredScreenshot:
+    """A screenshot in the store."""
+
+    hash: str
+    path: str
+    telegram_file_id: Optional[str] = None
+
+
+def encode_image(
+    raw: bytes, image_format: str, quality: int, max_width: int
+) -> Tuple[bytes, str, int, int]:
+    """Re-encodes a captured PNG.
+
+    Args:
+        raw: The captured PNG.
+        image_format: "webp", "jpeg" or "png".
+        quality: Lossy encoding quality, 1-100.
+        max_width: Downscale wider images to this width, 0 to keep the width.
+
+    Returns:
+        The encoded bytes, the format used, the width and the height. The PNG
+        is returned unchanged if Pillow is not installed or cannot read it.
+    """
+    try:
+        from PIL import Image, UnidentifiedImageError
+    except ImportError:
+        return raw, "png", 0, 0
+
+    try:
+        image = Image.open(io.BytesIO(raw))
+    except UnidentifiedImageError as e:
+        print(f"Storing screenshot as captured: {e}")
+        return raw, "png", 0, 0
+    with image:
+        if max_width and image.width > max_width:
+            height = max(1, round(image.height * max_width / image.width))
+            image = image.resize((max_width, height), Image.LANCZOS)
+        if image_format == "webp" and max(image.size) > WEBP_MAX_DIMENSION:
+            image_format = "jpeg"
+        if image_format != "png":
+            image = image.convert("RGB")
+
+        output = io.BytesIO()
+        if image_format == "webp":
+            image.save(output, "WEBP", quality=quality, method=4)
+        elif image_format == "jpeg":
+            image.save(output, "JPEG", quality=quality, optimize=True, progressive=True)
+        else:
+            image.save(output, "PNG", optimize=True)
+        return output.getvalue(), image_format, image.width, image.height
+
+
+class ScreenshotStore:
+    """Stores screenshots by content hash with a bounded LRU history."""
+
+    def __init__(
+        self,
+        directory: str,
+        image_format: str = "webp",
+        quality: int = 80,
+        max_width: int = 0,
+        max_files: int = 500,
+        max_bytes: int = 500 * 1024 * 1024,
+    ) -> None:
+        """Initializes the store.
+
+        Args:
+            directory: Where the encoded screenshots are written.
+            image_format: "webp", "jpeg" or "png".
+            quality: Lossy encoding quality, 1-100.
+            max_width: Downscale wider screenshots to this width, 0 to keep it.
+            max_files: Maximum number of stored screenshots.
+            max_bytes: Maximum total size of the stored screenshots.
+
+        Raises:
+            ValueError: If an invalid image format is provided.
+        """
+        if image_format not in EXTENSIONS:
+            raise ValueError(f"Invalid screenshot format: {image_format}")
+        self.directory = directory
+        self.image_format = image_format
+        self.quality = quality
+        self.max_width = max_width
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        # Telegram file IDs by stored path, see `file_id_for`
+        self._file_ids: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, capture_path: str, website_id: Optional[int] = None) -> StoredScreenshot:
+        """Stores a captured screenshot and deletes the capture.
+
+        Args:
+            capture_path: The PNG written by the browser.
+            website_id: The website the screenshot shows.
+
+        Returns:
+            The stored screenshot; identical captures return the same entry.
+        """
+        with open(capture_path, "rb") as f:
+            raw = f.read()
+        os.remove(capture_path)
+        digest = hashlib.sha256(raw).hexdigest()
+        now = utcnow()
+
+        db = SessionLocal()
+        try:
+            row = db.get(Screenshot, digest)
+            if row is not None and os.path.exists(row.path):
+                row.last_used_at = now
+                db.commit()
+                stored = StoredScreenshot(row.hash, row.path, row.telegram_file_id)
+            else:
+                encoded, image_format, width, height = encode_image(
+                    raw, self.image_format, self.quality, self.max_width
+                )
+                path = os.path.join(
+                    self.directory, digest[:2], f"{digest}.{EXTENSIONS[image_format]}"
+                )
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(encoded)
+                os.replace(tmp_path, path)
+
+                if row is None:
+                    row = Screenshot(hash=digest, created_at=now)
+                    db.add(row)
+                row.website_id = website_id
+                row.path = path
+                row.size = len(encoded)
+                row.width = width or None
+                row.height = height or None
+                row.last_used_at = now
+                row.telegram_file_id = None
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Stored concurrently by another worker: same file, same row
+                    db.rollback()
+                stored = StoredScreenshot(digest, path)
+                self.evict(db)
+        finally:
+            db.close()
+
+        if stored.telegram_file_id:
+            with self._lock:
+                self._file_ids[stored.path] = stored.telegram_file_id
+        return stored
+
+    def get(self, digest: str) -> Optional[StoredScreenshot]:
+        """Returns a stored screenshot by hash, None if it was evicted."""
+        db = SessionLocal()
+        try:
+            row = db.get(Screenshot, digest)
+        finally:
+            db.close()
+        if row is None or not os.path.exists(row.path):
+            return None
+        return StoredScreenshot(row.hash, row.path, row.telegram_file_id)
+
+    @staticmethod
+    def hash_of(path: str) -> str:
+        """Returns the hash of a stored screenshot from its path."""
+        return os.path.splitext(os.path.basename(path))[0]
+
+    def file_id_for(self, path: str) -> Optional[str]:
+        """Returns the Telegram file ID of a stored screenshot, if it was uploaded."""
+        with self._lock:
+            return self._file_ids.get(path)
+
+    def remember_file_id(self, path: str, file_id: str) -> None:
+        """Records the Telegram file ID returned by the upload of a screenshot."""
+        with self._lock:
+            self._file_ids[path] = file_id
+        db = SessionLocal()
+        try:
+            db.query(Screenshot).filter(Screenshot.path == path).update(
+                {Screenshot.telegram_file_id: file_id}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error saving Telegram file ID: {e}")
+        finally:
+            db.close()
+
+    def evict(self, db) -> None:
+        """Deletes the least recently used screenshots beyond the history limits."""
+        count, total = db.query(func.count(Screenshot.hash), func.sum(Screenshot.size)).one()
+        total = total or 0
+        if count <= self.max_files and total <= self.max_bytes:
+            return
+
+        cutoff = utcnow() - EVICTION_GRACE
+        evicted = []
+        for row in (
+            db.query(Screenshot)
+            .filter(Screenshot.last_used_at < cutoff)
+            .order_by(Screenshot.last_used_at)
+            .yield_per(100)
+        ):
+            if count <= self.max_files and total <= self.max_bytes:
+                break
+            evicted.append(row.hash)
+            count -= 1
+            total -= row.size or 0
+            try:
+                os.remove(row.path)
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self._file_ids.pop(row.path, None)
+        if evicted:
+            db.query(Screenshot).filter(Screenshot.hash.in_(evicted)).delete(
+                synchronize_session=False
+            )
+            db.commit()
+
+
+_store: Optional[ScreenshotStore] = None
+_store_lock = threading.Lock()
+
+
+def get_screenshot_store(directory: str = "screenshots") -> ScreenshotStore:
+    """Returns the process-wide screenshot store, configured from the settings."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            settings = Settings()
+            _store = ScreenshotStore(
+                directory,
+                image_format=settings.SCREENSHOT_FORMAT,
+                quality=settings.SCREENSHOT_QUALITY,
+                max_width=settings.SCREENSHOT_MAX_WIDTH,
+                max_files=settings.SCREENSHOT_HISTORY_FILES,
+                max_bytes=settings.SCREENSHOT_HISTORY_MB * 1024 * 1024,
+            )
+        return _store
+
+
+# Performance characteristics:
+# - WebP at quality 80 is typically 5-10x smaller than the captured PNG;
+#   identical captures are neither re-encoded nor uploaded again.
+# Resource usage details:
+# - Disk usage is bounded by SCREENSHOT_HISTORY_FILES and SCREENSHOT_HISTORY_MB.
+# - Encoding holds one decoded image in memory.
+# Threading considerations:
+# - Can be used from any thread; every call uses its own session.
+# Error handling approach:
+# - Encoding and file errors propagate to the caller; concurrent inserts of
+#   the same screenshot are resolved by the primary key.
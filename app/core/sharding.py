@@ -0,0 +1,315 @@
+# job_monitor/app/core/sharding.py
+"""Sharding module.
+
+Splits the websites between worker processes, which can run on one machine
+(`run.py --daemon --workers N`) or in several container replicas sharing
+the database (`SHARDING_ENABLED=true`).
+
+- Every worker records a heartbeat in the `workers` table; workers whose
+  heartbeat is older than `WORKER_TIMEOUT_SECONDS` are considered gone.
+- The live workers are placed on a consistent hash ring, and each worker only
+  schedules the websites the ring assigns to it. A worker joining or leaving
+  only moves the websites of its neighbours on the ring.
+- Before checking a website, a worker takes a lease on its row: a single
+  UPDATE that only succeeds if the website is due and not leased by another
+  worker. While workers disagree on the ring (e.g. right after one joined),
+  the lease still ensures every website is processed once per cycle. Leases
+  expire after `LEASE_SECONDS`, so the websites of a crashed worker are
+  picked up again.
+- Heartbeats are sent from a background thread, which also renews the leases
+  of the worker, so a batch may take longer than the worker timeout and the
+  lease duration without losing its websites.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import bisect
+import hashlib
+import os
+import socket
+import threading
+from datetime import timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import or_, update
+
+from core.config import Settings
+from core.database import SessionLocal
+from core.utils import utcnow
+from data_models import Website, Worker
+
+
+def _ring_hash(key: str) -> int:
+    """Returns a stable 64-bit position on the ring."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """A consistent hash ring assigning website IDs to workers."""
+
+    def __init__(self, worker_ids: Iterable[str], vnodes: int = 64) -> None:
+        """Builds the ring.
+
+        Args:
+            worker_ids: The IDs of the live workers.
+            vnodes: Number of points per worker; more points spread the
+                websites more evenly.
+        """
+        self.worker_ids = sorted(set(worker_ids))
+        points: List[Tuple[int, str]] = sorted(
+            (_ring_hash(f"{worker_id}#{i}"), worker_id)
+            for worker_id in self.worker_ids
+            for i in range(vnodes)
+        )
+        self._positions = [position for position, _ in points]
+        self._owners = [worker_id for _, worker_id in points]
+
+    def owner(self, website_id: int) -> Optional[str]:
+        """Returns the worker responsible for a website, None if the ring is empty."""
+        if not self._owners:
+            return None
+        index = bisect.bisect(self._positions, _ring_hash(str(website_id)))
+        return self._owners[index % len(self._owners)]
+
+    def shard(self, website_ids: Iterable[int], worker_id: str) -> List[int]:
+        """Returns the websites assigned to a worker."""
+        return [
+            website_id for website_id in website_ids if self.owner(website_id) == worker_id
+        ]
+
+
+def default_worker_id() -> str:
+    """Returns an ID unique to this process: <hostname>-<pid>."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardCoordinator:
+    """Tracks the live workers and leases websites for one worker."""
+
+    def __init__(
+        self, worker_id: Optional[str] = None, settings: Optional[Settings] = None
+    ) -> None:
+        """Initializes the coordinator.
+
+        Args:
+            worker_id: The ID of this worker. Defaults to the WORKER_ID
+                setting, or <hostname>-<pid> if it is empty.
+            settings: The application settings. Loaded from the environment if None.
+        """
+        self.settings = settings or Settings()
+        self.worker_id = worker_id or self.settings.WORKER_ID or default_worker_id()
+        self.ring = HashRing([self.worker_id], self.settings.HASH_RING_VNODES)
+        # Lease statements run in the scheduler and the heartbeat thread
+        self._lease_lock = threading.Lock()
+        self._members_changed = threading.Event()
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    @property
+    def heartbeat_interval(self) -> float:
+        """Seconds between heartbeats, short enough for the timeout and leases."""
+        settings = self.settings
+        return min(
+            settings.WORKER_HEARTBEAT_SECONDS,
+            settings.WORKER_TIMEOUT_SECONDS / 3,
+            settings.LEASE_SECONDS / 3,
+        )
+
+    def start_heartbeat(self) -> None:
+        """Sends a heartbeat now, then keeps sending them from a background thread.
+
+        Every heartbeat also renews the leases of this worker, see `renew`.
+        """
+        if self.heartbeat():
+            self._members_changed.set()
+        self._stop_heartbeat.clear()
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop, name="shard-heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self) -> None:
+        """Body of the heartbeat thread."""
+        while not self._stop_heartbeat.wait(self.heartbeat_interval):
+            if self.heartbeat():
+                self._members_changed.set()
+            self.renew()
+
+    def stop_heartbeat(self) -> None:
+        """Stops the heartbeat thread, if running."""
+        self._stop_heartbeat.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join()
+            self._heartbeat_thread = None
+
+    def members_changed(self) -> bool:
+        """Whether a heartbeat saw workers join or leave since the last call."""
+        changed = self._members_changed.is_set()
+        self._members_changed.clear()
+        return changed
+
+    def heartbeat(self) -> bool:
+        """Records that this worker is alive and refreshes the ring.
+
+        Returns:
+            Whether the set of live workers changed since the last heartbeat.
+        """
+        now = utcnow()
+        cutoff = now - timedelta(seconds=self.settings.WORKER_TIMEOUT_SECONDS)
+        db = SessionLocal()
+        try:
+            worker = db.get(Worker, self.worker_id)
+            if worker is None:
+                worker = Worker(id=self.worker_id, started_at=now)
+                db.add(worker)
+            worker.heartbeat_at = now
+            # Forget workers that stopped without leaving
+            db.query(Worker).filter(Worker.heartbeat_at < cutoff).delete(
+                synchronize_session=False
+            )
+            db.commit()
+            live = [worker_id for (worker_id,) in db.query(Worker.id)]
+        except Exception as e:
+            db.rollback()
+            print(f"Error recording worker heartbeat: {e}")
+            return False
+        finally:
+            db.close()
+
+        if sorted(set(live) | {self.worker_id}) == self.ring.worker_ids:
+            return False
+        self.ring = HashRing(live + [self.worker_id], self.settings.HASH_RING_VNODES)
+        print(f"Worker {self.worker_id}: {len(self.ring.worker_ids)} live workers")
+        return True
+
+    def owns(self, website_id: int) -> bool:
+        """Whether the ring assigns a website to this worker."""
+        return self.ring.owner(website_id) == self.worker_id
+
+    def claim(self, website_ids: Sequence[int]) -> List[int]:
+        """Leases the given websites that are due and not leased by another worker.
+
+        Args:
+            website_ids: The websites this worker wants to check.
+
+        Returns:
+            The websites leased to this worker; only these may be checked.
+        """
+        if not website_ids:
+            return []
+        with self._lease_lock:
+            return self._claim(website_ids)
+
+    def _claim(self, website_ids: Sequence[int]) -> List[int]:
+        """Body of `claim`, run under the lease lock."""
+        now = utcnow()
+        expires_at = now + timedelta(seconds=self.settings.LEASE_SECONDS)
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Website)
+                .where(
+                    Website.id.in_(website_ids),
+                    or_(Website.next_check_at.is_(None), Website.next_check_at <= now),
+                    or_(
+                        Website.lease_owner.is_(None),
+                        Website.lease_owner == self.worker_id,
+                        Website.lease_expires_at < now,
+                    ),
+                )
+                .values(lease_owner=self.worker_id, lease_expires_at=expires_at),
+                execution_options={"synchronize_session": False},
+            )
+            db.commit()
+            return [
+                website_id
+                for (website_id,) in db.query(Website.id).filter(
+                    Website.id.in_(website_ids),
+                    Website.lease_owner == self.worker_id,
+                    Website.lease_expires_at == expires_at,
+                )
+            ]
+        except Exception as e:
+            db.rollback()
+            print(f"Error leasing websites: {e}")
+            return []
+        finally:
+            db.close()
+
+    def renew(self) -> None:
+        """Extends every lease of this worker by LEASE_SECONDS from now."""
+        expires_at = utcnow() + timedelta(seconds=self.settings.LEASE_SECONDS)
+        with self._lease_lock:
+            db = SessionLocal()
+            try:
+                db.execute(
+                    update(Website)
+                    .where(Website.lease_owner == self.worker_id)
+                    .values(lease_expires_at=expires_at),
+                    execution_options={"synchronize_session": False},
+                )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Error renewing leases: {e}")
+            finally:
+                db.close()
+
+    def release(self, website_ids: Optional[Sequence[int]] = None) -> None:
+        """Releases the leases of this worker.
+
+        Args:
+            website_ids: The websites to release. Releases every lease if None.
+        """
+        with self._lease_lock:
+            db = SessionLocal()
+            try:
+                statement = update(Website).where(Website.lease_owner == self.worker_id)
+                if website_ids is not None:
+                    statement = statement.where(Website.id.in_(website_ids))
+                db.execute(
+                    statement.values(lease_owner=None, lease_expires_at=None),
+                    execution_options={"synchronize_session": False},
+                )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Error releasing leases: {e}")
+            finally:
+                db.close()
+
+    def leave(self) -> None:
+        """Stops the heartbeats, releases every lease and removes this worker."""
+        self.stop_heartbeat()
+        self.release()
+        db = SessionLocal()
+        try:
+            db.query(Worker).filter(Worker.id == self.worker_id).delete(
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error removing worker: {e}")
+        finally:
+            db.close()
+
+
+# Performance characteristics:
+# - Ring lookups are O(log(workers * vnodes)); a membership change moves about
+#   1/n of the websites.
+# - Leasing a batch is one UPDATE and one SELECT, whatever the batch size.
+# Resource usage details:
+# - The ring holds HASH_RING_VNODES points per live worker.
+# - Renewing the leases is one UPDATE per heartbeat.
+# Threading considerations:
+# - One coordinator per worker process; sessions are created per call.
+# - The heartbeat thread only swaps the ring reference; lease statements of
+#   both threads are serialized, as `claim` finds its leases by expiry time.
+# Error handling approach:
+# - Database errors are reported and treated as "nothing leased", so a
+#   website is never checked without a lease.
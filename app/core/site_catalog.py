@@ -0,0 +1,517 @@
+# job_monitor/app/core/site_catalog.py
+"""Site catalogue module.
+
+Bulk operations on the monitored websites, used by the sites.py CLI:
+- `import_sites` streams websites from a CSV file, a JSON Lines file or an
+  XML sitemap (sitemap indexes and gzip included) and stores them in
+  batches: one upsert of the websites and one insert of their tags per
+  batch, committed together, instead of a query per website;
+- the `scraper_type` of a website without one is detected from its URL
+  (see `detect_scraper_type`);
+- websites are tagged (`website_tags` table) and enabled or disabled
+  (`enabled` column) in bulk, selected by URL, tag and scraper type.
+
+CSV files need a header with at least a `url` column; `scraper_type`,
+`tags` (comma separated), `enabled`, `poll_interval` and `screenshot_mode`
+are optional. JSON Lines files hold one object with the same keys, or one
+URL string, per line.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+
+import requests
+from sqlalchemy import select
+
+from core.database import SessionLocal, settings, tag_websites, upsert_websites
+from data_models import Website, WebsiteTag
+from scrapers.registry import detect_scraper_type, scraper_types
+
+FORMATS = ("csv", "jsonl", "sitemap")
+
+# Website columns read from import files, besides the URL
+IMPORT_COLUMNS = ("scraper_type", "enabled", "poll_interval", "screenshot_mode")
+
+SCREENSHOT_MODES = ("browser", "card", "none")
+
+# Nested sitemap indexes followed, and the timeout of each sitemap download
+MAX_SITEMAP_DEPTH = 3
+SITEMAP_TIMEOUT = 30
+
+TRUE_VALUES = ("1", "true", "yes", "y", "on")
+FALSE_VALUES = ("0", "false", "no", "n", "off")
+
+
+@dataclass
+class ImportReport:
+    """The outcome of an import."""
+
+    read: int = 0  # Entries read from the source
+    stored: int = 0  # Websites inserted, or updated with update=True
+    skipped: int = 0  # Entries without a valid URL or scraper type
+    failed: int = 0  # Entries of batches that could not be stored
+    batches: int = 0
+    seconds: float = 0.0
+
+    def message(self) -> str:
+        """Returns a one-line summary of the import."""
+        return (
+            f"Read {self.read} entries in {self.seconds:.2f}s: {self.stored} stored"
+            f" in {self.batches} batches, {self.skipped} skipped, {self.failed} failed"
+        )
+
+
+def detect_format(source: str) -> str:
+    """Guesses the format of a source from its name."""
+    name = source.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    if name.endswith(".xml") or name.startswith(("http://", "https://")):
+        return "sitemap"
+    raise ValueError(f"Cannot detect the format of {source}, pass one of {', '.join(FORMATS)}")
+
+
+@contextmanager
+def _open_text(source: str) -> Iterator[io.TextIOBase]:
+    """Opens a local file, or standard input for "-", as text."""
+    if source == "-":
+        yield sys.stdin
+    elif source.endswith(".gz"):
+        with gzip.open(source, "rt", encoding="utf-8-sig", newline="") as stream:
+            yield stream
+    else:
+        with open(source, encoding="utf-8-sig", newline="") as stream:
+            yield stream
+
+
+def read_csv(source: str) -> Iterator[Dict[str, object]]:
+    """Yields the rows of a CSV file as dicts, one at a time."""
+    with _open_text(source) as stream:
+        reader = csv.DictReader(stream)
+        if reader.fieldnames is None or "url" not in reader.fieldnames:
+            raise ValueError(f"{source} has no url column")
+        yield from reader
+
+
+def read_jsonl(source: str) -> Iterator[Dict[str, object]]:
+    """Yields the objects of a JSON Lines file, one at a time."""
+    with _open_text(source) as stream:
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                print(f"Skipping line {number} of {source}: {e}")
+                continue
+            yield {"url": entry} if isinstance(entry, str) else entry
+
+
+@contextmanager
+def _open_binary(source: str) -> Iterator[io.BufferedIOBase]:
+    """Opens a local file or downloads a URL as a byte stream, gunzipped if needed."""
+    response = None
+    if source.startswith(("http://", "https://")):
+        response = requests.get(source, stream=True, timeout=SITEMAP_TIMEOUT)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        stream = io.BufferedReader(response.raw)
+    else:
+        stream = open(source, "rb")
+    try:
+        if stream.peek(2)[:2] == b"\x1f\x8b":
+            # sitemap.xml.gz served without Content-Encoding
+            stream = gzip.GzipFile(fileobj=stream)
+        yield stream
+    finally:
+        stream.close()
+        if response is not None:
+            response.close()
+
+
+def read_sitemap(source: str, depth: int = 0) -> Iterator[Dict[str, object]]:
+    """Yields the URLs of a sitemap, following sitemap indexes.
+
+    The XML is parsed incrementally and every `<url>` element is freed once
+    read, so the memory used does not grow with the size of the sitemap.
+
+    Args:
+        source: The path or URL of the sitemap.
+        depth: The nesting level of the sitemap, see MAX_SITEMAP_DEPTH.
+    """
+    with _open_binary(source) as stream:
+        path: List[str] = []
+        root = None
+        for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+            name = element.tag.rpartition("}")[2]
+            if event == "start":
+                if root is None:
+                    root = element
+                path.append(name)
+                continue
+            path.pop()
+            if name == "loc" and path and element.text:
+                if path[-1] == "url":
+                    yield {"url": element.text.strip()}
+                elif path[-1] == "sitemap":
+                    if depth < MAX_SITEMAP_DEPTH:
+                        yield from read_sitemap(element.text.strip(), depth + 1)
+                    else:
+                        print(f"Skipping sitemap {element.text.strip()}: nested too deep")
+            elif name in ("url", "sitemap"):
+                root.clear()
+
+
+def read_sites(source: str, format: Optional[str] = None) -> Iterator[Dict[str, object]]:
+    """Yields the entries of a source in the given or detected format."""
+    format = format or detect_format(source)
+    if format == "csv":
+        return read_csv(source)
+    if format == "jsonl":
+        return read_jsonl(source)
+    if format == "sitemap":
+        return read_sitemap(source)
+    raise ValueError(f"Unknown format {format}, expected one of {', '.join(FORMATS)}")
+
+
+def parse_tags(value: object) -> List[str]:
+    """Returns the tags of a comma separated string or a list, lowercased."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [tag for tag in (str(tag).strip().lower() for tag in value) if tag]
+
+
+def parse_bool(value: object, default: bool = True) -> bool:
+    """Reads a flag from a CSV or JSON value; empty values give the default."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid flag: {value}")
+
+
+def site_row(
+    entry: Dict[str, object],
+    known_types: Iterable[str],
+    scraper_type: Optional[str] = None,
+    enabled: Optional[bool] = None,
+) -> Tuple[Dict[str, object], List[str]]:
+    """Turns an imported entry into Website column values and tags.
+
+    Args:
+        entry: The entry read from the source.
+        known_types: The scraper types that exist.
+        scraper_type: Used when the entry has none, before URL detection.
+        enabled: Overrides the `enabled` value of the entry if not None.
+
+    Returns:
+        The column values, with every key of IMPORT_COLUMNS, and the tags.
+
+    Raises:
+        ValueError: If the entry has no valid URL or scraper type.
+    """
+    url = str(entry.get("url") or "").strip()
+    if not url.startswith(("http://", "https://")):
+        raise ValueError(f"Invalid URL: {url!r}")
+    site_type = entry.get("scraper_type") or scraper_type or detect_scraper_type(url)
+    if not site_type:
+        raise ValueError(f"No scraper type matches {url}")
+    if site_type not in known_types:
+        raise ValueError(f"Unknown scraper type {site_type} for {url}")
+    poll_interval = entry.get("poll_interval")
+    screenshot_mode = entry.get("screenshot_mode") or None
+    if screenshot_mode is not None and screenshot_mode not in SCREENSHOT_MODES:
+        raise ValueError(f"Invalid screenshot mode {screenshot_mode} for {url}")
+    row = {
+        "url": url,
+        "scraper_type": site_type,
+        "enabled": enabled if enabled is not None else parse_bool(entry.get("enabled")),
+        "poll_interval": int(poll_interval) if poll_interval not in (None, "") else None,
+        "screenshot_mode": screenshot_mode,
+    }
+    return row, parse_tags(entry.get("tags"))
+
+
+def _store_batch(
+    rows: Dict[str, Dict[str, object]],
+    tags: Dict[str, List[str]],
+    update_columns: Sequence[str],
+) -> None:
+    """Upserts a batch of websites and adds their tags, in one transaction."""
+    db = SessionLocal()
+    try:
+        upsert_websites(db, list(rows.values()), update_columns)
+        tagged_urls = [url for url in rows if tags.get(url)]
+        if tagged_urls:
+            ids = dict(
+                db.query(Website.url, Website.id).filter(Website.url.in_(tagged_urls))
+            )
+            # One insert per distinct tag set, usually a single one
+            by_tags: Dict[Tuple[str, ...], List[int]] = {}
+            for url in tagged_urls:
+                by_tags.setdefault(tuple(tags[url]), []).append(ids[url])
+            for tag_set, website_ids in by_tags.items():
+                tag_websites(db, website_ids, tag_set)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def import_sites(
+    source: str,
+    format: Optional[str] = None,
+    tags: Sequence[str] = (),
+    scraper_type: Optional[str] = None,
+    enabled: Optional[bool] = None,
+    update: bool = False,
+    batch_size: Optional[int] = None,
+) -> ImportReport:
+    """Imports websites from a file or sitemap in batches.
+
+    Args:
+        source: A path, "-" for standard input, or the URL of a sitemap.
+        format: One of FORMATS. Detected from the source name if None.
+        tags: Added to every imported website, besides the tags of the entry.
+        scraper_type: The type of entries without one. Detected from the URL if None.
+        enabled: Overrides the `enabled` value of every entry if not None.
+        update: Overwrite the IMPORT_COLUMNS of websites that already exist;
+            otherwise they are left untouched. Tags are added either way.
+        batch_size: Websites per upsert and commit. DB_BATCH_SIZE if None.
+
+    Returns:
+        The counts of the import.
+    """
+    started = time.perf_counter()
+    batch_size = batch_size or settings.DB_BATCH_SIZE
+    update_columns = IMPORT_COLUMNS if update else ()
+    extra_tags = parse_tags(list(tags))
+    known_types = scraper_types()
+    report = ImportReport()
+    entries = read_sites(source, format)
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            break
+        report.read += len(batch)
+        # Keyed by URL: a statement cannot upsert the same row twice
+        rows: Dict[str, Dict[str, object]] = {}
+        row_tags: Dict[str, List[str]] = {}
+        for number, entry in enumerate(batch, report.read - len(batch) + 1):
+            try:
+                row, entry_tags = site_row(entry, known_types, scraper_type, enabled)
+            except (AttributeError, TypeError, ValueError) as e:
+                report.skipped += 1
+                print(f"Skipping entry {number}: {e}")
+                continue
+            if row["url"] in rows:
+                report.skipped += 1
+            rows[row["url"]] = row
+            merged = row_tags.get(row["url"], []) + entry_tags + extra_tags
+            row_tags[row["url"]] = sorted(set(merged))
+        if not rows:
+            continue
+        try:
+            _store_batch(rows, row_tags, update_columns)
+        except Exception as e:
+            report.failed += len(rows)
+            print(f"Error storing batch {report.batches + 1}: {e}")
+            continue
+        report.batches += 1
+        report.stored += len(rows)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _filters(
+    urls: Sequence[str] = (), tags: Sequence[str] = (), scraper_types: Sequence[str] = ()
+) -> list:
+    """Returns the conditions selecting websites; all of them must hold."""
+    conditions = []
+    if urls:
+        conditions.append(Website.url.in_(urls))
+    if tags:
+        conditions.append(
+            Website.id.in_(
+                select(WebsiteTag.website_id).where(WebsiteTag.tag.in_(parse_tags(list(tags))))
+            )
+        )
+    if scraper_types:
+        conditions.append(Website.scraper_type.in_(scraper_types))
+    return conditions
+
+
+def set_enabled(
+    enabled: bool,
+    urls: Sequence[str] = (),
+    tags: Sequence[str] = (),
+    scraper_types: Sequence[str] = (),
+) -> int:
+    """Enables or disables the selected websites in one statement.
+
+    Websites are selected by URL, by tag (any of them) and by scraper type;
+    without any selector every website is affected.
+
+    Returns:
+        The number of websites changed.
+    """
+    db = SessionLocal()
+    try:
+        count = (
+            db.query(Website)
+            .filter(Website.enabled.isnot(enabled), *_filters(urls, tags, scraper_types))
+            .update({Website.enabled: enabled}, synchronize_session=False)
+        )
+        db.commit()
+        return count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def add_tags(
+    new_tags: Sequence[str],
+    urls: Sequence[str] = (),
+    tags: Sequence[str] = (),
+    scraper_types: Sequence[str] = (),
+) -> int:
+    """Adds tags to the selected websites, see `set_enabled` for the selectors.
+
+    Returns:
+        The number of selected websites.
+    """
+    db = SessionLocal()
+    try:
+        website_ids = [
+            website_id
+            for (website_id,) in db.query(Website.id).filter(*_filters(urls, tags, scraper_types))
+        ]
+        for start in range(0, len(website_ids), settings.DB_BATCH_SIZE):
+            tag_websites(
+                db, website_ids[start : start + settings.DB_BATCH_SIZE], parse_tags(list(new_tags))
+            )
+        db.commit()
+        return len(website_ids)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def remove_tags(
+    old_tags: Sequence[str],
+    urls: Sequence[str] = (),
+    tags: Sequence[str] = (),
+    scraper_types: Sequence[str] = (),
+) -> int:
+    """Removes tags from the selected websites, see `set_enabled` for the selectors.
+
+    Returns:
+        The number of tags removed.
+    """
+    db = SessionLocal()
+    try:
+        selected = select(Website.id).where(*_filters(urls, tags, scraper_types))
+        count = (
+            db.query(WebsiteTag)
+            .filter(
+                WebsiteTag.tag.in_(parse_tags(list(old_tags))),
+                WebsiteTag.website_id.in_(selected),
+            )
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def list_sites(
+    urls: Sequence[str] = (),
+    tags: Sequence[str] = (),
+    scraper_types: Sequence[str] = (),
+    enabled: Optional[bool] = None,
+) -> Iterator[Tuple[Website, List[str]]]:
+    """Yields the selected websites with their tags, ordered by ID.
+
+    Args:
+        urls, tags, scraper_types: The selectors, see `set_enabled`.
+        enabled: Only enabled (True) or disabled (False) websites if not None.
+    """
+    conditions = _filters(urls, tags, scraper_types)
+    if enabled is not None:
+        conditions.append(Website.enabled.is_(enabled))
+    db = SessionLocal()
+    try:
+        query = db.query(Website).filter(*conditions).order_by(Website.id)
+        last_id = 0
+        while True:
+            # Keyset pages keep memory flat on large catalogues
+            page = query.filter(Website.id > last_id).limit(settings.DB_BATCH_SIZE).all()
+            if not page:
+                break
+            last_id = page[-1].id
+            site_tags: Dict[int, List[str]] = {}
+            for website_id, tag in (
+                db.query(WebsiteTag.website_id, WebsiteTag.tag)
+                .filter(WebsiteTag.website_id.in_([website.id for website in page]))
+                .order_by(WebsiteTag.tag)
+            ):
+                site_tags.setdefault(website_id, []).append(tag)
+            for website in page:
+                yield website, site_tags.get(website.id, [])
+    finally:
+        db.close()
+
+
+# Performance characteristics:
+# - An import costs one upsert, at most one ID lookup and one tag insert per
+#   batch of DB_BATCH_SIZE websites, in one transaction: 10,000 websites are
+#   20 batches instead of 10,000 queries and commits.
+# - Scraper types are detected with one precompiled regex per URL.
+# - Enabling, disabling and untagging are one statement each; tag lookups use
+#   the (tag, website_id) primary key of website_tags and the enabled index.
+# Resource usage details:
+# - Sources are streamed: memory holds one batch of entries, whatever the
+#   size of the file or sitemap.
+# Threading considerations:
+# - Every operation uses its own session; meant to be run from the CLI.
+# Error handling approach:
+# - Invalid entries are reported and skipped; a batch that fails to store is
+#   rolled back, reported and counted, and the import continues. Unreadable
+#   sources and errors of the bulk operations propagate to the caller.
@@ -0,0 +1,458 @@
+# job_monitor/app/core/subscriptions.py
+"""Subscription matching and alert fan-out module.
+
+A `Subscription` maps a Telegram chat to filters: keywords (matched against
+the title of a posting), locations, job types and websites (by ID or by
+website tag). Every changed posting is sent to the chats of the
+subscriptions it matches, each chat getting one alert listing only its
+postings.
+
+Subscriptions are compiled once per run into a `SubscriptionMatcher`, an
+inverted index:
+- every subscription is indexed under the phrases of one filter, keywords
+  first, by their first word; a posting is matched by looking up each word
+  of its title, location and job type instead of testing every
+  subscription, and only the subscriptions it hits check their other
+  filters;
+- subscriptions filtering on websites only (tags resolved to website IDs)
+  are indexed by website ID and get the whole change.
+
+The cost of a change therefore grows with the words of its postings and the
+subscriptions they hit, not with the number of subscriptions. Alerts of all
+chats go through the shared `TelegramNotifier` queue and its rate limits.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import insert, or_
+
+from core.config import Settings
+from core.database import SessionLocal
+from core.jobs import JobDiff, JobRecord
+from core.utils import utcnow
+from data_models import Subscription, WebsiteTag
+
+# JobRecord field matched by each phrase filter
+PHRASE_FIELDS = (("keywords", "title"), ("locations", "location"), ("job_types", "job_type"))
+
+# Subscription columns holding filters
+FILTER_COLUMNS = ("keywords", "locations", "job_types", "tags", "website_ids")
+
+WORD = re.compile(r"\w+")
+
+# A phrase as its words, e.g. ("registered", "nurse")
+Phrase = Tuple[str, ...]
+
+
+def words(text: str) -> Phrase:
+    """Returns the lowercased words of a text."""
+    return tuple(WORD.findall(text.casefold())) if text else ()
+
+
+def split_filter(value: Optional[str]) -> List[str]:
+    """Returns the entries of a comma separated filter."""
+    return [entry.strip() for entry in (value or "").split(",") if entry.strip()]
+
+
+@dataclass(frozen=True)
+class SubscriptionFilter:
+    """The compiled filters of one subscription."""
+
+    id: int
+    chat_id: str
+    keywords: Tuple[Phrase, ...] = ()
+    locations: Tuple[Phrase, ...] = ()
+    job_types: Tuple[Phrase, ...] = ()
+    # None matches every website; tags are resolved to website IDs
+    website_ids: Optional[FrozenSet[int]] = None
+
+    @classmethod
+    def from_row(
+        cls, row: Subscription, tag_sites: Dict[str, Set[int]]
+    ) -> SubscriptionFilter:
+        """Compiles a stored subscription.
+
+        Args:
+            row: The stored subscription.
+            tag_sites: The websites of every tag used by a subscription.
+        """
+        website_ids = None
+        tags = [tag.lower() for tag in split_filter(row.tags)]
+        ids = split_filter(row.website_ids)
+        if tags or ids:
+            website_ids = frozenset(
+                {int(website_id) for website_id in ids}.union(
+                    *(tag_sites.get(tag, ()) for tag in tags)
+                )
+            )
+
+        def phrases(value: Optional[str]) -> Tuple[Phrase, ...]:
+            return tuple(phrase for phrase in map(words, split_filter(value)) if phrase)
+
+        return cls(
+            id=row.id,
+            chat_id=str(row.chat_id),
+            keywords=phrases(row.keywords),
+            locations=phrases(row.locations),
+            job_types=phrases(row.job_types),
+            website_ids=website_ids,
+        )
+
+
+def _contains(text_words: Phrase, phrases: Iterable[Phrase]) -> bool:
+    """Whether any of the phrases occurs in the words of a text."""
+    for phrase in phrases:
+        size = len(phrase)
+        for position, word in enumerate(text_words):
+            if word == phrase[0] and text_words[position : position + size] == phrase:
+                return True
+    return False
+
+
+class SubscriptionMatcher:
+    """Routes the changes of a website to the chats of matching subscriptions."""
+
+    def __init__(self, subscriptions: Iterable[SubscriptionFilter] = ()) -> None:
+        """Builds the indexes.
+
+        Every subscription is indexed under one filter only, its anchor: the
+        first non-empty filter of PHRASE_FIELDS, which is usually the most
+        selective, or its websites. Its other filters are only checked for
+        the postings that hit the anchor.
+
+        Args:
+            subscriptions: The compiled subscriptions.
+        """
+        self._subscriptions: Dict[int, SubscriptionFilter] = {}
+        # Chats of subscriptions without filters: they get every change as is
+        self._everything: Set[str] = set()
+        # Field -> first word -> phrase -> subscriptions anchored on it
+        phrases: Dict[str, Dict[str, Dict[Phrase, List[int]]]] = {
+            name: defaultdict(lambda: defaultdict(list)) for name, _ in PHRASE_FIELDS
+        }
+        # Website -> chats of subscriptions filtering on websites only
+        sites: Dict[int, Set[str]] = defaultdict(set)
+
+        for subscription in subscriptions:
+            anchor = next((name for name, _ in PHRASE_FIELDS if getattr(subscription, name)), None)
+            if anchor is not None:
+                self._subscriptions[subscription.id] = subscription
+                for phrase in set(getattr(subscription, anchor)):
+                    phrases[anchor][phrase[0]][phrase].append(subscription.id)
+            elif subscription.website_ids is not None:
+                for website_id in subscription.website_ids:
+                    sites[website_id].add(subscription.chat_id)
+            else:
+                self._everything.add(subscription.chat_id)
+        # Plain dicts: lookups of unknown words must not grow the indexes
+        self._phrases = {
+            name: {word: dict(entries) for word, entries in index.items()}
+            for name, index in phrases.items()
+        }
+        self._sites = dict(sites)
+
+    def __len__(self) -> int:
+        """The number of subscriptions matched per posting."""
+        return len(self._subscriptions)
+
+    def _anchor_hits(self, record_words: Dict[str, Phrase]) -> Set[int]:
+        """Returns the subscriptions whose anchor phrase occurs in a posting."""
+        hits: Set[int] = set()
+        for name, field_name in PHRASE_FIELDS:
+            index = self._phrases[name]
+            if not index:
+                continue
+            text_words = record_words[field_name]
+            for position, word in enumerate(text_words):
+                for phrase, subscription_ids in index.get(word, {}).items():
+                    if text_words[position : position + len(phrase)] == phrase:
+                        hits.update(subscription_ids)
+        return hits
+
+    def match(self, record: JobRecord, website_id: int) -> List[int]:
+        """Returns the subscriptions with phrase filters that a posting matches.
+
+        Args:
+            record: The posting.
+            website_id: The website of the posting.
+        """
+        record_words = {
+            field_name: words(getattr(record, field_name)) for _, field_name in PHRASE_FIELDS
+        }
+        matched = []
+        for subscription_id in self._anchor_hits(record_words):
+            subscription = self._subscriptions[subscription_id]
+            if subscription.website_ids is not None and website_id not in subscription.website_ids:
+                continue
+            # The anchor matched already; the other phrase filters must match too
+            if all(
+                not getattr(subscription, name)
+                or _contains(record_words[field_name], getattr(subscription, name))
+                for name, field_name in PHRASE_FIELDS
+            ):
+                matched.append(subscription_id)
+        return matched
+
+    def recipients(self, website_id: int, diff: JobDiff) -> Dict[str, JobDiff]:
+        """Returns the postings of a change each chat should be alerted about.
+
+        Args:
+            website_id: The website that changed.
+            diff: Its changed postings.
+
+        Returns:
+            The changed postings matching the subscriptions of every chat,
+            by chat ID; chats without a matching posting are left out.
+        """
+        # Chats that get the whole change
+        routed: Dict[str, JobDiff] = {chat_id: diff for chat_id in self._everything}
+        for chat_id in self._sites.get(website_id, ()):
+            routed[chat_id] = diff
+        if not self._subscriptions:
+            return routed
+        whole = set(routed)
+        seen: Set[Tuple[str, str, str]] = set()
+        for kind in ("added", "removed", "modified"):
+            for record in getattr(diff, kind):
+                for subscription_id in self.match(record, website_id):
+                    chat_id = self._subscriptions[subscription_id].chat_id
+                    if chat_id in whole or (chat_id, kind, record.job_id) in seen:
+                        continue
+                    seen.add((chat_id, kind, record.job_id))
+                    getattr(routed.setdefault(chat_id, JobDiff()), kind).append(record)
+        return routed
+
+
+def load_matcher(settings: Settings) -> SubscriptionMatcher:
+    """Compiles the enabled subscriptions.
+
+    Args:
+        settings: The application settings. With ALERT_DEFAULT_CHAT,
+            TELEGRAM_CHAT_ID gets every change like a subscription without filters.
+
+    Returns:
+        The matcher of the run.
+    """
+    subscriptions: List[SubscriptionFilter] = []
+    if settings.ALERT_DEFAULT_CHAT:
+        subscriptions.append(SubscriptionFilter(id=0, chat_id=str(settings.TELEGRAM_CHAT_ID)))
+    db = SessionLocal()
+    try:
+        rows = db.query(Subscription).filter(Subscription.enabled.is_(True)).all()
+        tags = {tag.lower() for row in rows for tag in split_filter(row.tags)}
+        tag_sites: Dict[str, Set[int]] = defaultdict(set)
+        if tags:
+            for tag, website_id in db.query(WebsiteTag.tag, WebsiteTag.website_id).filter(
+                WebsiteTag.tag.in_(tags)
+            ):
+                tag_sites[tag].add(website_id)
+        for row in rows:
+            try:
+                subscriptions.append(SubscriptionFilter.from_row(row, tag_sites))
+            except ValueError as e:
+                print(f"Skipping subscription {row.id}: {e}")
+    except Exception as e:
+        print(f"Error loading subscriptions: {e}")
+    finally:
+        db.close()
+    return SubscriptionMatcher(subscriptions)
+
+
+def _filter_value(value: object) -> Optional[str]:
+    """Stores a filter given as a list or a comma separated string."""
+    if value is None or isinstance(value, str):
+        entries = split_filter(value)
+    else:
+        entries = [str(entry).strip() for entry in value if str(entry).strip()]
+    return ",".join(entries) or None
+
+
+def subscription_row(entry: Dict[str, object]) -> Dict[str, object]:
+    """Turns an imported or command line entry into Subscription column values.
+
+    Raises:
+        ValueError: If the entry has no chat ID or an invalid website ID.
+    """
+    chat_id = str(entry.get("chat_id") or "").strip()
+    if not chat_id:
+        raise ValueError("Missing chat_id")
+    row = {name: _filter_value(entry.get(name)) for name in FILTER_COLUMNS}
+    for website_id in split_filter(row["website_ids"]):
+        int(website_id)
+    row.update(chat_id=chat_id, enabled=True, created_at=utcnow())
+    return row
+
+
+@dataclass
+class SubscriptionReport:
+    """The outcome of adding subscriptions."""
+
+    read: int = 0  # Entries read from the source
+    stored: int = 0  # Subscriptions inserted
+    skipped: int = 0  # Entries without a chat ID or with invalid filters
+    failed: int = 0  # Entries of batches that could not be stored
+    batches: int = 0
+    seconds: float = 0.0
+
+    def message(self) -> str:
+        """Returns a one-line summary of the import."""
+        return (
+            f"Read {self.read} subscriptions in {self.seconds:.2f}s: {self.stored} stored"
+            f" in {self.batches} batches, {self.skipped} skipped, {self.failed} failed"
+        )
+
+
+def add_subscriptions(
+    entries: Iterable[Dict[str, object]], batch_size: int
+) -> SubscriptionReport:
+    """Stores subscriptions in batches, one insert and commit per batch.
+
+    Args:
+        entries: The subscriptions, with a chat_id and the keys of FILTER_COLUMNS.
+        batch_size: Subscriptions per insert.
+
+    Returns:
+        The counts of the import.
+    """
+    started = time.perf_counter()
+    report = SubscriptionReport()
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            break
+        report.read += len(batch)
+        rows = []
+        for number, entry in enumerate(batch, report.read - len(batch) + 1):
+            try:
+                rows.append(subscription_row(entry))
+            except (AttributeError, TypeError, ValueError) as e:
+                report.skipped += 1
+                print(f"Skipping subscription {number}: {e}")
+        if not rows:
+            continue
+        db = SessionLocal()
+        try:
+            db.execute(insert(Subscription), rows)
+            db.commit()
+            report.batches += 1
+            report.stored += len(rows)
+        except Exception as e:
+            db.rollback()
+            report.failed += len(rows)
+            print(f"Error storing subscriptions: {e}")
+        finally:
+            db.close()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def remove_subscriptions(
+    subscription_ids: Sequence[int] = (), chat_ids: Sequence[str] = ()
+) -> int:
+    """Deletes subscriptions by ID and by chat, in one statement.
+
+    Returns:
+        The number of subscriptions deleted.
+    """
+    if not subscription_ids and not chat_ids:
+        return 0
+    db = SessionLocal()
+    try:
+        count = (
+            db.query(Subscription)
+            .filter(
+                or_(
+                    Subscription.id.in_(subscription_ids),
+                    Subscription.chat_id.in_([str(chat_id) for chat_id in chat_ids]),
+                )
+            )
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _all_delivered(futures: List[Future]) -> Future:
+    """Returns a future resolved with True once every future delivered."""
+    combined: Future = Future()
+    if not futures:
+        combined.set_result(True)
+        return combined
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def resolved(_: Future) -> None:
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        combined.set_result(
+            all(future.exception() is None and future.result() for future in futures)
+        )
+
+    for future in futures:
+        future.add_done_callback(resolved)
+    return combined
+
+
+def send_alerts(
+    notifier,
+    recipients: Dict[str, JobDiff],
+    build_message: Callable[[JobDiff], str],
+    files: Optional[List[str]] = None,
+) -> Future:
+    """Queues the alert of a change for every recipient chat.
+
+    Args:
+        notifier: The TelegramNotifier shared by all chats.
+        recipients: The postings of every chat, see `SubscriptionMatcher.recipients`.
+        build_message: Builds the alert text from the postings of a chat.
+        files: The screenshots attached to every alert.
+
+    Returns:
+        A future resolved with True once every chat got its alert.
+    """
+    # Chats with the same postings share the message text
+    messages: Dict[int, str] = {}
+    futures = []
+    for chat_id, diff in recipients.items():
+        message = messages.get(id(diff))
+        if message is None:
+            message = messages[id(diff)] = build_message(diff)
+        futures.append(notifier.send_alert(message, files=files, chat_id=chat_id))
+    return _all_delivered(futures)
+
+
+# Performance characteristics:
+# - Matching a posting costs one dictionary lookup per word of its title,
+#   location and job type, plus the subscriptions it hits; subscriptions
+#   without filters cost nothing per posting.
+# - Subscriptions are imported one insert and commit per batch.
+# Resource usage details:
+# - The indexes hold every phrase and website ID of the enabled
+#   subscriptions once; they are rebuilt at the start of every run.
+# Threading considerations:
+# - A matcher is read-only once built and can be shared between threads.
+# Error handling approach:
+# - Invalid subscriptions are reported and skipped, when imported and when
+#   loaded; if subscriptions cannot be loaded, alerts still go to the
+#   default chat.
@@ -8,8 +8,11 @@ from __future__ import annotations
 # -*- coding: utf-8 -*-
 
 import hashlib
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
 
-from playwright.sync_api import sync_playwright
+from core.browser_pool import ScreenshotJob, get_browser_pool
+from core.metrics import span
 
 
 def generate_md5_hash(content: str) -> str:
@@ -28,48 +31,84 @@ def generate_md5_hash(content: str) -> str:
     return hashlib.md5(content.encode("utf-8")).hexdigest()
 
 
-def take_screenshot(url: str, screenshot_path: str, selector: str = None) -> None:
-    """Takes a screenshot of a given URL using playwright.
+def fast_hash(content: str) -> str:
+    """Generates a 160-bit BLAKE2b hash of a string.
+
+    Used for change detection, where MD5 is slower and its output is not
+    needed; stdlib only, so every worker computes the same hashes.
+
+    Args:
+        content: The string content.
+
+    Returns:
+        The hash as 40 hex characters.
+    """
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def fast_hash_lines(lines: Iterable[str]) -> str:
+    """Returns `fast_hash` of the lines joined by newlines, without joining them.
+
+    Args:
+        lines: The lines to hash.
+
+    Returns:
+        The hash as 40 hex characters.
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    separator = b""
+    for line in lines:
+        hasher.update(separator)
+        hasher.update(line.encode("utf-8"))
+        separator = b"\n"
+    return hasher.hexdigest()
+
+
+def utcnow() -> datetime:
+    """Returns the current UTC time as a naive datetime, as stored in the database."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def take_screenshot(
+    url: str, screenshot_path: str, selector: str = None, html: Optional[bytes] = None
+) -> None:
+    """Takes a screenshot of a given URL using the shared browser pool.
 
     Args:
         url: The URL to take a screenshot of.
         screenshot_path: The path to save the screenshot.
         selector: Optional CSS selector to capture specific element. If None, captures full page.
+        html: The already downloaded page, rendered at the URL instead of
+            downloading it again. Its assets are still loaded from the network.
 
     Raises:
-        PlaywrightError: If there's an error during browser automation
-        IOError: If there's an error saving the screenshot
+        RuntimeError: If there's an error during browser automation or saving the screenshot
     """
     # Error handling approach:
     # - Uses try-except block to handle potential playwright errors.
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)  # Explicitly set headless mode
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080}
-            )  # Set viewport
-            page = context.new_page()
-            page.set_default_timeout(30000)  # 30 second timeout
-            page.goto(url, wait_until="networkidle")  # Wait for network to be idle
-
-            if selector:
-                element = page.locator(selector)
-                element.screenshot(path=screenshot_path)  # Capture specific element
-            else:
-                page.screenshot(
-                    path=screenshot_path, full_page=True
-                )  # Capture full page
-
-            context.close()
-            browser.close()
-
+        with span("screenshot"):
+            get_browser_pool().screenshot(url, screenshot_path, selector, html)
     except Exception as e:
         raise RuntimeError(f"Failed to take screenshot: {e}") from e
 
 
+def take_screenshots(jobs: List[ScreenshotJob]) -> List[Optional[Exception]]:
+    """Takes several screenshots concurrently using the shared browser pool.
+
+    Args:
+        jobs: The screenshots to take.
+
+    Returns:
+        One entry per job: None on success, or the error that occurred.
+    """
+    return get_browser_pool().screenshot_many(jobs)
+
+
 # Performance characteristics:
-# - MD5 generation is fast. Screenshot capture depends on Playwright's performance.
+# - MD5 generation is fast. Screenshots reuse the warm
+#   browser of the shared pool.
 # Resource usage details:
 # - Screenshot capture can be memory-intensive for large pages.
 # Threading considerations:
-# - MD5 generation is thread-safe. Playwright instance should not be shared between threads.
+# - MD5 generation is thread-safe. Screenshots can be requested from any thread.
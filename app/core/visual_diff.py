@@ -0,0 +1,171 @@
+# job_monitor/app/core/visual_diff.py
+"""Screenshot comparison module.
+
+Compares a new screenshot of a website with the previous one, tile by tile:
+both images are converted to greyscale and split into square tiles, and a
+tile has changed when the mean absolute difference of its pixels exceeds a
+threshold. Small threshold values still ignore the noise of lossy encoding
+and anti-aliasing; moved or new content changes whole tiles.
+
+The changed tiles are summarized as one bounding box, which `crop_changes`
+cuts out of the new screenshot (with some context, the box outlined in red)
+so only the changed region is sent.
+
+Requires the optional NumPy and Pillow packages.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Tile rows compared at once, bounding the memory used by tall pages
+BAND_TILES = 64
+
+# Colour and width of the outline drawn around the changed region
+HIGHLIGHT_COLOUR = (220, 20, 60)
+HIGHLIGHT_WIDTH = 4
+
+
+@dataclass
+class VisualDiff:
+    """The result of comparing two screenshots."""
+
+    changed_ratio: float  # Fraction of the tiles that changed
+    # (left, top, right, bottom) of the changed tiles in the new screenshot
+    box: Optional[Tuple[int, int, int, int]] = None
+
+    @property
+    def changed(self) -> bool:
+        """Whether any tile changed visibly."""
+        return self.box is not None
+
+
+def _load_grey(path: str):
+    """Loads an image as a 2D uint8 array."""
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return np.asarray(image.convert("L"))
+
+
+def compare_screenshots(
+    previous_path: str, current_path: str, tile_size: int = 32, threshold: float = 8.0
+) -> VisualDiff:
+    """Compares two screenshots tile by tile.
+
+    Args:
+        previous_path: The previous screenshot.
+        current_path: The new screenshot.
+        tile_size: Edge length of the square tiles, in pixels.
+        threshold: Mean absolute greyscale difference (0-255) above which a
+            tile has changed.
+
+    Returns:
+        The changed fraction and region. Areas only one of the screenshots
+        covers (the page grew or shrank) count as changed.
+
+    Raises:
+        ImportError: If NumPy or Pillow is not installed.
+    """
+    import numpy as np
+
+    previous = _load_grey(previous_path)
+    current = _load_grey(current_path)
+    height, width = current.shape
+    if previous.shape[1] != width:
+        # Captured at another width: nothing can be compared
+        return VisualDiff(1.0, (0, 0, width, height))
+
+    overlap = min(previous.shape[0], height)
+    rows = -(-max(previous.shape[0], height) // tile_size)
+    columns = -(-width // tile_size)
+    padded_width = columns * tile_size
+    changed = np.ones((rows, columns), dtype=bool)
+
+    band_height = BAND_TILES * tile_size
+    for top in range(0, overlap, band_height):
+        bottom = min(top + band_height, overlap)
+        difference = np.abs(
+            previous[top:bottom].astype(np.int16) - current[top:bottom].astype(np.int16)
+        )
+        # Pad the band to whole tiles; padding counts as unchanged
+        band_rows = -(-(bottom - top) // tile_size)
+        padded = np.zeros((band_rows * tile_size, padded_width), dtype=np.int16)
+        padded[: bottom - top, :width] = difference
+        tile_means = padded.reshape(band_rows, tile_size, columns, tile_size).mean(
+            axis=(1, 3)
+        )
+        first_row = top // tile_size
+        changed[first_row : first_row + band_rows] = tile_means > threshold
+    if overlap % tile_size:
+        # The last overlapping tile row also covers the area beyond the overlap
+        if previous.shape[0] != height:
+            changed[overlap // tile_size] = True
+
+    tile_rows, tile_columns = np.nonzero(changed)
+    if not len(tile_rows):
+        return VisualDiff(0.0)
+    top = min(int(tile_rows.min()) * tile_size, height - 1)
+    box = (
+        int(tile_columns.min()) * tile_size,
+        top,
+        min((int(tile_columns.max()) + 1) * tile_size, width),
+        max(min((int(tile_rows.max()) + 1) * tile_size, height), top + 1),
+    )
+    return VisualDiff(float(changed.mean()), box)
+
+
+def crop_changes(
+    current_path: str,
+    box: Tuple[int, int, int, int],
+    output_path: str,
+    margin: int = 64,
+) -> None:
+    """Writes the changed region of a screenshot, outlined, to a PNG.
+
+    Args:
+        current_path: The new screenshot.
+        box: The changed region, see `VisualDiff.box`.
+        output_path: Where the cropped PNG is written.
+        margin: Pixels of context kept around the changed region.
+
+    Raises:
+        ImportError: If Pillow is not installed.
+    """
+    from PIL import Image, ImageDraw
+
+    with Image.open(current_path) as image:
+        image = image.convert("RGB")
+        left, top, right, bottom = box
+        crop = (
+            max(left - margin, 0),
+            max(top - margin, 0),
+            min(right + margin, image.width),
+            min(bottom + margin, image.height),
+        )
+        cropped = image.crop(crop)
+        ImageDraw.Draw(cropped).rectangle(
+            (left - crop[0], top - crop[1], right - crop[0] - 1, bottom - crop[1] - 1),
+            outline=HIGHLIGHT_COLOUR,
+            width=HIGHLIGHT_WIDTH,
+        )
+        cropped.save(output_path, "PNG")
+
+
+# Performance characteristics:
+# - The comparison is a few vectorized NumPy operations per band of
+#   BAND_TILES tile rows; a full-page screenshot compares in milliseconds.
+# Resource usage details:
+# - Both greyscale images are held in memory (1 byte per pixel), plus the
+#   int16 difference of one band.
+# Threading considerations:
+# - Pure functions, safe to call from any thread.
+# Error handling approach:
+# - Missing optional packages raise ImportError; image errors propagate to
+#   the caller, which then sends the full screenshot.
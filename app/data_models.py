@@ -6,7 +6,7 @@ from __future__ import annotations
 # Set encode as utf-8
 # -*- coding: utf-8 -*-
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, true
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -20,6 +20,145 @@ class Website(Base):
     url = Column(String, unique=True, index=True)
     last_content_hash = Column(String)
     scraper_type = Column(String)  # e.g., "rezoomo", "occupop"
+    # Disabled websites stay in the catalogue but are not checked, see sites.py
+    enabled = Column(Boolean, default=True, server_default=true(), index=True)
+    etag = Column(String)  # HTTP validators of the last processed version
+    last_modified = Column(String)
+    # Scheduling, see scheduler.py
+    poll_interval = Column(Integer)  # Seconds between checks, None for the default
+    next_check_at = Column(DateTime, index=True)  # UTC, None means due now
+    last_checked_at = Column(DateTime)
+    last_changed_at = Column(DateTime)
+    # Screenshot compared with the next one, see core/visual_diff.py
+    last_screenshot_hash = Column(String)
+    screenshot_mode = Column(String)  # "browser", "card" or "none"; None for the default
+    # Sharding, see core/sharding.py
+    lease_owner = Column(String)  # ID of the worker processing the website
+    lease_expires_at = Column(DateTime, index=True)  # UTC
+
+
+class WebsiteTag(Base):
+    """Represents a tag of a website, e.g. its region or customer, see sites.py."""
+
+    __tablename__ = "website_tags"
+
+    # Led by the tag, so the primary key index serves lookups by tag
+    tag = Column(String, primary_key=True)
+    website_id = Column(Integer, ForeignKey("websites.id"), primary_key=True, index=True)
+
+
+class Subscription(Base):
+    """Represents the alerts a Telegram chat wants, see core/subscriptions.py.
+
+    Filters are comma separated; an empty filter matches everything, and a
+    posting is sent when it matches every non-empty filter.
+    """
+
+    __tablename__ = "subscriptions"
+
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(String, nullable=False, index=True)
+    keywords = Column(String)  # Phrases matched against the title
+    locations = Column(String)  # Phrases matched against the location
+    job_types = Column(String)  # Phrases matched against the job type
+    tags = Column(String)  # Websites with any of these tags, see WebsiteTag
+    website_ids = Column(String)  # Or any of these websites
+    enabled = Column(Boolean, default=True, server_default=true(), index=True)
+    created_at = Column(DateTime)
+
+
+class Job(Base):
+    """Represents a job posting as of the last processed version of a website."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_website_id_job_id", "website_id", "job_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    website_id = Column(Integer, ForeignKey("websites.id"), nullable=False)
+    job_id = Column(String, nullable=False)  # Stable ID assigned by the scraper
+    title = Column(String)
+    location = Column(String)
+    job_type = Column(String)
+    date = Column(String)
+    url = Column(String)
+    fingerprint = Column(String)  # Hash of all fields, detects modifications
+
+
+class Screenshot(Base):
+    """Represents a stored screenshot, addressed by the hash of the captured image."""
+
+    __tablename__ = "screenshots"
+
+    hash = Column(String, primary_key=True)  # SHA-256 of the captured PNG
+    website_id = Column(Integer, ForeignKey("websites.id"), index=True)
+    path = Column(String, nullable=False)  # Encoded file, see core/screenshot_store.py
+    size = Column(Integer)  # Bytes on disk
+    width = Column(Integer)
+    height = Column(Integer)
+    created_at = Column(DateTime)
+    last_used_at = Column(DateTime, index=True)  # UTC, drives the LRU eviction
+    telegram_file_id = Column(String)  # Reused instead of uploading the file again
+
+
+class HostHealth(Base):
+    """Represents the circuit breaker state of a host, see core/host_health.py."""
+
+    __tablename__ = "host_health"
+
+    host = Column(String, primary_key=True)
+    state = Column(String)  # "closed", "open" or "half_open"
+    failures = Column(Integer)  # Consecutive failed fetches
+    opens = Column(Integer)  # Consecutive openings of the circuit
+    retry_at = Column(DateTime)  # UTC, end of the open period
+    latencies = Column(String)  # JSON list of recent fetch durations, in seconds
+    updated_at = Column(DateTime)
+
+
+class Run(Base):
+    """Represents a monitoring run, see core/run_ledger.py."""
+
+    __tablename__ = "runs"
+
+    id = Column(Integer, primary_key=True)
+    scope = Column(String, index=True)  # The websites of the run, see RunLedger
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)  # None while running, or if interrupted
+
+
+class RunSite(Base):
+    """Represents a website a run has finished with."""
+
+    __tablename__ = "run_sites"
+
+    run_id = Column(Integer, ForeignKey("runs.id"), primary_key=True)
+    website_id = Column(Integer, primary_key=True)
+    outcome = Column(String)  # "changed", "unchanged" or "failed"
+    finished_at = Column(DateTime)
+
+
+class Notification(Base):
+    """Represents a notification queued by a run, by idempotency key."""
+
+    __tablename__ = "notifications"
+
+    key = Column(String, primary_key=True)
+    run_id = Column(Integer, ForeignKey("runs.id"), index=True)
+    website_id = Column(Integer)
+    status = Column(String)  # "pending" until Telegram confirmed it, then "sent"
+    created_at = Column(DateTime)
+    sent_at = Column(DateTime)
+
+
+class Worker(Base):
+    """Represents a live worker process of a sharded deployment."""
+
+    __tablename__ = "workers"
+
+    id = Column(String, primary_key=True)  # WORKER_ID
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime, index=True)  # UTC
 
 # Performance characteristics:
 # - Simple data model, fast to query and update.
@@ -8,118 +8,621 @@ from __future__ import annotations
 # -*- coding: utf-8 -*-
 
 import os
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import requests
 
 from core.config import Settings
-from core.database import SessionLocal
-from core.utils import generate_md5_hash
+from core.database import SessionLocal, UpdateBatch, WebsiteUpdate
+from core.host_health import get_host_health
+from core.cards import render_card
+from core.http import FetchResult, get_http_client
+from core.jobs import (
+    JobDiff,
+    JobRecord,
+    compute_job_diff,
+    content_hash,
+)
+from core.metrics import export_metrics, profile_cycle, site_context, span
+from core.run_ledger import RunLedger, send_once
+from core.screenshot_store import get_screenshot_store
+from core.subscriptions import SubscriptionMatcher, load_matcher, send_alerts
+from core.visual_diff import compare_screenshots, crop_changes
 from data_models import Website
-from notifiers.telegram_notifier import TelegramNotifier
-from scrapers.base_scraper import BaseScraper
-from scrapers.occupop_scraper import OccupopScraper
-from scrapers.rezoomo_scraper import RezoomoScraper
+from notifiers.telegram_notifier import TelegramNotifier, get_notifier
+from scrapers.base_scraper import ScrapeResult
+from scrapers.registry import get_scraper
+
+SCREENSHOTS_DIR = "screenshots"
+
+# Outcomes of monitoring a single website
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
+
+@dataclass
+class RunSummary:
+    """Counts the outcome of every website in a monitoring run."""
+
+    changed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    # Outcome of every website, by website ID
+    outcomes: Dict[int, str] = field(default_factory=dict)
+    # Whether an error ended the run before every website was checked
+    interrupted: bool = False
+
+    def record(self, status: str, website_id: Optional[int] = None) -> None:
+        """Counts one website outcome.
+
+        Args:
+            status: One of CHANGED, UNCHANGED or FAILED.
+            website_id: The ID of the website, if known.
+        """
+        setattr(self, status, getattr(self, status) + 1)
+        if website_id is not None:
+            self.outcomes[website_id] = status
+
+    @classmethod
+    def resumed(cls, ledger: Optional[RunLedger]) -> "RunSummary":
+        """Returns a summary holding the outcomes a resumed run already recorded."""
+        summary = cls()
+        for website_id, status in (ledger.done if ledger else {}).items():
+            summary.record(status, website_id)
+        return summary
+
+    def merge(self, other: "RunSummary") -> None:
+        """Adds the outcomes of another run, e.g. of another shard."""
+        self.changed += other.changed
+        self.unchanged += other.unchanged
+        self.failed += other.failed
+        self.outcomes.update(other.outcomes)
+        self.interrupted = self.interrupted or other.interrupted
+
+    def message(self) -> str:
+        """Returns the end-of-run summary message."""
+        return (
+            "Monitoring completed.\n"
+            f"Changed: {self.changed}\n"
+            f"Unchanged: {self.unchanged}\n"
+            f"Failed: {self.failed}"
+        )
+
+
+@dataclass
+class SiteCheck:
+    """The state of a website while it is checked."""
+
+    website_id: int
+    url: str
+    scraper_type: str
+    last_content_hash: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    last_screenshot_hash: Optional[str] = None
+    screenshot_mode: Optional[str] = None  # Overrides SCREENSHOT_MODE if set
+    fetched: Optional[FetchResult] = None
+    new_content_hash: Optional[str] = None
+    diff: Optional[JobDiff] = None
+    recipients: Dict[str, JobDiff] = field(default_factory=dict)  # Postings per chat
+    files: List[str] = field(default_factory=list)
+    screenshot_hash: Optional[str] = None  # New visual diff baseline, if any
+
+    @classmethod
+    def of(cls, website: Website) -> "SiteCheck":
+        """Returns the check of a website, detached from its session."""
+        return cls(
+            website_id=website.id,
+            url=website.url,
+            scraper_type=website.scraper_type,
+            last_content_hash=website.last_content_hash,
+            etag=website.etag,
+            last_modified=website.last_modified,
+            last_screenshot_hash=website.last_screenshot_hash,
+            screenshot_mode=website.screenshot_mode,
+        )
+
+    @property
+    def changed(self) -> bool:
+        """Whether the scraped content differs from the stored hash."""
+        return self.last_content_hash != self.new_content_hash
+
+    @property
+    def alert_key(self) -> str:
+        """The idempotency key of the change alert, see core/run_ledger.py."""
+        return f"alert:{self.website_id}:{self.new_content_hash}"
+
+    @property
+    def unchanged_key(self) -> str:
+        """The idempotency key of the no-change notification."""
+        return f"unchanged:{self.website_id}"
+
+    def update(self) -> WebsiteUpdate:
+        """Returns the new state of the website, to be stored."""
+        return WebsiteUpdate(
+            self.website_id,
+            self.new_content_hash,
+            self.fetched.etag,
+            self.fetched.last_modified,
+            self.diff,
+            self.screenshot_hash,
+        )
+
+
+def get_screenshot_path(url: str) -> str:
+    """Returns the screenshot file path for a website URL.
+
+    Args:
+        url: The website URL.
+
+    Returns:
+        The path inside the screenshots directory, which is created if needed.
+    """
+    # Ensure the screenshots directory exists
+    os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
+    screenshot_filename = f"{url.split('//')[1].replace('/', '_')}.png"
+    return os.path.join(SCREENSHOTS_DIR, screenshot_filename)
 
 
-def get_scraper(scraper_type: str) -> BaseScraper:
-    """Returns the appropriate scraper based on the website type.
+def capture_screenshot(
+    scraper,
+    url: str,
+    screenshot_mode: str,
+    website_id: Optional[int] = None,
+    diff: Optional[JobDiff] = None,
+    fallback: str = "card",
+    page: Optional[ScrapeResult] = None,
+) -> Tuple[List[str], bool]:
+    """Captures the attachments of a website notification.
 
     Args:
-        scraper_type: The type of scraper.
+        scraper: The scraper of the website.
+        url: The website URL.
+        screenshot_mode: "browser" for a Chromium screenshot, "card" for a
+            summary card of the diff (see core/cards.py), "none" for none.
+        website_id: The ID of the website, recorded in the screenshot store.
+        diff: The changed postings, drawn on cards.
+        fallback: "card" to send a card when the browser screenshot fails,
+            "none" to send the message without attachment.
+        page: The scraped page, reused by the browser screenshot.
 
     Returns:
-        The scraper instance.
+        The paths of the files to attach, inside the screenshot store; and
+        whether they are a fallback card instead of the browser screenshot.
 
     Raises:
-        ValueError: If an invalid scraper type is provided.
+        ValueError: If an invalid screenshot mode is provided.
+    """
+    if screenshot_mode == "none":
+        return [], False
+    if screenshot_mode not in ("browser", "card"):
+        raise ValueError(f"Invalid screenshot mode: {screenshot_mode}")
+    screenshot_path = get_screenshot_path(url)
+    if os.path.exists(screenshot_path):
+        os.remove(screenshot_path)  # Left over by an interrupted run
+
+    if screenshot_mode == "browser":
+        # Take a screenshot
+        try:
+            scraper.take_screenshot(url, screenshot_path, page)
+        except Exception as e:
+            print(f"Error taking screenshot of {url}: {e}")
+        if not os.path.exists(screenshot_path):
+            # Scrapers report their own errors and may leave no file
+            if fallback != "card":
+                return [], False
+            print(f"Sending a summary card for {url} instead")
+
+    fallback_card = screenshot_mode == "browser" and not os.path.exists(screenshot_path)
+    if screenshot_mode == "card" or fallback_card:
+        if not render_card(url, diff, screenshot_path):
+            return [], False
+    stored = get_screenshot_store(SCREENSHOTS_DIR).add(screenshot_path, website_id)
+    return [stored.path], fallback_card
+
+
+def visual_change(
+    url: str,
+    website_id: int,
+    previous_hash: Optional[str],
+    files: List[str],
+    settings: Optional[Settings] = None,
+) -> Tuple[Optional[List[str]], Optional[str]]:
+    """Compares the new screenshot of a website with the previous one.
+
+    Args:
+        url: The website URL.
+        website_id: The ID of the website.
+        previous_hash: The hash of the previous screenshot, if any.
+        files: The attachments returned by `capture_screenshot`.
+        settings: The application settings. Loaded from the environment if None.
+
+    Returns:
+        The files to attach, cropped to the changed region, or None if
+        nothing changed visibly; and the hash of the new screenshot.
     """
-    # Error handling approach:
-    # - Raises ValueError for unknown scraper types.
-    if scraper_type == "rezoomo":
-        return RezoomoScraper()
-    elif scraper_type == "occupop":
-        return OccupopScraper()
+    settings = settings or Settings()
+    store = get_screenshot_store(SCREENSHOTS_DIR)
+    current_path = files[0]
+    current_hash = store.hash_of(current_path)
+    if current_hash == previous_hash:
+        return None, current_hash
+    previous = store.get(previous_hash) if previous_hash else None
+    if previous is None:
+        # First screenshot, or the previous one was evicted
+        return files, current_hash
+
+    try:
+        result = compare_screenshots(
+            previous.path,
+            current_path,
+            settings.VISUAL_DIFF_TILE,
+            settings.VISUAL_DIFF_THRESHOLD,
+        )
+        if not result.changed:
+            return None, current_hash
+        crop_path = f"{os.path.splitext(get_screenshot_path(url))[0]}-changes.png"
+        crop_changes(current_path, result.box, crop_path, settings.VISUAL_DIFF_MARGIN)
+        return [store.add(crop_path, website_id).path], current_hash
+    except Exception as e:
+        print(f"Error comparing screenshots of {url}: {e}")
+        return files, current_hash
+
+
+def load_job_diff(website_id: int, records: List[JobRecord]) -> JobDiff:
+    """Compares scraped job records with the stored postings of a website.
+
+    Args:
+        website_id: The ID of the website.
+        records: The scraped job records.
+
+    Returns:
+        The added, removed and modified postings.
+    """
+    db = SessionLocal()
+    try:
+        return compute_job_diff(db, website_id, records)
+    finally:
+        db.close()
+
+
+def build_change_message(url: str, diff: JobDiff) -> str:
+    """Builds the alert message of a changed website.
+
+    Args:
+        url: The website URL.
+        diff: The changed postings.
+
+    Returns:
+        The message, listing the changed postings if any.
+    """
+    message = f"Change detected for {url}"
+    if diff.has_changes:
+        message += f"\n\n{diff.describe()}"
+    return message
+
+
+def check_content(
+    check: SiteCheck,
+    records: Optional[List[JobRecord]],
+    updates: UpdateBatch,
+    chat_id: str,
+    change_driven: bool = True,
+    ledger: Optional[RunLedger] = None,
+    matcher: Optional[SubscriptionMatcher] = None,
+) -> Optional[str]:
+    """Decides whether a fetched website must be notified.
+
+    Hashes the scraped records, compares them with the stored postings and
+    queues the update of websites that need no notification. Notifications a
+    resumed run already sent are detected here, before any screenshot is taken.
+
+    Args:
+        check: The website, with its fetch result. Its new content hash, diff
+            and recipients are set.
+        records: The scraped job records, or None if the server reported the
+            page as not modified.
+        updates: The batch collecting the database updates of the run.
+        chat_id: The default chat, alerted of every change without a matcher.
+        change_driven: If True, unchanged websites are not reported individually.
+        ledger: The ledger of the run, see core/run_ledger.py.
+        matcher: Routes changes to the chats of matching subscriptions.
+
+    Returns:
+        The outcome if the website is done, or None if it must be screenshotted
+        and notified (see `check_screenshot` and `notify_site`).
+    """
+    fetched = check.fetched
+    if records is None:
+        check.new_content_hash = check.last_content_hash
+    elif not records:
+        print(f"Failed to scrape content from {check.url}")
+        return FAILED
     else:
-        raise ValueError(f"Invalid scraper type: {scraper_type}")
+        check.new_content_hash = content_hash(records)
+
+    if not check.changed:
+        print(f"NO change detected for {check.url}")
+        if (fetched.etag, fetched.last_modified) != (check.etag, check.last_modified):
+            # Same content under new validators: remember them for the next run
+            updates.add(check.update())
+        if change_driven or (ledger is not None and ledger.was_sent(check.unchanged_key)):
+            return UNCHANGED
+        return None
+
+    check.diff = load_job_diff(check.website_id, records)
+    if not check.diff.has_changes:
+        # e.g. duplicates reordered, or hashes of an earlier version
+        print(f"NO relevant change detected for {check.url}")
+        updates.add(check.update())
+        return UNCHANGED
+    print(f"Change detected for {check.url}")
+    if ledger is not None and ledger.was_sent(check.alert_key):
+        # Alerted before the run was interrupted, but not yet stored
+        print(f"Change already alerted for {check.url}")
+        updates.add(check.update())
+        return CHANGED
+    check.recipients = (
+        matcher.recipients(check.website_id, check.diff)
+        if matcher is not None
+        else {chat_id: check.diff}
+    )
+    if not check.recipients:
+        print(f"No subscription matches the changes of {check.url}")
+        updates.add(check.update())
+        return CHANGED
+    return None
+
+
+def check_screenshot(
+    check: SiteCheck,
+    updates: UpdateBatch,
+    screenshot_mode: str,
+    fallback_card: bool,
+    visual_diff: bool = False,
+    settings: Optional[Settings] = None,
+) -> Optional[str]:
+    """Drops changes that are not visible in the screenshot of a website.
+
+    Args:
+        check: The website, with the files returned by `capture_screenshot`.
+            The files are cropped to the changed region.
+        updates: The batch collecting the database updates of the run.
+        screenshot_mode: The screenshot mode of the website.
+        fallback_card: Whether the files are a fallback card.
+        visual_diff: If True, compare the screenshot with the previous one.
+        settings: The application settings. Loaded from the environment if None.
+
+    Returns:
+        UNCHANGED if nothing changed visibly, or None if the website must be
+        notified.
+    """
+    # A fallback card is no baseline for the next browser screenshot
+    if not (
+        check.changed
+        and check.files
+        and visual_diff
+        and screenshot_mode == "browser"
+        and not fallback_card
+    ):
+        return None
+    files, check.screenshot_hash = visual_change(
+        check.url, check.website_id, check.last_screenshot_hash, check.files, settings
+    )
+    if files is None:
+        print(f"No visible change for {check.url}")
+        updates.add(check.update())
+        return UNCHANGED
+    check.files = files
+    return None
 
 
-def monitor_website(website: Website, notifier: TelegramNotifier) -> None:
+def notify_site(
+    check: SiteCheck,
+    notifier: TelegramNotifier,
+    updates: UpdateBatch,
+    ledger: Optional[RunLedger] = None,
+) -> str:
+    """Sends the notification of a website and queues its update.
+
+    Args:
+        check: The website, as prepared by `check_content` and `check_screenshot`.
+        notifier: The TelegramNotifier instance.
+        updates: The batch collecting the database updates of the run.
+        ledger: The ledger of the run, keeping a resumed run from sending
+            notifications again.
+
+    Returns:
+        The outcome: CHANGED or UNCHANGED.
+    """
+    if not check.changed:
+        send_once(
+            ledger,
+            check.unchanged_key,
+            lambda: notifier.send_message(
+                f"No change detected for {check.url}", files=check.files
+            ),
+            check.website_id,
+        )
+        return UNCHANGED
+    send_once(
+        ledger,
+        check.alert_key,
+        lambda: send_alerts(
+            notifier, check.recipients, partial(build_change_message, check.url), check.files
+        ),
+        check.website_id,
+    )
+    # Update the last_content_hash and the postings in the database
+    updates.add(check.update())
+    return CHANGED
+
+
+def monitor_website(
+    website: Website,
+    notifier: TelegramNotifier,
+    updates: UpdateBatch,
+    change_driven: bool = True,
+    screenshot_mode: str = "browser",
+    visual_diff: bool = False,
+    ledger: Optional[RunLedger] = None,
+    screenshot_fallback: str = "card",
+    matcher: Optional[SubscriptionMatcher] = None,
+) -> str:
     """Monitors a single website for changes.
 
     Args:
         website: The Website object to monitor.
         notifier: The TelegramNotifier instance.
+        updates: The batch collecting the database updates of the run.
+        change_driven: If True, unchanged websites are neither screenshotted
+            nor reported individually.
+        screenshot_mode: The SCREENSHOT_MODE, see `capture_screenshot`.
+            Overridden by the screenshot_mode of the website, if set.
+        visual_diff: If True, changes that are not visible in the browser
+            screenshot are not alerted, and only the changed region is sent.
+        ledger: The ledger of the run, keeping a resumed run from sending
+            notifications again.
+        screenshot_fallback: The SCREENSHOT_FALLBACK, see `capture_screenshot`.
+        matcher: Routes changes to the chats of matching subscriptions. If
+            None, every change is sent to the default chat of the notifier.
+
+    Returns:
+        The outcome: CHANGED, UNCHANGED or FAILED.
     """
     scraper = get_scraper(website.scraper_type)
-    scraped_content = scraper.scrape(website.url)
-
-    if not scraped_content:
+    screenshot_mode = website.screenshot_mode or screenshot_mode
+    check = SiteCheck.of(website)
+    try:
+        check.fetched = scraper.fetch(website.url, website.etag, website.last_modified)
+    except requests.exceptions.RequestException as e:
+        print(f"Error during request: {e}")
         print(f"Failed to scrape content from {website.url}")
-        return
+        return FAILED
 
-    new_content_hash = generate_md5_hash(scraped_content)
+    # The server may confirm nothing changed: skip parsing and hashing
+    page = None if check.fetched.not_modified else scraper.scrape_result(check.fetched)
+    status = check_content(
+        check,
+        page.records if page is not None else None,
+        updates,
+        notifier.chat_id,
+        change_driven,
+        ledger,
+        matcher,
+    )
+    if status is not None:
+        return status
+    check.files, fallback_card = capture_screenshot(
+        scraper, website.url, screenshot_mode, website.id, check.diff, screenshot_fallback, page
+    )
+    status = check_screenshot(check, updates, screenshot_mode, fallback_card, visual_diff)
+    if status is not None:
+        return status
+    return notify_site(check, notifier, updates, ledger)
 
-    # Ensure the screenshots directory exists
-    screenshots_dir = "screenshots"
-    os.makedirs(screenshots_dir, exist_ok=True)
 
-    # Define screenshot path
-    screenshot_filename = f"{website.url.split('//')[1].replace('/', '_')}.png"
-    screenshot_path = os.path.join(screenshots_dir, screenshot_filename)
+def run_monitoring(
+    website_ids: Optional[List[int]] = None, send_summary: bool = True
+) -> RunSummary:
+    """Runs the monitoring process for all websites.
 
-    # Check if the content has changed
-    if website.last_content_hash != new_content_hash:
-        print(f"Change detected for {website.url}")
-        # Take a screenshot
-        scraper.take_screenshot(website.url, screenshot_path)
-        # Send notification
-        notifier.send_alert(
-            f"Change detected for {website.url}",
-            files=[screenshot_path],
-        )
+    Websites are processed one at a time unless `MONITOR_MODE` is set to
+    "async", in which case the concurrent pipeline in `pipeline` is used.
+    Stage timings are exported at the end of the run (see core/metrics.py).
 
-        # Update the last_content_hash in the database
-        db = SessionLocal()
-        try:
-            db_website = db.query(Website).filter(Website.url == website.url).first()
-            if db_website:
-                db_website.last_content_hash = new_content_hash
-                db.commit()
-        except Exception as e:
-            db.rollback()
-            print(f"Error updating database: {e}")
-        finally:
-            db.close()
-    else:
-        print(f"NO change detected for {website.url}")
-        # Take a screenshot
-        scraper.take_screenshot(website.url, screenshot_path)
-        # Send notification
-        notifier.send_message(
-            f"No change detected for {website.url}",
-            files=[screenshot_path],
-        )
+    Progress is recorded in the run ledger (see core/run_ledger.py): if the
+    previous run over the same websites was interrupted, this run resumes it,
+    skipping the websites it already finished. A run is only marked finished
+    once every website was checked and its updates were written.
 
+    Args:
+        website_ids: Only monitor these websites. Monitors all websites if None.
+        send_summary: Whether to send the end-of-run summary message.
 
-def run_monitoring() -> None:
-    """Runs the monitoring process for all websites."""
+    Returns:
+        The outcome of every monitored website.
+    """
     settings = Settings()
+    # Every run starts from fresh pages
+    get_http_client().clear_cache()
+    # Circuit breakers opened by earlier runs and other workers
+    host_health = get_host_health()
+    host_health.load()
+    ledger = RunLedger.start(website_ids, settings)
+
+    try:
+        with profile_cycle(settings), span("cycle"):
+            if settings.MONITOR_MODE == "async":
+                from pipeline import run_pipeline
+
+                summary = run_pipeline(settings, website_ids, send_summary, ledger)
+            else:
+                summary = _run_sequential(settings, website_ids, send_summary, ledger)
+    finally:
+        host_health.save()
+    # Errors, including a failed final flush, leave the run open so the next
+    # run resumes it
+    if summary.interrupted:
+        print(f"Run {ledger.run_id} was interrupted and will be resumed")
+    else:
+        ledger.finish()
+    export_metrics(settings)
+    return summary
+
 
+def _run_sequential(
+    settings: Settings,
+    website_ids: Optional[List[int]],
+    send_summary: bool,
+    ledger: Optional[RunLedger] = None,
+) -> RunSummary:
+    """Monitors the websites one at a time, see `run_monitoring`."""
+    notifier = get_notifier()
+    matcher = load_matcher(settings)
+    updates = UpdateBatch(run_id=ledger.run_id if ledger else None)
+    summary = RunSummary.resumed(ledger)
     db = SessionLocal()
     try:
-        websites = db.query(Website).all()
-        for website in websites:
-            monitor_website(
-                website,
-                TelegramNotifier(
-                    settings.TELEGRAM_BOT_TOKEN, settings.TELEGRAM_CHAT_ID
-                ),
-            )
+        query = db.query(Website).filter(Website.enabled.is_(True))
+        if website_ids is not None:
+            query = query.filter(Website.id.in_(website_ids))
+        for website in query.all():
+            if website.id in summary.outcomes:
+                continue  # Done before the run was interrupted
+            with site_context(website.url), span("site"):
+                try:
+                    status = monitor_website(
+                        website,
+                        notifier,
+                        updates,
+                        change_driven=settings.CHANGE_DRIVEN_MODE,
+                        screenshot_mode=settings.SCREENSHOT_MODE,
+                        visual_diff=settings.VISUAL_DIFF_MODE,
+                        ledger=ledger,
+                        screenshot_fallback=settings.SCREENSHOT_FALLBACK,
+                        matcher=matcher,
+                    )
+                except Exception as e:
+                    # One broken website must not end the run
+                    print(f"Error processing {website.url}: {e}")
+                    status = FAILED
+            summary.record(status, website.id)
+            updates.mark_done(website.id, status)
     except Exception as e:
         print(f"Error during monitoring: {e}")
+        summary.interrupted = True
     finally:
         db.close()
-    TelegramNotifier(
-        settings.TELEGRAM_BOT_TOKEN, settings.TELEGRAM_CHAT_ID
-    ).send_message("Monitoring completed.")
+        # Persist everything checked so far in one transaction
+        updates.flush()
+    if send_summary:
+        send_once(ledger, "summary", lambda: notifier.send_message(summary.message()))
+    notifier.flush()
+    return summary
 
 
 # Performance characteristics:
@@ -127,6 +630,7 @@ def run_monitoring() -> None:
 # Resource usage details:
 # - Memory usage depends on the number of websites and the size of scraped content.
 # Threading considerations:
-# - Can be parallelized to monitor multiple websites concurrently.
+# - The sequential path runs in a single thread; see pipeline.py for the
+#   concurrent mode.
 # Error handling approach:
 # - Handles database, scraper, and notification errors gracefully.
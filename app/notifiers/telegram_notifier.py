@@ -4,86 +4,496 @@
 from __future__ import annotations
 
 import asyncio
-from typing import List, Optional
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import telegram
-from telegram import Bot
+from telegram import Bot, InputMediaDocument
+
+from core.metrics import current_site, span
+
+# Telegram API limits
+MAX_MESSAGE_LENGTH = 4096
+MAX_CAPTION_LENGTH = 1024
+MAX_MEDIA_GROUP_SIZE = 10
+
+
+@dataclass
+class OutboundMessage:
+    """A message waiting in the outbound queue."""
+
+    chat_id: str
+    text: str
+    files: List[str] = field(default_factory=list)
+    disable_notification: bool = False
+    # Resolved with True once delivered, False if delivery failed
+    delivered: Future = field(default_factory=Future)
+
+
+class TokenBucket:
+    """Async token bucket limiting the rate of API calls."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Initializes a full bucket.
+
+        Args:
+            rate: Tokens added per second.
+            capacity: Maximum number of tokens, i.e. the allowed burst.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Waits until the given number of tokens is available and takes them."""
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+def _retry_seconds(retry_after: int | timedelta) -> float:
+    """Converts the retry_after of a RetryAfter error to seconds."""
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
 
 
 class TelegramNotifier:
-    """Notifier for sending Telegram messages."""
+    """Notifier for sending Telegram messages.
+
+    Messages are put on an outbound queue and delivered by a background event
+    loop, so `send_message` and `send_alert` return immediately. Messages
+    queued for the same chat within `coalesce_seconds` are merged into as few
+    API calls as possible: texts are joined and attachments are sent together
+    as media groups. API calls respect a global and a per-chat rate limit and
+    are retried when Telegram answers with RetryAfter.
+    """
 
-    def __init__(self, bot_token: str, chat_id: str) -> None:
+    def __init__(
+        self,
+        bot_token: str,
+        chat_id: str,
+        coalesce_seconds: float = 1.0,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        max_attempts: int = 5,
+        api_url: str = "https://api.telegram.org/bot",
+        file_ids=None,
+    ) -> None:
         """Initializes the TelegramNotifier.
 
         Args:
             bot_token: The Telegram bot token.
-            chat_id: The Telegram chat ID.
+            chat_id: The default Telegram chat ID.
+            coalesce_seconds: How long to wait for more messages before sending.
+            global_rate: Maximum API calls per second across all chats.
+            chat_rate: Maximum API calls per second to a single chat.
+            max_attempts: Delivery attempts of a single API call.
+            api_url: Base URL of the Bot API, e.g. a local Bot API server.
+            file_ids: Optional cache of uploaded files, with `file_id_for(path)`
+                and `remember_file_id(path, file_id)`; files it knows are sent
+                by Telegram file ID instead of being uploaded again.
         """
         try:
-            self.bot = Bot(token=bot_token)
+            self.bot = Bot(token=bot_token, base_url=api_url)
             self.chat_id = chat_id
         except telegram.error.TelegramError as e:
             print(f"Error initializing Telegram bot: {e}")
             raise
 
-    async def _send_message_async(
+        self.coalesce_seconds = coalesce_seconds
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self.file_ids = file_ids
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # Number of queued messages that are not resolved yet
+        self._pending = 0
+        self._pending_cond = threading.Condition()
+
+        # Only touched from the notifier thread
+        self._queue: Optional[asyncio.Queue] = None
+        self._global_bucket: Optional[TokenBucket] = None
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._chat_locks: Dict[str, asyncio.Lock] = {}
+        self._deliveries: Set[asyncio.Task] = set()
+        # Files being uploaded, resolved with their file ID (None on failure)
+        self._uploads: Dict[str, asyncio.Future] = {}
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """Starts the delivery loop thread on first use."""
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._queue = asyncio.Queue()
+                self._global_bucket = TokenBucket(self.global_rate, self.global_rate)
+                self._chat_buckets = {}
+                self._chat_locks = {}
+                self._uploads = {}
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="telegram-notifier", daemon=True
+                )
+                self._thread.start()
+                asyncio.run_coroutine_threadsafe(self._dispatch(), self._loop)
+            return self._loop
+
+    def _enqueue(
         self,
         message: str,
-        files: Optional[List[str]] = None,
-        disable_notification: bool = False,
+        files: Optional[List[str]],
+        disable_notification: bool,
+        chat_id: Optional[str],
+    ) -> Future:
+        """Puts a message on the outbound queue."""
+        outbound = OutboundMessage(
+            chat_id=str(chat_id or self.chat_id),
+            text=message,
+            files=list(files or []),
+            disable_notification=disable_notification,
+        )
+        with self._pending_cond:
+            self._pending += 1
+        outbound.delivered.add_done_callback(self._resolved)
+        loop = self._ensure_started()
+        loop.call_soon_threadsafe(self._queue.put_nowait, outbound)
+        return outbound.delivered
+
+    def _resolved(self, _: Future) -> None:
+        """Counts a resolved message and wakes up `flush` callers."""
+        with self._pending_cond:
+            self._pending -= 1
+            self._pending_cond.notify_all()
+
+    async def _dispatch(self) -> None:
+        """Takes batches off the queue and hands them to per-chat deliveries."""
+        # Batches mix the messages of many websites: don't tag their spans with
+        # the website of the caller that happened to start this task
+        current_site.set(None)
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent producers a chance to add to this batch
+            await asyncio.sleep(self.coalesce_seconds)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            groups: "OrderedDict[Tuple[str, bool], List[OutboundMessage]]" = OrderedDict()
+            for outbound in batch:
+                key = (outbound.chat_id, outbound.disable_notification)
+                groups.setdefault(key, []).append(outbound)
+            for (chat_id, disable_notification), messages in groups.items():
+                delivery = asyncio.create_task(
+                    self._deliver(chat_id, disable_notification, messages)
+                )
+                # Keep a reference so the task is not garbage collected
+                self._deliveries.add(delivery)
+                delivery.add_done_callback(self._deliveries.discard)
+
+    async def _call(self, chat_id: str, tokens: int, method, **kwargs):
+        """Calls a Bot API method within the rate limits, retrying on RetryAfter.
+
+        Timeouts and network errors are retried with backoff; rejected requests
+        (BadRequest, Forbidden) fail at once.
+        """
+        if chat_id not in self._chat_buckets:
+            self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, 3)
+        for attempt in range(1, self.max_attempts + 1):
+            await self._global_bucket.acquire(tokens)
+            await self._chat_buckets[chat_id].acquire(tokens)
+            try:
+                with span("telegram_send"):
+                    return await method(chat_id=chat_id, **kwargs)
+            except telegram.error.RetryAfter as e:
+                if attempt == self.max_attempts:
+                    raise
+                delay = _retry_seconds(e.retry_after)
+                print(f"Telegram rate limit hit, retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+            except (telegram.error.BadRequest, telegram.error.Forbidden):
+                # BadRequest subclasses NetworkError, but sending the same
+                # request again fails the same way
+                raise
+            except (telegram.error.TimedOut, telegram.error.NetworkError):
+                if attempt == self.max_attempts:
+                    raise
+                await asyncio.sleep(2**attempt)
+
+    async def _deliver(
+        self, chat_id: str, disable_notification: bool, messages: List[OutboundMessage]
     ) -> None:
-        """Sends a message to the configured Telegram chat asynchronously.
+        """Delivers the coalesced messages of one chat, in queue order."""
+        if chat_id not in self._chat_locks:
+            self._chat_locks[chat_id] = asyncio.Lock()
 
-        Args:
-            message: The message to send.
-            files: Optional list of file paths to send as attachments.
-            disable_notification: If True, sends the message silently.
+        async with self._chat_locks[chat_id]:
+            delivered = True
+            try:
+                # Send text messages, merged up to the message size limit
+                for text in self._merge_texts([m.text for m in messages]):
+                    await self._call(
+                        chat_id,
+                        1,
+                        self.bot.send_message,
+                        text=text,
+                        disable_notification=disable_notification,
+                    )
+
+                # Send files, grouped into media groups
+                documents = [
+                    (file_path, m.text.split("\n", 1)[0])
+                    for m in messages
+                    for file_path in m.files
+                ]
+                for start in range(0, len(documents), MAX_MEDIA_GROUP_SIZE):
+                    await self._send_documents(
+                        chat_id,
+                        documents[start : start + MAX_MEDIA_GROUP_SIZE],
+                        disable_notification,
+                    )
+            except Exception as e:
+                print(f"Error sending Telegram message: {e}")
+                delivered = False
+
+            for outbound in messages:
+                outbound.delivered.set_result(delivered)
+
+    async def _send_documents(
+        self,
+        chat_id: str,
+        documents: List[Tuple[str, str]],
+        disable_notification: bool,
+    ) -> None:
+        """Sends up to MAX_MEDIA_GROUP_SIZE (file path, caption) documents.
+
+        A file is uploaded once: deliveries to other chats that need it while
+        it is being uploaded wait for the upload and send its file ID.
         """
+        # Wait for the uploads of other deliveries first, without holding any
+        # upload of our own, so that two deliveries never wait for each other
+        waited: Dict[str, Optional[str]] = {}
+        for file_path, _ in documents:
+            if file_path in self._uploads and file_path not in waited:
+                waited[file_path] = await self._uploads[file_path]
+
+        contents = []
+        uploading: Dict[str, asyncio.Future] = {}
+        uploaded: Dict[str, str] = {}
         try:
-            # Send text message
-            await self.bot.send_message(
-                chat_id=self.chat_id,
-                text=message,
+            for file_path, caption in documents:
+                file_id = waited.get(file_path) or (
+                    self.file_ids.file_id_for(file_path) if self.file_ids else None
+                )
+                if file_id:
+                    # Uploaded before: only the file ID is sent
+                    contents.append((file_path, file_id, {}, caption))
+                    continue
+                if file_path not in self._uploads:
+                    uploading[file_path] = self._uploads[file_path] = (
+                        asyncio.get_running_loop().create_future()
+                    )
+                with open(file_path, "rb") as f:
+                    upload = {"filename": os.path.basename(file_path)}
+                    contents.append((file_path, f.read(), upload, caption))
+            await self._send_contents(chat_id, contents, disable_notification, uploaded)
+        finally:
+            # Waiting deliveries upload the file themselves if this one failed
+            for file_path, pending in uploading.items():
+                del self._uploads[file_path]
+                pending.set_result(uploaded.get(file_path))
+
+        if self.file_ids is None:
+            return
+        for file_path, file_id in uploaded.items():
+            await asyncio.to_thread(self.file_ids.remember_file_id, file_path, file_id)
+
+    async def _send_contents(
+        self,
+        chat_id: str,
+        contents: List[Tuple[str, Any, Dict[str, str], str]],
+        disable_notification: bool,
+        uploaded: Dict[str, str],
+    ) -> None:
+        """Sends (file path, data or file ID, upload arguments, caption) documents.
+
+        The file IDs of the uploaded files are added to `uploaded`, by path.
+        """
+
+        if len(contents) == 1:
+            file_path, data, upload, caption = contents[0]
+            message = await self._call(
+                chat_id,
+                1,
+                self.bot.send_document,
+                document=data,
+                caption=caption[:MAX_CAPTION_LENGTH],
+                disable_notification=disable_notification,
+                **upload,
+            )
+            messages = [message]
+        else:
+            media = [
+                InputMediaDocument(
+                    media=data, caption=caption[:MAX_CAPTION_LENGTH], **upload
+                )
+                for _, data, upload, caption in contents
+            ]
+            messages = await self._call(
+                chat_id,
+                len(media),
+                self.bot.send_media_group,
+                media=media,
                 disable_notification=disable_notification,
             )
 
-            # Send files if provided
-            if files:
-                for file_path in files:
-                    with open(file_path, "rb") as f:
-                        await self.bot.send_document(
-                            chat_id=self.chat_id,
-                            document=f,
-                            disable_notification=disable_notification,
-                        )
-        except telegram.error.TelegramError as e:
-            print(f"Error sending Telegram message: {e}")
+        for (file_path, _, upload, _), message in zip(contents, messages):
+            if upload and message.document:
+                uploaded[file_path] = message.document.file_id
 
-    def send_message(self, message: str, files: Optional[List[str]] = None) -> None:
-        """Sends a message to the configured Telegram chat.
+    @staticmethod
+    def _merge_texts(texts: List[str]) -> List[str]:
+        """Joins texts into as few messages as the size limit allows."""
+        merged: List[str] = []
+        current = ""
+        for text in texts:
+            for start in range(0, max(len(text), 1), MAX_MESSAGE_LENGTH):
+                part = text[start : start + MAX_MESSAGE_LENGTH]
+                if current and len(current) + 2 + len(part) <= MAX_MESSAGE_LENGTH:
+                    current = f"{current}\n\n{part}"
+                else:
+                    if current:
+                        merged.append(current)
+                    current = part
+        if current:
+            merged.append(current)
+        return merged
+
+    def send_message(
+        self,
+        message: str,
+        files: Optional[List[str]] = None,
+        chat_id: Optional[str] = None,
+    ) -> Future:
+        """Queues a silent message to a Telegram chat.
 
         Args:
             message: The message to send.
             files: Optional list of file paths to send as attachments.
+            chat_id: The chat to send to. Defaults to the configured chat.
+
+        Returns:
+            A future resolved with True once the message has been delivered.
         """
-        asyncio.run(self._send_message_async(message, files, disable_notification=True))
+        return self._enqueue(message, files, True, chat_id)
 
-    def send_alert(self, message: str, files: Optional[List[str]] = None) -> None:
-        """Sends an alert message to the configured Telegram chat.
+    def send_alert(
+        self,
+        message: str,
+        files: Optional[List[str]] = None,
+        chat_id: Optional[str] = None,
+    ) -> Future:
+        """Queues an alert message to a Telegram chat.
 
         Args:
             message: The message to send.
             files: Optional list of file paths to send as attachments.
+            chat_id: The chat to send to. Defaults to the configured chat.
+
+        Returns:
+            A future resolved with True once the message has been delivered.
         """
         alert_message = f"'@RachelKerry' {message}"
-        asyncio.run(self._send_message_async(message, files))
+        return self._enqueue(message, files, False, chat_id)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every queued message has been delivered or has failed.
+
+        Args:
+            timeout: Maximum number of seconds to wait, or None to wait forever.
+
+        Returns:
+            True if the queue was drained within the timeout.
+        """
+        with self._pending_cond:
+            return self._pending_cond.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self) -> None:
+        """Flushes the queue and stops the delivery loop."""
+        self.flush()
+        with self._start_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=10)
+        except Exception as e:
+            print(f"Error shutting down Telegram bot: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        if not thread.is_alive():
+            loop.close()
+
+    async def _shutdown(self) -> None:
+        """Cancels the dispatcher and deliveries, then shuts the bot down."""
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.bot.shutdown()
+
+
+_notifier: Optional[TelegramNotifier] = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier() -> TelegramNotifier:
+    """Returns the process wide notifier, configured from the settings."""
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            from core.config import Settings
+            from core.screenshot_store import get_screenshot_store
+
+            settings = Settings()
+            _notifier = TelegramNotifier(
+                settings.TELEGRAM_BOT_TOKEN,
+                settings.TELEGRAM_CHAT_ID,
+                coalesce_seconds=settings.TELEGRAM_COALESCE_SECONDS,
+                global_rate=settings.TELEGRAM_GLOBAL_RATE,
+                chat_rate=settings.TELEGRAM_CHAT_RATE,
+                api_url=settings.TELEGRAM_API_URL,
+                file_ids=get_screenshot_store(),
+            )
+        return _notifier
 
 
 # Performance characteristics:
-# - Depends on the network speed and Telegram API response time.
+# - One Bot and one event loop per process; bursts of messages to the same
+#   chat are merged into few API calls.
 # Resource usage details:
-# - Minimal memory usage.
+# - Attachments are read into memory right before they are sent, at most
+#   MAX_MEDIA_GROUP_SIZE at a time per chat.
 # Threading considerations:
-# - python-telegram-bot is thread-safe.
-# - Using asyncio to handle asynchronous calls.
+# - send_message, send_alert and flush can be called from any thread.
+# - The Bot is only used from the notifier thread.
@@ -0,0 +1,344 @@
+# job_monitor/app/pipeline.py
+"""Concurrent monitoring pipeline module.
+
+Runs the same steps as `main.monitor_website` (fetch, parse, screenshot and
+notify), with the same per-site decisions, as separate asyncio stages connected
+by bounded queues, so that a slow site only occupies one worker of one stage
+instead of stalling the whole run.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from core.config import Settings
+from core.database import SessionLocal, UpdateBatch
+from core.metrics import get_metrics, site_context
+from core.run_ledger import RunLedger, send_once
+from core.subscriptions import SubscriptionMatcher, load_matcher
+from data_models import Website
+from main import (
+    FAILED,
+    RunSummary,
+    SiteCheck,
+    capture_screenshot,
+    check_content,
+    check_screenshot,
+    notify_site,
+)
+from notifiers.telegram_notifier import TelegramNotifier, get_notifier
+from scrapers.base_scraper import BaseScraper, ScrapeResult
+from scrapers.registry import get_scraper
+
+
+@dataclass
+class SiteTask(SiteCheck):
+    """A website travelling through the pipeline stages."""
+
+    scraper: Optional[BaseScraper] = None
+    page: Optional[ScrapeResult] = None  # Kept for the screenshot stage only
+    started_at: float = 0.0  # perf_counter() when the fetch started
+
+
+class MonitoringPipeline:
+    """Fetch -> parse -> screenshot -> notify pipeline over bounded queues."""
+
+    def __init__(
+        self,
+        settings: Settings,
+        notifier: TelegramNotifier,
+        ledger: Optional[RunLedger] = None,
+        matcher: Optional[SubscriptionMatcher] = None,
+    ) -> None:
+        """Initializes the pipeline.
+
+        Args:
+            settings: The application settings holding the concurrency limits.
+            notifier: The TelegramNotifier shared by all notify workers.
+            ledger: The ledger of the run, see core/run_ledger.py.
+            matcher: Routes changes to the chats of matching subscriptions. If
+                None, every change is sent to the default chat of the notifier.
+        """
+        self.settings = settings
+        self.notifier = notifier
+        self.ledger = ledger
+        self.matcher = matcher
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.summary = RunSummary.resumed(ledger)
+        self.updates = UpdateBatch(run_id=ledger.run_id if ledger else None)
+
+    async def _record(self, status: str, website_id: int) -> None:
+        """Counts the outcome of a site and records it in the run ledger."""
+        self.summary.record(status, website_id)
+        await asyncio.to_thread(self.updates.mark_done, website_id, status)
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Returns the semaphore bounding concurrent requests to a host."""
+        host = urlsplit(url).hostname or ""
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(
+                self.settings.PER_HOST_CONCURRENCY
+            )
+        return self._host_limits[host]
+
+    async def _fetch(self, task: SiteTask) -> bool:
+        """Downloads the page of a site."""
+        task.started_at = time.perf_counter()
+        async with self._global_limit, self._host_limit(task.url):
+            try:
+                task.scraper = get_scraper(task.scraper_type)
+                task.fetched = await asyncio.to_thread(
+                    task.scraper.fetch, task.url, task.etag, task.last_modified
+                )
+            except requests.exceptions.RequestException as e:
+                print(f"Error during request: {e}")
+                print(f"Failed to scrape content from {task.url}")
+                await self._record(FAILED, task.website_id)
+                return False
+        return True
+
+    async def _parse(self, task: SiteTask) -> bool:
+        """Extracts and hashes the relevant content of a downloaded page."""
+        page = None
+        if not task.fetched.not_modified:
+            # Otherwise the server confirmed nothing changed: skip parsing
+            page = await asyncio.to_thread(task.scraper.scrape_result, task.fetched)
+        status = await asyncio.to_thread(
+            check_content,
+            task,
+            page.records if page is not None else None,
+            self.updates,
+            self.notifier.chat_id,
+            self.settings.CHANGE_DRIVEN_MODE,
+            self.ledger,
+            self.matcher,
+        )
+        if status is not None:
+            await self._record(status, task.website_id)
+            return False
+        task.page = page
+        return True
+
+    async def _screenshot(self, task: SiteTask) -> bool:
+        """Captures the screenshot attached to the notification."""
+        screenshot_mode = task.screenshot_mode or self.settings.SCREENSHOT_MODE
+        page, task.page = task.page, None  # Released once the screenshot is taken
+        if screenshot_mode == "none":
+            return True
+        async with self._host_limit(task.url):
+            try:
+                task.files, fallback_card = await asyncio.to_thread(
+                    capture_screenshot,
+                    task.scraper,
+                    task.url,
+                    screenshot_mode,
+                    task.website_id,
+                    task.diff,
+                    self.settings.SCREENSHOT_FALLBACK,
+                    page,
+                )
+            except Exception as e:
+                print(f"Error taking screenshot of {task.url}: {e}")
+                await self._record(FAILED, task.website_id)
+                return False
+
+        status = await asyncio.to_thread(
+            check_screenshot,
+            task,
+            self.updates,
+            screenshot_mode,
+            fallback_card,
+            self.settings.VISUAL_DIFF_MODE,
+            self.settings,
+        )
+        if status is not None:
+            await self._record(status, task.website_id)
+            return False
+        return True
+
+    async def _notify(self, task: SiteTask) -> bool:
+        """Sends the notification and queues the update of the content hash."""
+        status = await asyncio.to_thread(
+            notify_site, task, self.notifier, self.updates, self.ledger
+        )
+        await self._record(status, task.website_id)
+        return True
+
+    async def _worker(
+        self,
+        queue: asyncio.Queue,
+        handler: Callable[[SiteTask], Awaitable[bool]],
+        next_queue: Optional[asyncio.Queue],
+    ) -> None:
+        """Consumes a stage queue and forwards successful tasks downstream."""
+        while True:
+            task = await queue.get()
+            forward = False
+            try:
+                with site_context(task.url):
+                    forward = await handler(task) and next_queue is not None
+                if forward:
+                    await next_queue.put(task)
+            except Exception as e:
+                print(f"Error processing {task.url}: {e}")
+                # Count the site as failed, like the sequential mode does,
+                # unless the stage recorded its outcome before failing
+                if task.website_id not in self.summary.outcomes:
+                    await self._record(FAILED, task.website_id)
+            finally:
+                if not forward:
+                    # Last stage of this site: record its end-to-end latency
+                    with site_context(task.url):
+                        get_metrics().record(
+                            "site", time.perf_counter() - task.started_at
+                        )
+                queue.task_done()
+
+    async def run(self, tasks: List[SiteTask]) -> RunSummary:
+        """Pushes all tasks through the pipeline and waits for completion.
+
+        Args:
+            tasks: The sites to monitor.
+
+        Returns:
+            The outcome counts of the run.
+        """
+        settings = self.settings
+        self._global_limit = asyncio.Semaphore(settings.MAX_CONCURRENCY)
+        self._host_limits = {}
+
+        queue_size = settings.PIPELINE_QUEUE_SIZE
+        fetch_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        parse_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        screenshot_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        notify_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+        parse_workers = min(settings.MAX_CONCURRENCY, os.cpu_count() or 1)
+        stages = [
+            (fetch_queue, self._fetch, parse_queue, settings.MAX_CONCURRENCY),
+            (parse_queue, self._parse, screenshot_queue, parse_workers),
+            (
+                screenshot_queue,
+                self._screenshot,
+                notify_queue,
+                settings.SCREENSHOT_CONCURRENCY,
+            ),
+            (notify_queue, self._notify, None, settings.NOTIFY_CONCURRENCY),
+        ]
+
+        # Every blocking call runs in the default executor, size it so that
+        # no stage starves the others.
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(
+            ThreadPoolExecutor(
+                max_workers=settings.MAX_CONCURRENCY
+                + parse_workers
+                + settings.SCREENSHOT_CONCURRENCY
+                + settings.NOTIFY_CONCURRENCY
+            )
+        )
+
+        workers = [
+            [
+                asyncio.create_task(self._worker(queue, handler, next_queue))
+                for _ in range(max(1, count))
+            ]
+            for queue, handler, next_queue, count in stages
+        ]
+
+        for task in tasks:
+            await fetch_queue.put(task)
+
+        # Drain stage by stage: once a queue is joined, nothing upstream can
+        # feed it again and its workers can be stopped.
+        for (queue, _, _, _), stage_workers in zip(stages, workers):
+            await queue.join()
+            for worker in stage_workers:
+                worker.cancel()
+            await asyncio.gather(*stage_workers, return_exceptions=True)
+        return self.summary
+
+
+def load_tasks(website_ids: Optional[List[int]] = None) -> List[SiteTask]:
+    """Loads the websites to monitor as detached pipeline tasks.
+
+    Args:
+        website_ids: Only load these websites. Loads all websites if None.
+            Disabled websites are never loaded.
+
+    Returns:
+        One SiteTask per monitored website.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(Website).filter(Website.enabled.is_(True))
+        if website_ids is not None:
+            query = query.filter(Website.id.in_(website_ids))
+        return [
+            SiteTask.of(website)
+            for website in query
+        ]
+    finally:
+        db.close()
+
+
+def run_pipeline(
+    settings: Optional[Settings] = None,
+    website_ids: Optional[List[int]] = None,
+    send_summary: bool = True,
+    ledger: Optional[RunLedger] = None,
+) -> RunSummary:
+    """Runs the monitoring process for all websites concurrently.
+
+    Args:
+        settings: The application settings. Loaded from the environment if None.
+        website_ids: Only monitor these websites. Monitors all websites if None.
+        send_summary: Whether to send the end-of-run summary message.
+        ledger: The ledger of the run. Websites it already finished are skipped.
+
+    Returns:
+        The outcome of every monitored website.
+    """
+    settings = settings or Settings()
+    notifier = get_notifier()
+    pipeline = MonitoringPipeline(settings, notifier, ledger, load_matcher(settings))
+    tasks = [
+        task
+        for task in load_tasks(website_ids)
+        if task.website_id not in pipeline.summary.outcomes
+    ]
+    try:
+        asyncio.run(pipeline.run(tasks))
+    except Exception as e:
+        print(f"Error during monitoring: {e}")
+        pipeline.summary.interrupted = True
+    # Persist the whole cycle in one transaction, including what was checked
+    # before an error; a database error is raised to the caller
+    pipeline.updates.flush()
+    if send_summary:
+        send_once(ledger, "summary", lambda: notifier.send_message(pipeline.summary.message()))
+    notifier.flush()
+    return pipeline.summary
+
+
+# Performance characteristics:
+# - Fetches up to MAX_CONCURRENCY pages at once, PER_HOST_CONCURRENCY per host.
+# - Screenshots and notifications have their own, smaller, worker pools.
+# Resource usage details:
+# - Bounded queues cap the number of in-flight page bodies in memory.
+# Threading considerations:
+# - Blocking scraper and database calls run in the loop's default executor.
+# Error handling approach:
+# - Errors are reported per site; a failing site never stops the pipeline.
@@ -3,6 +3,7 @@
 
 # Add future imports here if needed
 from __future__ import annotations
+import argparse
 import datetime
 import os
 import platform
@@ -13,15 +14,26 @@ import psutil
 # Set encode as utf-8
 # -*- coding: utf-8 -*-
 
-from core.database import engine
-from data_models import Base, Website
+from core.database import create_tables, upsert_websites
 from main import run_monitoring
 from core.database import SessionLocal
 
 
-def create_tables():
-    """Creates database tables based on the defined data models."""
-    Base.metadata.create_all(bind=engine)
+# Websites monitored out of the box
+INITIAL_WEBSITES = [
+    {
+        "url": "https://www.rezoomo.com/company/the-national-maternity-hospital/jobs/?source=iframe",
+        "scraper_type": "rezoomo",
+    },
+    {
+        "url": "https://www.rezoomo.com/company/coombe-hospital/jobs/?source=iframe",
+        "scraper_type": "rezoomo",
+    },
+    {
+        "url": "https://therotundahospital.occupop-careers.com/",
+        "scraper_type": "occupop",
+    },
+]
 
 
 def populate_initial_data():
@@ -29,45 +41,8 @@ def populate_initial_data():
 
     db = SessionLocal()
     try:
-        # Check if the websites already exist
-        if (
-            not db.query(Website)
-            .filter(
-                Website.url
-                == "https://www.rezoomo.com/company/the-national-maternity-hospital/jobs/?source=iframe"
-            )
-            .first()
-        ):
-            website1 = Website(
-                url="https://www.rezoomo.com/company/the-national-maternity-hospital/jobs/?source=iframe",
-                scraper_type="rezoomo",
-            )
-            db.add(website1)
-
-        if (
-            not db.query(Website)
-            .filter(
-                Website.url
-                == "https://www.rezoomo.com/company/coombe-hospital/jobs/?source=iframe"
-            )
-            .first()
-        ):
-            website2 = Website(
-                url="https://www.rezoomo.com/company/coombe-hospital/jobs/?source=iframe",
-                scraper_type="rezoomo",
-            )
-            db.add(website2)
-
-        if (
-            not db.query(Website)
-            .filter(Website.url == "https://therotundahospital.occupop-careers.com/")
-            .first()
-        ):
-            website3 = Website(
-                url="https://therotundahospital.occupop-careers.com/",
-                scraper_type="occupop",
-            )
-            db.add(website3)
+        # Websites that already exist are left untouched
+        upsert_websites(db, INITIAL_WEBSITES)
         db.commit()
         print("Initial data populated successfully.")
     except Exception as e:
@@ -80,6 +55,20 @@ def populate_initial_data():
 def main():
     """Main entry point for the application."""
 
+    parser = argparse.ArgumentParser(description="Job posting monitor.")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and check every website on its own schedule.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Split the websites between this many worker processes.",
+    )
+    args = parser.parse_args()
+
     current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     user = os.getenv("USER", os.getenv("USERNAME", "unknown"))
     system_info = platform.uname()
@@ -103,7 +92,19 @@ Memory Info: {psutil.virtual_memory() if 'psutil' in sys.modules else 'psutil no
 
     create_tables()
     populate_initial_data()
-    run_monitoring()
+    if args.workers > 1:
+        from workers import run_sharded_daemon, run_sharded_once
+
+        if args.daemon:
+            run_sharded_daemon(args.workers)
+        else:
+            run_sharded_once(args.workers)
+    elif args.daemon:
+        from scheduler import Scheduler
+
+        Scheduler().run_forever()
+    else:
+        run_monitoring()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,225 @@
+# job_monitor/app/scheduler.py
+"""Scheduler daemon module.
+
+Keeps the process alive and checks every website on its own schedule. Each
+website stores its poll interval and next check time in the database; the
+daemon keeps the due times in a priority queue and adapts the intervals:
+websites that change get checked more often, websites that rarely change
+back off up to the configured maximum.
+
+With sharding (see core/sharding.py), each daemon only queues the websites
+assigned to its worker and leases them before checking.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import heapq
+import math
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from core.config import Settings
+from core.database import SessionLocal
+from core.sharding import ShardCoordinator
+from core.utils import utcnow
+from data_models import Website
+from main import CHANGED, FAILED, RunSummary, run_monitoring
+
+# Delay before a batch that failed as a whole, e.g. on a locked database, is
+# retried, so that a persistent error does not keep the daemon busy
+FAILED_BATCH_RETRY_SECONDS = 60
+
+
+class Scheduler:
+    """Runs monitoring batches as websites become due."""
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        coordinator: Optional[ShardCoordinator] = None,
+    ) -> None:
+        """Initializes the scheduler.
+
+        Args:
+            settings: The application settings. Loaded from the environment if None.
+            coordinator: Shards the websites with other workers. Created from
+                the settings if None and SHARDING_ENABLED is set.
+        """
+        self.settings = settings or Settings()
+        if coordinator is None and self.settings.SHARDING_ENABLED:
+            coordinator = ShardCoordinator(settings=self.settings)
+        self.coordinator = coordinator
+        self._heap: List[Tuple[datetime, int]] = []
+        self._stop = threading.Event()
+
+    def next_interval(self, interval: Optional[int], status: str) -> int:
+        """Adapts the poll interval of a website to the outcome of a check.
+
+        Args:
+            interval: The current interval in seconds, None for the default.
+            status: The outcome of the check: CHANGED, UNCHANGED or FAILED.
+
+        Returns:
+            The new interval in seconds, within the configured bounds.
+        """
+        settings = self.settings
+        interval = interval or settings.SCHEDULER_DEFAULT_INTERVAL
+        if status == CHANGED:
+            interval *= settings.SCHEDULER_SPEEDUP_FACTOR
+        elif status != FAILED:
+            interval *= settings.SCHEDULER_BACKOFF_FACTOR
+        return math.ceil(
+            min(
+                settings.SCHEDULER_MAX_INTERVAL,
+                max(settings.SCHEDULER_MIN_INTERVAL, interval),
+            )
+        )
+
+    def reload(self) -> None:
+        """Rebuilds the priority queue from the database.
+
+        Picks up websites that were added, removed, enabled or disabled since
+        the last reload. When sharded, only the websites of this worker are queued.
+        """
+        now = utcnow()
+        db = SessionLocal()
+        try:
+            self._heap = [
+                (next_check_at or now, website_id)
+                for website_id, next_check_at in db.query(
+                    Website.id, Website.next_check_at
+                ).filter(Website.enabled.is_(True))
+                if self.coordinator is None or self.coordinator.owns(website_id)
+            ]
+        finally:
+            db.close()
+        heapq.heapify(self._heap)
+
+    def pop_due(self, now: datetime) -> List[int]:
+        """Removes and returns the IDs of all websites due at the given time."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    def reschedule(self, website_ids: List[int], summary: RunSummary) -> None:
+        """Stores the next check time of the checked websites and queues them.
+
+        Args:
+            website_ids: The websites that were checked.
+            summary: The outcome of the check.
+        """
+        now = utcnow()
+        db = SessionLocal()
+        try:
+            for website in db.query(Website).filter(Website.id.in_(website_ids)):
+                status = summary.outcomes.get(website.id, FAILED)
+                website.poll_interval = self.next_interval(website.poll_interval, status)
+                website.next_check_at = now + timedelta(seconds=website.poll_interval)
+                website.last_checked_at = now
+                if status == CHANGED:
+                    website.last_changed_at = now
+                heapq.heappush(self._heap, (website.next_check_at, website.id))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error updating schedule: {e}")
+        finally:
+            db.close()
+
+    def run_once(self) -> Optional[RunSummary]:
+        """Checks the websites that are currently due, if any.
+
+        Returns:
+            The outcome of the check, or None if no website was due or the
+            batch failed. The websites of a failed batch stay queued and are
+            retried after FAILED_BATCH_RETRY_SECONDS.
+        """
+        due = self.pop_due(utcnow())
+        if due and self.coordinator is not None:
+            # Websites leased by another worker, or already checked this
+            # cycle, come back with the next reload
+            due = self.coordinator.claim(due)
+        if not due:
+            return None
+        try:
+            summary = run_monitoring(due, send_summary=False)
+            print(summary.message())
+            self.reschedule(due, summary)
+            return summary
+        except Exception as e:
+            print(f"Error monitoring {len(due)} websites: {e}")
+            retry_at = utcnow() + timedelta(seconds=FAILED_BATCH_RETRY_SECONDS)
+            for website_id in due:
+                heapq.heappush(self._heap, (retry_at, website_id))
+            return None
+        finally:
+            if self.coordinator is not None:
+                self.coordinator.release(due)
+
+    def seconds_until_next(self) -> float:
+        """Returns how long to sleep before the next website is due."""
+        wait = float(self.settings.SCHEDULER_RELOAD_SECONDS)
+        if self.coordinator is not None:
+            # Notice workers joining or leaving
+            wait = min(wait, self.coordinator.heartbeat_interval)
+        if self._heap:
+            until_due = (self._heap[0][0] - utcnow()).total_seconds()
+            wait = min(wait, max(0.0, until_due))
+        return wait
+
+    def run_forever(self) -> None:
+        """Runs until `stop` is called or the process receives SIGTERM."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
+
+        if self.coordinator is not None:
+            # Heartbeats and lease renewals continue while a batch runs
+            self.coordinator.start_heartbeat()
+        self.reload()
+        reloaded_at = time.monotonic()
+        print(f"Scheduler started with {len(self._heap)} websites")
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                reload = now - reloaded_at >= self.settings.SCHEDULER_RELOAD_SECONDS
+                if self.coordinator is not None and self.coordinator.members_changed():
+                    # A worker joined or left: take over or hand off websites
+                    reload = True
+                if reload:
+                    self.reload()
+                    reloaded_at = now
+                if self.run_once() is None:
+                    self._stop.wait(self.seconds_until_next())
+        finally:
+            if self.coordinator is not None:
+                self.coordinator.leave()
+        print("Scheduler stopped")
+
+    def stop(self) -> None:
+        """Asks `run_forever` to return after the current batch."""
+        self._stop.set()
+
+
+# Performance characteristics:
+# - Picking the due websites is O(k log n) for k due out of n websites.
+# - When sharded, each worker only queues and checks its share of the websites.
+# - The interpreter, imports, database setup, HTTP sessions, the browser pool
+#   and the Telegram bot are initialized once for the lifetime of the daemon.
+# Resource usage details:
+# - The priority queue holds one (datetime, int) entry per website.
+# Threading considerations:
+# - Runs in the main thread; `stop` can be called from any thread.
+# - When sharded, the coordinator sends heartbeats from its own thread.
+# Error handling approach:
+# - Monitoring errors are handled per website by run_monitoring; failed
+#   websites keep their interval and are retried when due again.
+# - A batch that fails as a whole, e.g. when its results cannot be stored, is
+#   logged and requeued; the daemon keeps running and the leases are released.
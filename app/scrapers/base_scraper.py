@@ -8,32 +8,177 @@ from __future__ import annotations
 # -*- coding: utf-8 -*-
 
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import requests
+
+from core.config import Settings
+from core.http import FetchResult, get_http_client
+from core.jobs import JobRecord, unique_job_ids
+from core.metrics import span
+from core.normalize import DEFAULT_RULES, NormalizationRules, normalize_records
+from core.utils import take_screenshot
+
+# Not computed yet, see ScrapeResult.selector
+_UNKNOWN = object()
+
+
+@dataclass
+class ScrapeResult:
+    """A scraped page, handed from the parse to the screenshot stage.
+
+    Keeps the downloaded bytes so the screenshot reuses them instead of
+    downloading and parsing the page again.
+    """
+
+    url: str
+    content: bytes  # The raw page, as downloaded
+    records: List[JobRecord]
+    scraper: "BaseScraper"
+    _selector: object = field(default=_UNKNOWN, repr=False)
+
+    @property
+    def selector(self) -> Optional[str]:
+        """The element to capture, found by the scraper on first use, or None."""
+        if self._selector is _UNKNOWN:
+            try:
+                self._selector = self.scraper.screenshot_selector(self.content)
+            except Exception as e:
+                print(f"Error finding the screenshot element of {self.url}: {e}")
+                self._selector = None
+        return self._selector
 
 
 class BaseScraper(ABC):
-    """Abstract base class for web scrapers."""
+    """Abstract base class for web scrapers.
+
+    Scraping is split in two steps so that callers (e.g. the async pipeline)
+    can run the network bound `fetch` and the CPU bound `parse` as separate
+    stages. `scrape` chains both for sequential callers.
+
+    Parsed records are normalized with the scraper's `normalization` rules
+    before they are hashed, see core/normalize.py.
+
+    `scrape_result` wraps the records with the page they come from, which
+    `take_screenshot` uses to find the element to capture and, with
+    SCREENSHOT_SOURCE="fetched", to render without downloading the page again.
+    """
+
+    normalization: NormalizationRules = DEFAULT_RULES
+
+    def fetch(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> FetchResult:
+        """Downloads the raw page content of the given URL.
+
+        Args:
+            url: The URL to download.
+            etag: Optional ETag of the last seen version of the page.
+            last_modified: Optional Last-Modified value of the last seen version.
+
+        Returns:
+            The downloaded page; `not_modified` is set if the server confirmed
+            the page did not change since the given validators.
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails.
+        """
+        return get_http_client().get(url, etag=etag, last_modified=last_modified)
 
     @abstractmethod
-    def scrape(self, url: str) -> str:
-        """Scrapes the given URL and returns the relevant content.
+    def parse(self, content: bytes) -> List[JobRecord]:
+        """Extracts the job postings from a downloaded page.
 
         Args:
-            url: The URL to scrape.
+            content: The raw page content of a FetchResult.
 
         Returns:
-            The scraped content.
+            The scraped job records, or an empty list if nothing relevant was found.
         """
         ...
 
-    @abstractmethod
-    def take_screenshot(self, url: str, screenshot_path: str) -> None:
+    def extract(self, content: bytes) -> List[JobRecord]:
+        """Parses a downloaded page, reporting parsing errors.
+
+        Args:
+            content: The raw page content returned by `fetch`.
+
+        Returns:
+            The normalized job records with unique IDs, or an empty list if
+            an error occurs.
+        """
+        try:
+            with span("parse"):
+                records = normalize_records(self.parse(content), self.normalization)
+                return unique_job_ids(records)
+        except Exception as e:
+            print(f"Error parsing content: {e}")
+            return []
+
+    def scrape_result(self, fetched: FetchResult) -> ScrapeResult:
+        """Parses a downloaded page, keeping the page for the screenshot.
+
+        Args:
+            fetched: The page returned by `fetch`.
+
+        Returns:
+            The records of `extract` together with the page.
+        """
+        return ScrapeResult(fetched.url, fetched.content, self.extract(fetched.content), self)
+
+    def scrape(self, url: str) -> List[JobRecord]:
+        """Scrapes the given URL and returns the job postings found.
+
+        Args:
+            url: The URL to scrape.
+
+        Returns:
+            The scraped job records, or an empty list if an error occurs.
+        """
+        # Error handling approach:
+        # - Uses try-except block to handle request and parsing errors.
+        try:
+            fetched = self.fetch(url)
+        except requests.exceptions.RequestException as e:
+            print(f"Error during request: {e}")
+            return []
+        return self.extract(fetched.content)
+
+    def screenshot_selector(self, content: bytes) -> Optional[str]:
+        """Returns the CSS selector of the element to capture, None for the full page.
+
+        Args:
+            content: The raw page content.
+        """
+        return None
+
+    def take_screenshot(
+        self, url: str, screenshot_path: str, page: Optional[ScrapeResult] = None
+    ) -> None:
         """Takes a screenshot of the given URL.
 
         Args:
             url: The URL to take a screenshot of.
             screenshot_path: The file path to save the screenshot to.
+            page: The scraped page, if any. Without it the page is fetched
+                again (from the run cache when it was just scraped).
+
+        Raises:
+            RuntimeError: If the browser fails to take the screenshot.
         """
-        ...
+        if page is None:
+            try:
+                page = ScrapeResult(url, self.fetch(url).content, [], self)
+            except requests.exceptions.RequestException as e:
+                print(f"Network error while accessing {url}: {str(e)}")
+        html = None
+        if page is not None and page.content and Settings().SCREENSHOT_SOURCE == "fetched":
+            html = page.content
+        take_screenshot(url, screenshot_path, page.selector if page else None, html)
 
 
 # Performance characteristics:
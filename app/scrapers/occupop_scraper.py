@@ -11,11 +11,11 @@ Features:
 
 Required packages:
 - requests
-- beautifulsoup4
+- beautifulsoup4 (or lxml / selectolax, see core.parsing)
 
 Usage:
 - Create an instance of OccupopScraper.
-- Call the `scrape` method with the URL of the Occupop career page to extract job listings.
+- Call the `scrape` method (or `fetch` and `parse` separately) with the URL of the Occupop career page to extract job listings.
 - Optionally, use the `take_screenshot` method to capture a screenshot of the page.
 
 Author: tpinto
@@ -23,63 +23,87 @@ Author: tpinto
 
 from __future__ import annotations
 
-import requests
-from bs4 import BeautifulSoup
+from typing import List
 
-from core.utils import take_screenshot
+from core.jobs import JobRecord
+from core.normalize import DEFAULT_RULES
+from core.parsing import Selector, parse_html
 from scrapers.base_scraper import BaseScraper
+from scrapers.registry import register_scraper
 
 
+# Precompiled selectors, shared by every page
+SECTION_HEADING = Selector('h2[class*="css"]')
+JOB_LINK = Selector("a[href]")
+# A posting link holds its title, location and job type, in this order
+JOB_FIELDS = Selector("span")
+
+
+@register_scraper("occupop")
 class OccupopScraper(BaseScraper):
     """Scraper for Occupop websites."""
 
-    def scrape(self, url: str) -> str:
+    # Without links, the whole section text is hashed, including its job count
+    normalization = DEFAULT_RULES.extend(
+        r"\b\d+\s+(?:open\s+)?(?:jobs?|positions?|roles?|vacancies|openings?)\b"
+    )
+
+    def parse(self, content: bytes) -> List[JobRecord]:
         """
-        Scrapes the given Occupop URL, finds the parent div for "Job listing" text.
+        Finds the job postings below the "Job listing" heading of a downloaded Occupop page.
 
-        Uses requests to download the webpage and BeautifulSoup to parse the page HTML.
+        Uses the configured parse backend to query the page HTML. Every link in the parent
+        div of the heading is a posting, identified by its href; its title, location and
+        job type are read from the spans of the link, or the whole link text is the title
+        if it has fewer spans. If the section has no links, its whole text is returned as
+        a single record.
 
         Args:
-            url: The URL to scrape.
+            content: The raw page content.
 
         Returns:
-            The scraped content of the parent div containing "Job listing", or an empty string if not found or an error occurs.
+            The job records of the "Job listing" section, or an empty list if not found.
         """
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            # Find the div containing "Job listing" using a more efficient method
-            job_listing_section = soup.find(
-                "h2", class_=lambda x: x and "css" in x, string="Job listing"
-            )
-
-            if job_listing_section:
-                # Find the parent div of the h2 element
-                parent_div = job_listing_section.find_parent("div")
-
-                if parent_div:
-                    return parent_div.get_text(separator=" ", strip=True)
-                else:
-                    print("Could not find the parent div of 'Job listing' section.")
+        # The section is found through its parent, so the whole tree is needed
+        root = parse_html(content)
+
+        # Find the div containing "Job listing" using a more efficient method
+        job_listing_section = next(
+            (h2 for h2 in SECTION_HEADING.select(root) if h2.text() == "Job listing"),
+            None,
+        )
+
+        if job_listing_section:
+            # Find the parent div of the h2 element
+            parent_div = job_listing_section.find_parent("div")
+
+            if parent_div:
+                records = []
+                for link in JOB_LINK.select(parent_div):
+                    fields = [span.text(separator=" ") for span in JOB_FIELDS.select(link)]
+                    if len(fields) >= 3 and fields[0]:
+                        title, location, job_type = fields[:3]
+                    else:
+                        title, location, job_type = link.text(separator=" "), "", ""
+                    if title:
+                        href = link.attr("href")
+                        records.append(
+                            JobRecord(
+                                job_id=href,
+                                title=title,
+                                location=location,
+                                job_type=job_type,
+                                url=href,
+                            )
+                        )
+                if records:
+                    return records
+
+                text = parent_div.text(separator=" ")
+                return [JobRecord(job_id="listing", title=text)] if text else []
             else:
-                print("Could not find 'Job listing' section.")
+                print("Could not find the parent div of 'Job listing' section.")
+        else:
+            print("Could not find 'Job listing' section.")
 
-        except requests.exceptions.RequestException as e:
-            print(f"Error during request: {e}")
-        except Exception as e:
-            print(f"Error parsing content: {e}")
-
-        return ""
-
-    def take_screenshot(self, url: str, screenshot_path: str) -> None:
-        """
-        Takes a screenshot of the given URL.
-
-        Args:
-            url: The URL to take a screenshot of.
-            screenshot_path: The file path to save the screenshot to.
-        """
-        take_screenshot(url, screenshot_path)
+        return []
@@ -0,0 +1,165 @@
+# job_monitor/app/scrapers/registry.py
+"""Scraper registry module.
+
+Maps the `scraper_type` of a website to its scraper class. Scraper classes
+register themselves with the `register_scraper` decorator; the module
+defining a type is only imported the first time that type is requested, and
+one instance per type is shared by every website.
+
+Scrapers can be added without touching this package:
+- in-tree, by adding the module to `SCRAPER_MODULES`;
+- from another distribution, by declaring an entry point in the
+  `job_monitor.scrapers` group, e.g. in pyproject.toml:
+
+      [project.entry-points."job_monitor.scrapers"]
+      workday = "my_package.workday:WorkdayScraper"
+
+`detect_scraper_type` guesses the type of a website from its URL, e.g. when
+sites are imported in bulk (see sites.py). Types without an entry in
+`SCRAPER_URL_PATTERNS` must be given explicitly.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import importlib
+import re
+import threading
+from functools import lru_cache
+from importlib.metadata import entry_points
+from typing import Callable, Dict, Optional, Set, Type
+
+from scrapers.base_scraper import BaseScraper
+
+# Entry point group searched for scrapers of other distributions
+ENTRY_POINT_GROUP = "job_monitor.scrapers"
+
+# Module defining each built-in scraper type, imported on first use
+SCRAPER_MODULES: Dict[str, str] = {
+    "rezoomo": "scrapers.rezoomo_scraper",
+    "occupop": "scrapers.occupop_scraper",
+}
+
+# URLs handled by each built-in scraper type, regexes matched from the start
+SCRAPER_URL_PATTERNS: Dict[str, str] = {
+    "rezoomo": r"https?://(?:[\w-]+\.)*rezoomo\.com(?:[/?#]|$)",
+    "occupop": r"https?://[\w-]+\.occupop-careers\.com(?:[/?#]|$)",
+}
+
+_classes: Dict[str, Type[BaseScraper]] = {}
+_instances: Dict[str, BaseScraper] = {}
+_lock = threading.RLock()
+
+
+def register_scraper(
+    scraper_type: str,
+) -> Callable[[Type[BaseScraper]], Type[BaseScraper]]:
+    """Class decorator registering a scraper for a scraper type.
+
+    Args:
+        scraper_type: The `scraper_type` value of the websites it handles.
+
+    Returns:
+        The decorator, which returns the class unchanged.
+    """
+
+    def decorator(cls: Type[BaseScraper]) -> Type[BaseScraper]:
+        with _lock:
+            _classes[scraper_type] = cls
+        return cls
+
+    return decorator
+
+
+def _load_class(scraper_type: str) -> Type[BaseScraper]:
+    """Imports the module defining a scraper type and returns its class.
+
+    Raises:
+        ValueError: If no module or entry point provides the type.
+    """
+    if scraper_type not in _classes:
+        module = SCRAPER_MODULES.get(scraper_type)
+        if module is not None:
+            # Registers the class through the decorator
+            importlib.import_module(module)
+        else:
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                if entry_point.name == scraper_type:
+                    _classes[scraper_type] = entry_point.load()
+                    break
+    if scraper_type not in _classes:
+        raise ValueError(f"Invalid scraper type: {scraper_type}")
+    return _classes[scraper_type]
+
+
+def get_scraper(scraper_type: str) -> BaseScraper:
+    """Returns the shared scraper instance for a scraper type.
+
+    Args:
+        scraper_type: The type of scraper.
+
+    Returns:
+        The scraper instance.
+
+    Raises:
+        ValueError: If an invalid scraper type is provided.
+    """
+    scraper = _instances.get(scraper_type)
+    if scraper is None:
+        with _lock:
+            scraper = _instances.get(scraper_type)
+            if scraper is None:
+                scraper = _instances[scraper_type] = _load_class(scraper_type)()
+    return scraper
+
+
+def scraper_types() -> Set[str]:
+    """Returns every known scraper type, built-in or from an entry point."""
+    with _lock:
+        types = set(SCRAPER_MODULES) | set(_classes)
+    return types | {entry_point.name for entry_point in entry_points(group=ENTRY_POINT_GROUP)}
+
+
+@lru_cache(maxsize=1)
+def _url_matcher() -> re.Pattern:
+    """All URL patterns compiled into one expression, one named group per type."""
+    return re.compile(
+        "|".join(
+            f"(?P<t{index}>{pattern})"
+            for index, pattern in enumerate(SCRAPER_URL_PATTERNS.values())
+        ),
+        re.IGNORECASE,
+    )
+
+
+def detect_scraper_type(url: str) -> Optional[str]:
+    """Returns the scraper type handling a URL.
+
+    Args:
+        url: The website URL.
+
+    Returns:
+        The first type of `SCRAPER_URL_PATTERNS` matching the URL, or None.
+    """
+    match = _url_matcher().match(url.strip())
+    if match is None:
+        return None
+    return list(SCRAPER_URL_PATTERNS)[int(match.lastgroup[1:])]
+
+
+# Performance characteristics:
+# - A scraper module is imported once, the first time its type is requested;
+#   later lookups are a dictionary access.
+# - URL detection is one match of a precompiled alternation, whatever the
+#   number of types.
+# Resource usage details:
+# - One scraper instance per scraper type.
+# Threading considerations:
+# - Loading is serialized by a lock; scrapers are stateless and shared
+#   between threads.
+# Error handling approach:
+# - Unknown scraper types raise ValueError; import errors of a scraper module
+#   propagate to the caller.
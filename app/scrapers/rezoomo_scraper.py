@@ -6,124 +6,190 @@ from __future__ import annotations
 
 # Set encode as utf-8
 # -*- coding: utf-8 -*-
-import requests
-from bs4 import BeautifulSoup
+import re
+from typing import Any, Dict, Iterator, List, Optional
 
-from core.utils import take_screenshot
+from core.jobs import JobRecord, make_job_id
+from core.normalize import DEFAULT_RULES
+from core.parsing import Selector, extract_script_json, iter_strained, parse_html
 from scrapers.base_scraper import BaseScraper
+from scrapers.registry import register_scraper
+
+
+# Precompiled selectors, shared by every page
+JOB_BLOCK = Selector("div.job-block")
+DATE_FIELD = Selector("div.date-field")
+JOB_TITLE = Selector("p.jobTitle")
+LOCATION_ICON = Selector("i.fa-map-marker-alt")
+JOB_TYPE_ICON = Selector("i.fa-clock")
+JOB_LINK = Selector("a[href]")
+HEADING = Selector("h2")
+
+# Only the job blocks are needed to extract the postings. They carry more
+# classes ("job-block col-md-12 c0"), so the class is matched as a token
+JOB_BLOCK_STRAIN = ("div", {"class": re.compile(r"(?:^|\s)job-block(?:\s|$)")})
+
+# Variable holding the page data on pages rendered client side
+INIT_DATA_MARKER = b"window.initData"
+
+# initData keys holding each field of a job, in order of preference
+JOB_ID_KEYS = ("id", "jobId", "job_id", "slug", "reference")
+JOB_TITLE_KEYS = ("title", "jobTitle", "job_title", "name")
+JOB_LOCATION_KEYS = ("location", "locationName", "city", "county", "address")
+JOB_TYPE_KEYS = ("jobType", "job_type", "employmentType", "contractType", "type")
+JOB_DATE_KEYS = ("date", "datePosted", "postedDate", "publishedAt", "createdAt")
+JOB_URL_KEYS = ("url", "link", "jobUrl", "applyUrl", "href")
+
+
+def _first_text(item: Dict[str, Any], keys: tuple) -> str:
+    """Returns the first non-empty value of the given keys as text."""
+    for key in keys:
+        value = item.get(key)
+        if isinstance(value, dict):
+            # e.g. {"location": {"name": "Dublin"}}
+            value = _first_text(value, ("name", "title", "label", "value"))
+        if value not in (None, "", [], {}):
+            return " ".join(str(value).split())
+    return ""
+
+
+def _iter_job_objects(data: Any) -> Iterator[Dict[str, Any]]:
+    """Yields the objects of the initData tree that describe a job.
+
+    A job is an object with a title and either an ID or a URL; the objects
+    below a job (e.g. its company) are not searched.
+    """
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            is_job = _first_text(node, JOB_TITLE_KEYS) and (
+                _first_text(node, JOB_ID_KEYS) or _first_text(node, JOB_URL_KEYS)
+            )
+            # Containers such as a company with a list of jobs are searched
+            if is_job and not isinstance(node.get("jobs"), list):
+                yield node
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
 
 
+@register_scraper("rezoomo")
 class RezoomoScraper(BaseScraper):
     """Scraper for Rezoomo websites."""
 
-    def scrape(self, url: str) -> str:
-        """Scrapes the given Rezoomo URL.
-        Use requests to download the webpage and Beautifulsoup to parse the page HTML.
+    # The date-field also abbreviates relative dates, e.g. "3d ago"
+    normalization = DEFAULT_RULES.extend(r"\b\d+\s*(?:mins?|hrs?|[mhdw])\s+ago\b")
+
+    def parse(self, content: bytes) -> List[JobRecord]:
+        """Parses a downloaded Rezoomo page.
+        Jobs embedded as window.initData JSON are decoded without building a
+        tree; otherwise the configured parse backend queries the page HTML.
         Args:
-            url: The URL to scrape.
+            content: The raw page content.
 
         Returns:
-            The scraped content.
+            The scraped job records.
         """
-        # Error handling approach:
-        # - Uses try-except block to handle request and parsing errors.
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()  # Raise an exception for bad status codes
-
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            # Extract all text content from the job listing
-            job_listing_content = []
-
-            # Extract job details from window.initData
-            script_tag = soup.find(
-                "script", string=lambda text: text and "window.initData" in text
-            )
-            if script_tag:
-                # Extract relevant job information from the script
-                # This would need parsing of the JavaScript object
-                job_info = "Job information from script"
-                job_listing_content.append(job_info)
-            else:
-                # Fallback to searching for job-block elements
-                job_blocks = soup.find_all(
-                    "div",
-                    class_="job-block",
+        # Pages rendered client side embed the jobs as JSON, no tree is needed
+        job_listing_content = self.parse_init_data(content)
+        if job_listing_content:
+            return job_listing_content
+
+        # Fallback to searching for job-block elements
+        job_listing_content = []
+        for job_block in iter_strained(content, JOB_BLOCK_STRAIN, JOB_BLOCK):
+            # Extract job details
+            date = DATE_FIELD.select_one(job_block).text()
+            title = JOB_TITLE.select_one(job_block).text()
+            location = LOCATION_ICON.select_one(job_block).parent.text()
+            job_type = JOB_TYPE_ICON.select_one(job_block).parent.text()
+            link = JOB_LINK.select_one(job_block)
+            job_url = link.attr("href") if link else ""
+
+            # Postings are identified by their link, or by their
+            # descriptive fields when the block has no link
+            job_listing_content.append(
+                JobRecord(
+                    job_id=job_url or make_job_id(title, location, job_type),
+                    title=title,
+                    location=location,
+                    job_type=job_type,
+                    date=date,
+                    url=job_url,
                 )
+            )
 
-                for job_block in job_blocks:
-                    # Extract job details
-                    date = job_block.find("div", class_="date-field").get_text(
-                        strip=True
-                    )
-                    title = job_block.find("p", class_="jobTitle").get_text(strip=True)
-                    location = job_block.find(
-                        "i", class_="fa-map-marker-alt"
-                    ).parent.get_text(strip=True)
-                    job_type = job_block.find("i", class_="fa-clock").parent.get_text(
-                        strip=True
-                    )
-
-                    # Combine job details
-                    job_info = f"{date} | {title} | {location} | {job_type}"
-                    job_listing_content.append(job_info)
+        return job_listing_content
 
-            return " ".join(job_listing_content)
+    def parse_init_data(self, content: bytes) -> Optional[List[JobRecord]]:
+        """Extracts the job postings from the window.initData script of a page.
 
-        except requests.exceptions.RequestException as e:
-            print(f"Error during request: {e}")
-            return ""
-        except Exception as e:
-            print(f"Error parsing content: {e}")
-            return ""
+        Args:
+            content: The raw page content.
 
-    def take_screenshot(self, url: str, screenshot_path: str) -> None:
-        """Takes a screenshot of the given URL.
+        Returns:
+            The job records, or None if the page has no usable initData.
+        """
+        data = extract_script_json(content, INIT_DATA_MARKER)
+        if data is None:
+            return None
+
+        records = []
+        for item in _iter_job_objects(data):
+            title = _first_text(item, JOB_TITLE_KEYS)
+            location = _first_text(item, JOB_LOCATION_KEYS)
+            job_type = _first_text(item, JOB_TYPE_KEYS)
+            job_url = _first_text(item, JOB_URL_KEYS)
+            records.append(
+                JobRecord(
+                    job_id=_first_text(item, JOB_ID_KEYS) or job_url,
+                    title=title,
+                    location=location,
+                    job_type=job_type,
+                    date=_first_text(item, JOB_DATE_KEYS),
+                    url=job_url,
+                )
+            )
+        return records or None
 
+    def screenshot_selector(self, content: bytes) -> Optional[str]:
+        """Finds the div holding the "Job listing" section of a page.
 
         Args:
-            url: The URL to take a screenshot of.
-            screenshot_path: The file path to save the screenshot to.
+            content: The raw page content.
+
+        Returns:
+            A CSS selector matching the div by all of its classes, or None to
+            capture the full page.
         """
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            # Find the h2 element by its text content
-            job_listing_h2 = soup.find("h2", string="Job listing")
-            if job_listing_h2:
-                # Get the parent div
-                parent_div = job_listing_h2.find_parent("div")
-
-                if parent_div:
-                    # Get the div selector by combining class names or other attributes
-                    div_selector = f"div.{' '.join(parent_div.get('class', []))}"
-                    take_screenshot(url, screenshot_path, div_selector)
-                else:
-                    print(
-                        f"Could not find parent div for job listing h2 element at URL: {url}"
-                    )
-                    take_screenshot(url, screenshot_path)
-            else:
-                print(
-                    f"Could not find h2 element with text 'Job listing' at URL: {url}"
-                )
-                take_screenshot(url, screenshot_path)
-        except requests.exceptions.RequestException as e:
-            print(f"Network error while accessing {url}: {str(e)}")
-        except Exception as e:
-            print(
-                f"Unexpected error while processing {url} for screenshot at {screenshot_path}: {str(e)}"
-            )
-            print(f"Error type: {type(e).__name__}")
+        root = parse_html(content)
+
+        # Find the h2 element by its text content
+        job_listing_h2 = next(
+            (h2 for h2 in HEADING.select(root) if h2.text() == "Job listing"),
+            None,
+        )
+        if not job_listing_h2:
+            print("Could not find h2 element with text 'Job listing'")
+            return None
+        # Get the parent div
+        parent_div = job_listing_h2.find_parent("div")
+        classes = (parent_div.attr("class") or "").split() if parent_div else []
+        if not classes:
+            print("Could not find a parent div with classes for the job listing h2 element")
+            return None
+        # "a b" is two classes of one element: div.a.b
+        return "div" + "".join(f".{name}" for name in classes)
 
 
 # Performance characteristics:
 # - Depends on the network speed and the complexity of the webpage.
-# - BeautifulSoup parsing can be optimized further for specific HTML structures.
+# - Selectors are precompiled; with the "strainer" backend only the job blocks
+#   are built into a tree. Pages with window.initData are not built into a
+#   tree at all.
 # Resource usage details:
 # - Memory usage depends on the size of the webpage.
 # Threading considerations:
-# - requests is thread-safe. BeautifulSoup can be used in separate threads.
+# - requests is thread-safe. Parse backends can be used in separate threads.
@@ -0,0 +1,143 @@
+# job_monitor/app/subscriptions.py
+"""Subscription command line module.
+
+Manages the Telegram chats that get alerts (see core/subscriptions.py):
+
+    python app/subscriptions.py add 123456 --keyword "staff nurse" --location dublin
+    python app/subscriptions.py add 123456 --tag ireland --job-type "full time"
+    python app/subscriptions.py import subscribers.csv
+    python app/subscriptions.py remove --chat 123456
+    python app/subscriptions.py list
+
+Repeating a filter option matches any of its values; a posting is sent when
+it matches every given filter. A subscription without filters gets every
+alert.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import argparse
+import sys
+
+from core.database import SessionLocal, create_tables, settings
+from core.site_catalog import read_sites
+from core.subscriptions import FILTER_COLUMNS, add_subscriptions, remove_subscriptions
+from data_models import Subscription, Website
+
+
+def main() -> None:
+    """Entry point of the subscription CLI."""
+    parser = argparse.ArgumentParser(description="Manage alert subscriptions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = commands.add_parser("add", help="Subscribe a chat.")
+    add_parser.add_argument("chat_id", help="The Telegram chat ID.")
+    add_parser.add_argument(
+        "--keyword", action="append", default=[], help="Phrase of the title (repeatable)."
+    )
+    add_parser.add_argument(
+        "--location", action="append", default=[], help="Phrase of the location (repeatable)."
+    )
+    add_parser.add_argument(
+        "--job-type", action="append", default=[], help="Phrase of the job type (repeatable)."
+    )
+    add_parser.add_argument(
+        "--tag", action="append", default=[], help="Websites with this tag (repeatable)."
+    )
+    add_parser.add_argument(
+        "--site", action="append", default=[], help="Website URL (repeatable)."
+    )
+
+    import_parser = commands.add_parser(
+        "import", help="Import subscriptions from CSV or JSONL."
+    )
+    import_parser.add_argument("source", help='File path, or "-" for standard input.')
+    import_parser.add_argument(
+        "--format", choices=("csv", "jsonl"), help="Detected from the file name if omitted."
+    )
+    import_parser.add_argument(
+        "--batch-size", type=int, help="Subscriptions per batch (default DB_BATCH_SIZE)."
+    )
+
+    remove_parser = commands.add_parser("remove", help="Delete subscriptions.")
+    remove_parser.add_argument("ids", nargs="*", type=int, help="Subscription IDs.")
+    remove_parser.add_argument(
+        "--chat", action="append", default=[], help="Every subscription of a chat (repeatable)."
+    )
+
+    list_parser = commands.add_parser("list", help="List subscriptions.")
+    list_parser.add_argument("--chat", help="Only the subscriptions of this chat.")
+
+    args = parser.parse_args()
+    create_tables()
+
+    if args.command == "add":
+        website_ids = []
+        if args.site:
+            db = SessionLocal()
+            try:
+                found = dict(
+                    db.query(Website.url, Website.id).filter(Website.url.in_(args.site))
+                )
+            finally:
+                db.close()
+            missing = [url for url in args.site if url not in found]
+            if missing:
+                sys.exit(f"Unknown websites: {', '.join(missing)}")
+            website_ids = [str(found[url]) for url in args.site]
+        entry = {
+            "chat_id": args.chat_id,
+            "keywords": args.keyword,
+            "locations": args.location,
+            "job_types": args.job_type,
+            "tags": args.tag,
+            "website_ids": website_ids,
+        }
+        print(add_subscriptions([entry], 1).message())
+    elif args.command == "import":
+        if args.format is None and not args.source.lower().endswith(
+            (".csv", ".csv.gz", ".jsonl", ".jsonl.gz", ".ndjson", ".json")
+        ):
+            sys.exit("Pass --format csv or --format jsonl")
+        report = add_subscriptions(
+            read_sites(args.source, args.format), args.batch_size or settings.DB_BATCH_SIZE
+        )
+        print(report.message())
+    elif args.command == "remove":
+        if not args.ids and not args.chat:
+            sys.exit("Pass subscription IDs or --chat")
+        print(f"Deleted {remove_subscriptions(args.ids, args.chat)} subscriptions")
+    else:
+        db = SessionLocal()
+        try:
+            query = db.query(Subscription).order_by(Subscription.id)
+            if args.chat:
+                query = query.filter(Subscription.chat_id == args.chat)
+            for subscription in query.yield_per(settings.DB_BATCH_SIZE):
+                filters = "; ".join(
+                    f"{name}={getattr(subscription, name)}"
+                    for name in FILTER_COLUMNS
+                    if getattr(subscription, name)
+                )
+                state = "enabled" if subscription.enabled is not False else "disabled"
+                print(f"{subscription.id}\t{subscription.chat_id}\t{state}\t{filters or '*'}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
+
+# Performance characteristics:
+# - Imports insert DB_BATCH_SIZE subscriptions per statement and commit.
+# Resource usage details:
+# - Imports and listings stream; memory holds one batch of subscriptions.
+# Threading considerations:
+# - Single-threaded command line tool.
+# Error handling approach:
+# - Invalid arguments exit with a message; invalid entries are reported and
+#   skipped by the import.
@@ -0,0 +1,137 @@
+# job_monitor/app/workers.py
+"""Multi-process monitoring module.
+
+Parsing and image handling hold the GIL, so a single process is limited to
+one core however concurrent its I/O is. This module runs the monitor in
+several worker processes, each processing its own shard of the websites:
+
+- `run_sharded_once`: one monitoring run, the websites split by consistent
+  hash between the workers; the parent sends the combined summary.
+- `run_sharded_daemon`: one scheduler daemon per worker, coordinated through
+  the database (see core/sharding.py), so more workers can also be started
+  in other containers.
+
+Workers are started with the "spawn" method: they do not inherit the
+threads, sockets and database connections of the parent.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import signal
+import threading
+from typing import List, Optional
+
+from core.config import Settings
+from core.database import SessionLocal
+from core.sharding import HashRing, ShardCoordinator, default_worker_id
+from data_models import Website
+
+
+def _worker_ids(count: int) -> List[str]:
+    """Returns the IDs of the local workers."""
+    base = default_worker_id()
+    return [f"{base}-{index}" for index in range(count)]
+
+
+def _monitor_shard(website_ids: List[int]):
+    """Worker entry point of a one-off run."""
+    from main import run_monitoring
+
+    return run_monitoring(website_ids, send_summary=False)
+
+
+def run_sharded_once(workers: int, settings: Optional[Settings] = None):
+    """Runs one monitoring pass over all websites in several processes.
+
+    Args:
+        workers: The number of worker processes.
+        settings: The application settings. Loaded from the environment if None.
+
+    Returns:
+        The combined RunSummary of all shards.
+    """
+    from main import RunSummary
+    from notifiers.telegram_notifier import get_notifier
+
+    settings = settings or Settings()
+    db = SessionLocal()
+    try:
+        website_ids = [
+            website_id
+            for (website_id,) in db.query(Website.id).filter(Website.enabled.is_(True))
+        ]
+    finally:
+        db.close()
+
+    worker_ids = _worker_ids(workers)
+    ring = HashRing(worker_ids, settings.HASH_RING_VNODES)
+    shards = [ring.shard(website_ids, worker_id) for worker_id in worker_ids]
+
+    summary = RunSummary()
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=workers) as pool:
+        for shard_summary in pool.imap_unordered(_monitor_shard, shards):
+            summary.merge(shard_summary)
+
+    notifier = get_notifier()
+    notifier.send_message(summary.message())
+    notifier.flush()
+    return summary
+
+
+def _run_scheduler(worker_id: str) -> None:
+    """Worker entry point of the daemon mode."""
+    from scheduler import Scheduler
+
+    settings = Settings()
+    Scheduler(settings, ShardCoordinator(worker_id, settings)).run_forever()
+
+
+def run_sharded_daemon(workers: int) -> None:
+    """Runs one scheduler daemon per worker process until SIGTERM.
+
+    Args:
+        workers: The number of worker processes.
+    """
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_run_scheduler, args=(worker_id,), name=worker_id)
+        for worker_id in _worker_ids(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def stop(*_) -> None:
+        for process in processes:
+            if process.is_alive():
+                # Each scheduler leaves the ring and releases its leases
+                process.terminate()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, stop)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        stop()
+        for process in processes:
+            process.join()
+
+
+# Performance characteristics:
+# - Parsing scales with the number of cores; each worker keeps its own HTTP
+#   session, browser pool and Telegram queue.
+# Resource usage details:
+# - Every worker is a full interpreter with its own connection pool and
+#   browser, so memory grows linearly with the number of workers.
+# Threading considerations:
+# - Workers share nothing but the database.
+# Error handling approach:
+# - Websites are handled per shard as in a single process run; a crashed
+#   daemon worker's leases expire and its websites move to the other workers
+#   once its heartbeat times out.
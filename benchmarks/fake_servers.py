@@ -0,0 +1,181 @@
+# job_monitor/benchmarks/fake_servers.py
+"""Local stand-ins for the job sites and the Telegram Bot API.
+
+- `FixtureServer` serves the recorded pages of `fixtures/`: any path ending
+  in a fixture file name returns that page, so every monitored website can
+  have its own URL. Responses carry an ETag and honour If-None-Match, like
+  the real sites behind a CDN. `set_version(1)` (or GET /_version/1)
+  re-advertises the first job of every page, to benchmark runs with changes.
+- `FakeBotApi` answers the Bot API methods used by TelegramNotifier and
+  counts the calls. Point the notifier at it with TELEGRAM_API_URL.
+
+Both run in daemon threads of the benchmark process.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Title of the first job of every fixture, changed by version 1
+FIRST_JOB_TITLE = b"Clinical Midwife Manager 2"
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    """Request handler without access logging."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real servers
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str]) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server:
+    """Runs a ThreadingHTTPServer on a free local port."""
+
+    def __init__(self, handler: type) -> None:
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_port
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FixtureServer(_Server):
+    """Serves the recorded job pages."""
+
+    def __init__(self) -> None:
+        self.pages: Dict[str, list] = {}
+        for name in sorted(os.listdir(FIXTURES_DIR)):
+            with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+                content = f.read()
+            changed = content.replace(
+                FIRST_JOB_TITLE, FIRST_JOB_TITLE + b" (re-advertised)", 1
+            )
+            self.pages[name] = [
+                (content, f'"{hashlib.md5(content).hexdigest()}"'),
+                (changed, f'"{hashlib.md5(changed).hexdigest()}"'),
+            ]
+        self.version = 0
+        server = self
+
+        class Handler(_QuietHandler):
+            def do_GET(self) -> None:
+                if self.path.startswith("/_version/"):
+                    # Control endpoint, see set_version
+                    server.set_version(int(self.path.rsplit("/", 1)[-1]))
+                    self._send(204, b"", {})
+                    return
+                name = self.path.split("?")[0].rsplit("/", 1)[-1]
+                if name not in server.pages:
+                    self._send(404, b"Not found", {"Content-Type": "text/plain"})
+                    return
+                content, etag = server.pages[name][server.version]
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, b"", {"ETag": etag})
+                    return
+                self._send(
+                    200,
+                    content,
+                    {"Content-Type": "text/html; charset=utf-8", "ETag": etag},
+                )
+
+        super().__init__(Handler)
+        self.base_url = f"http://127.0.0.1:{self.port}"
+
+    def set_version(self, version: int) -> None:
+        """Serves the original (0) or the changed (1) pages."""
+        self.version = version
+
+
+def _document(file_number: int) -> dict:
+    """Returns the Document of an uploaded file."""
+    return {"file_id": f"F{file_number}", "file_unique_id": f"U{file_number}"}
+
+
+class FakeBotApi(_Server):
+    """Answers the Telegram Bot API methods used by TelegramNotifier."""
+
+    def __init__(self) -> None:
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(_QuietHandler):
+            def do_GET(self) -> None:
+                # Call counts, for the benchmark runner
+                if self.path == "/stats":
+                    with server._lock:
+                        body = json.dumps(dict(server.calls)).encode()
+                    self._send(200, body, {"Content-Type": "application/json"})
+                else:
+                    self.do_POST()
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                method = self.path.rsplit("/", 1)[-1]
+                with server._lock:
+                    server.calls[method] += 1
+                    message_id = sum(server.calls.values())
+
+                message = {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": 1, "type": "private"},
+                }
+                if method == "getMe":
+                    result = {"id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+                elif method == "sendMediaGroup":
+                    result = [
+                        dict(
+                            message,
+                            message_id=message_id * 100 + i,
+                            document=_document(message_id * 100 + i),
+                        )
+                        for i in range(max(1, body.count(b'"type": "document"')))
+                    ]
+                elif method in ("sendDocument", "sendPhoto"):
+                    result = dict(message, document=_document(message_id))
+                else:
+                    result = message
+                payload = json.dumps({"ok": True, "result": result}).encode()
+                self._send(200, payload, {"Content-Type": "application/json"})
+
+        super().__init__(Handler)
+        self.api_url = f"http://127.0.0.1:{self.port}/bot"
+        self.stats_url = f"http://127.0.0.1:{self.port}/stats"
+
+
+# Performance characteristics:
+# - Pages are held in memory and served without disk access, so the numbers
+#   measure the monitor, not the fixture server.
+# Resource usage details:
+# - Two copies of every fixture are kept in memory.
+# Threading considerations:
+# - One thread per connection; the call counter is protected by a lock.
+# Error handling approach:
+# - Unknown paths answer 404, which the monitor reports as a failed website.
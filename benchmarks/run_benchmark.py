@@ -0,0 +1,280 @@
+# job_monitor/benchmarks/run_benchmark.py
+"""Offline benchmark of a monitoring run.
+
+Replays the recorded pages of `fixtures/` from a local HTTP server, sends the
+notifications to a local fake Bot API and measures `run_monitoring` for a
+number of websites. No network access is needed.
+
+Every size runs in a fresh process with its own SQLite database, through
+three phases:
+- cold: first run, every website is new and alerts are sent;
+- unchanged: the servers answer 304 Not Modified;
+- changed: the first job of every page is re-advertised.
+
+For each phase the results hold the throughput, the p50/p99 per-website
+latency, the time spent per stage, the Bot API calls and the peak RSS of the
+process. They are written as JSON to `benchmarks/results/`, so runs of two
+commits can be compared:
+
+    python benchmarks/run_benchmark.py --sites 10 100 1000
+    python benchmarks/run_benchmark.py --mode async --compare benchmarks/results/<base>.json
+
+Screenshots are disabled (SCREENSHOT_MODE=none) and the Telegram rate
+limits are lifted, so the numbers measure the monitor itself; any other
+setting (MONITOR_MODE, PARSER_BACKEND, ...) is taken from the environment.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), "app")
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+
+# Recorded page and scraper type of the monitored websites, used in turn
+SITE_FIXTURES = [
+    ("rezoomo.html", "rezoomo"),
+    ("rezoomo_initdata.html", "rezoomo"),
+    ("occupop.html", "occupop"),
+]
+
+# Phases of a run: name and fixture version served
+PHASES = [("cold", 0), ("unchanged", 0), ("changed", 1)]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Returns the nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of this process in MB."""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _read_spans(path: str, offset: int) -> List[dict]:
+    """Reads the spans logged after the given file offset."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        f.seek(offset)
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_child(sites: int, fixture_url: str, stats_url: str) -> List[dict]:
+    """Benchmarks one size; runs in its own process, see `main`."""
+    sys.path.insert(0, APP_DIR)
+    from core.config import Settings
+    from core.database import SessionLocal, upsert_websites
+    from main import run_monitoring
+    from run import create_tables
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        upsert_websites(
+            db,
+            [
+                {
+                    "url": f"{fixture_url}/sites/{index}/{fixture}",
+                    "scraper_type": scraper_type,
+                }
+                for index in range(sites)
+                for fixture, scraper_type in [SITE_FIXTURES[index % len(SITE_FIXTURES)]]
+            ],
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    spans_file = Settings().METRICS_SPANS_FILE
+    results = []
+    for phase, version in PHASES:
+        urllib.request.urlopen(f"{fixture_url}/_version/{version}").read()
+        calls_before = json.load(urllib.request.urlopen(stats_url))
+        offset = os.path.getsize(spans_file) if os.path.exists(spans_file) else 0
+
+        start = time.perf_counter()
+        summary = run_monitoring()
+        seconds = time.perf_counter() - start
+
+        spans = _read_spans(spans_file, offset)
+        latencies = [span["seconds"] for span in spans if span["stage"] == "site"]
+        stage_seconds: Dict[str, float] = defaultdict(float)
+        for span in spans:
+            if span["stage"] not in ("site", "cycle"):
+                stage_seconds[span["stage"]] += span["seconds"]
+        calls_after = json.load(urllib.request.urlopen(stats_url))
+
+        results.append(
+            {
+                "sites": sites,
+                "phase": phase,
+                "seconds": round(seconds, 4),
+                "sites_per_second": round(sites / seconds, 2) if seconds else None,
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+                "changed": summary.changed,
+                "unchanged": summary.unchanged,
+                "failed": summary.failed,
+                "telegram_calls": sum(calls_after.values()) - sum(calls_before.values()),
+                "stage_seconds": {
+                    stage: round(total, 4) for stage, total in sorted(stage_seconds.items())
+                },
+            }
+        )
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    """Returns the current commit of the repository, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base: dict, current: dict) -> None:
+    """Prints the change of every metric relative to a previous result file."""
+    key = lambda run: (run["mode"], run["sites"], run["phase"])
+    base_runs = {key(run): run for run in base["runs"]}
+    print(f"Compared with {base.get('commit')} ({base.get('created_at')}):")
+    for run in current["runs"]:
+        previous = base_runs.get(key(run))
+        if previous is None:
+            continue
+        changes = []
+        for metric in ("sites_per_second", "p50_ms", "p99_ms", "peak_rss_mb"):
+            old, new = previous.get(metric), run.get(metric)
+            if old:
+                changes.append(f"{metric} {old} -> {new} ({(new - old) / old:+.0%})")
+        print(f"  {run['mode']:>10} {run['sites']:>5} {run['phase']:>9}: " + ", ".join(changes))
+
+
+def main() -> None:
+    """Runs the benchmark and writes the results."""
+    parser = argparse.ArgumentParser(description="Offline monitoring benchmark.")
+    parser.add_argument("--sites", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument(
+        "--mode", nargs="+", default=[os.getenv("MONITOR_MODE", "sequential")],
+        help="MONITOR_MODE values to benchmark.",
+    )
+    parser.add_argument("--output", help="Result file. Defaults to benchmarks/results/.")
+    parser.add_argument("--compare", help="Previous result file to compare with.")
+    # Internal: benchmark a single size in this process
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--fixture-url", help=argparse.SUPPRESS)
+    parser.add_argument("--stats-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        results = run_child(args.sites[0], args.fixture_url, args.stats_url)
+        print(json.dumps(results))
+        return
+
+    sys.path.insert(0, BENCHMARKS_DIR)
+    from fake_servers import FakeBotApi, FixtureServer
+
+    fixtures = FixtureServer()
+    bot_api = FakeBotApi()
+    runs = []
+    for mode in args.mode:
+        for sites in args.sites:
+            with tempfile.TemporaryDirectory() as workdir:
+                env = dict(
+                    os.environ,
+                    MONITOR_MODE=mode,
+                    DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+                    TELEGRAM_BOT_TOKEN="123456:benchmark",
+                    TELEGRAM_CHAT_ID="1",
+                    TELEGRAM_API_URL=bot_api.api_url,
+                    TELEGRAM_GLOBAL_RATE="100000",
+                    TELEGRAM_CHAT_RATE="100000",
+                    SCREENSHOT_MODE="none",
+                    METRICS_SPANS_FILE=os.path.join(workdir, "spans.jsonl"),
+                    METRICS_TEXTFILE="",
+                    METRICS_PORT="0",
+                )
+                completed = subprocess.run(
+                    [
+                        sys.executable,
+                        os.path.abspath(__file__),
+                        "--child",
+                        "--sites", str(sites),
+                        "--fixture-url", fixtures.base_url,
+                        "--stats-url", bot_api.stats_url,
+                    ],
+                    cwd=workdir,
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                )
+            if completed.returncode != 0:
+                print(completed.stdout[-2000:], completed.stderr[-2000:])
+                raise SystemExit(f"Benchmark of {sites} sites ({mode}) failed")
+            for run in json.loads(completed.stdout.strip().splitlines()[-1]):
+                run["mode"] = mode
+                runs.append(run)
+                print(
+                    f"{mode:>10} {run['sites']:>5} sites {run['phase']:>9}: "
+                    f"{run['sites_per_second']:>8} sites/s  p50 {run['p50_ms']:>8} ms  "
+                    f"p99 {run['p99_ms']:>8} ms  peak RSS {run['peak_rss_mb']} MB"
+                )
+
+    commit = _git_commit()
+    created_at = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    result = {
+        "commit": commit,
+        "created_at": created_at,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parser_backend": os.getenv("PARSER_BACKEND", "bs4"),
+        "runs": runs,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{created_at}-{commit or 'unknown'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
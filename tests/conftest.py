@@ -0,0 +1,39 @@
+# job_monitor/tests/conftest.py
+"""Test configuration module.
+
+Puts the application package on the import path and provides the settings
+the modules need at import time, with a throwaway SQLite database.
+"""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT_DIR, "benchmarks", "fixtures")
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "app"))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123:test")
+os.environ.setdefault("TELEGRAM_CHAT_ID", "1")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+)
+
+
+@pytest.fixture
+def read_fixture():
+    """Returns a function reading a page of benchmarks/fixtures."""
+
+    def read(name: str) -> bytes:
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as stream:
+            return stream.read()
+
+    return read
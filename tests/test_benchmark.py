@@ -0,0 +1,45 @@
+# job_monitor/tests/test_benchmark.py
+"""Offline benchmark smoke test."""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARK = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "run_benchmark.py"
+)
+SITES = 3
+
+
+def test_benchmark_runs_against_fake_servers(tmp_path):
+    output = tmp_path / "results.json"
+    completed = subprocess.run(
+        [
+            sys.executable,
+            BENCHMARK,
+            "--sites", str(SITES),
+            "--mode", "sequential", "async",
+            "--output", str(output),
+        ],
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert completed.returncode == 0, completed.stdout + completed.stderr
+
+    runs = {(run["mode"], run["phase"]): run for run in json.loads(output.read_text())["runs"]}
+    assert len(runs) == 6
+    for mode in ("sequential", "async"):
+        cold, unchanged, changed = (runs[mode, phase] for phase in ("cold", "unchanged", "changed"))
+        assert (cold["changed"], cold["failed"]) == (SITES, 0)
+        assert (unchanged["unchanged"], unchanged["failed"]) == (SITES, 0)
+        assert (changed["changed"], changed["failed"]) == (SITES, 0)
+        assert cold["telegram_calls"] and changed["telegram_calls"]
+        assert all(run["p99_ms"] >= run["p50_ms"] > 0 for run in (cold, unchanged, changed))
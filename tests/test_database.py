@@ -0,0 +1,49 @@
+# job_monitor/tests/test_database.py
+"""Database batch update tests."""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from core import database
+from core.database import SessionLocal, UpdateBatch, create_tables
+from data_models import Run, RunSite
+
+
+@pytest.fixture
+def run_id():
+    create_tables()
+    db = SessionLocal()
+    try:
+        run = Run(scope="test")
+        db.add(run)
+        db.commit()
+        return run.id
+    finally:
+        db.close()
+
+
+def test_failed_flush_raises_and_keeps_the_updates(monkeypatch, run_id):
+    def fail(*args):
+        raise RuntimeError("database is locked")
+
+    batch = UpdateBatch(max_size=2, run_id=run_id)
+    monkeypatch.setattr(database, "_insert_run_sites", fail)
+    batch.mark_done(1, "changed")
+    # The automatic flush of a full batch fails quietly and keeps the updates
+    batch.mark_done(2, "unchanged")
+    with pytest.raises(RuntimeError):
+        batch.flush()
+
+    monkeypatch.undo()
+    batch.flush()
+    db = SessionLocal()
+    try:
+        rows = db.query(RunSite.website_id, RunSite.outcome).filter(RunSite.run_id == run_id)
+        assert sorted(rows) == [(1, "changed"), (2, "unchanged")]
+    finally:
+        db.close()
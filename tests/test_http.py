@@ -0,0 +1,123 @@
+# job_monitor/tests/test_http.py
+"""HTTP client and circuit breaker tests."""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+import pytest
+import requests
+
+from core.database import SessionLocal, create_tables
+from core.host_health import CLOSED, HALF_OPEN, OPEN, CircuitOpenError, HostHealthTracker
+from core.http import HttpClient
+from core.utils import utcnow
+from data_models import HostHealth
+
+
+def _half_open(health, host):
+    health.record_failure(host)
+    health._hosts[host].retry_at = utcnow() - timedelta(seconds=1)
+
+
+def _open_seconds(state):
+    return (state.retry_at - utcnow()).total_seconds()
+
+
+def test_circuit_opens_at_the_failure_threshold():
+    health = HostHealthTracker(failure_threshold=3, open_seconds=60)
+    for _ in range(2):
+        health.record_failure("example.com")
+        health.check("example.com")
+    # A success resets the count of consecutive failures
+    health.record_success("example.com", 0.1)
+    for _ in range(2):
+        health.record_failure("example.com")
+    assert health._hosts["example.com"].state == CLOSED
+
+    health.record_failure("example.com")
+    state = health._hosts["example.com"]
+    assert state.state == OPEN
+    assert 60 * 0.8 - 1 <= _open_seconds(state) <= 60 * 1.2
+    with pytest.raises(CircuitOpenError):
+        health.check("example.com")
+    # Other hosts are not affected
+    health.check("other.example.com")
+
+
+def test_half_open_circuit_lets_one_probe_through():
+    health = HostHealthTracker(failure_threshold=1)
+    _half_open(health, "example.com")
+    health.check("example.com")
+    assert health._hosts["example.com"].state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        health.check("example.com")
+
+    health.record_success("example.com", 0.1)
+    state = health._hosts["example.com"]
+    assert (state.state, state.failures, state.probing) == (CLOSED, 0, False)
+    health.check("example.com")
+
+
+def test_failed_probe_reopens_the_circuit_for_longer():
+    health = HostHealthTracker(failure_threshold=1, open_seconds=60, max_open_seconds=150)
+    _half_open(health, "example.com")
+    health.check("example.com")
+    health.record_failure("example.com")
+    state = health._hosts["example.com"]
+    assert (state.state, state.opens) == (OPEN, 2)
+    assert 120 * 0.8 - 1 <= _open_seconds(state) <= 120 * 1.2
+
+    state.retry_at = utcnow() - timedelta(seconds=1)
+    health.check("example.com")
+    health.record_failure("example.com")
+    # Capped at max_open_seconds instead of doubling again
+    assert 150 * 0.8 - 1 <= _open_seconds(health._hosts["example.com"]) <= 150 * 1.2
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        requests.exceptions.TooManyRedirects("Exceeded 30 redirects"),
+        requests.exceptions.ContentDecodingError("Received response with an invalid gzip body"),
+        ValueError("Unexpected error"),
+    ],
+)
+def test_unexpected_probe_errors_count_as_failures(monkeypatch, error):
+    health = HostHealthTracker(failure_threshold=1)
+    client = HttpClient(retries=0, health=health)
+    _half_open(health, "example.com")
+
+    def get(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(client.session, "get", get)
+    with pytest.raises(type(error)):
+        client.get("http://example.com/jobs")
+
+    # The probe failed and reopened the circuit instead of staying in flight
+    state = health._hosts["example.com"]
+    assert state.state == OPEN and not state.probing
+    state.retry_at = utcnow() - timedelta(seconds=1)
+    health.check("example.com")
+    assert state.state == HALF_OPEN and state.probing
+
+
+def test_stored_open_circuit_without_retry_time_is_probed():
+    create_tables()
+    db = SessionLocal()
+    try:
+        db.merge(HostHealth(host="stored.example.com", state=OPEN, failures=3, retry_at=None))
+        db.commit()
+    finally:
+        db.close()
+    health = HostHealthTracker()
+    health.load()
+    health.check("stored.example.com")
+    assert health._hosts["stored.example.com"].state == HALF_OPEN
+    with pytest.raises(CircuitOpenError, match="Circuit open for stored.example.com after"):
+        health.check("stored.example.com")
@@ -0,0 +1,96 @@
+# job_monitor/tests/test_jobs.py
+"""Job record diffing tests."""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import uuid
+
+import pytest
+
+from core.database import SessionLocal, create_tables
+from core.jobs import (
+    JobRecord,
+    apply_job_diff,
+    compute_job_diff,
+    content_hash,
+    unique_job_ids,
+)
+from core.normalize import normalize_record
+from data_models import Website
+
+
+@pytest.fixture
+def db():
+    create_tables()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def website_id(db):
+    website = Website(url=f"https://example.com/{uuid.uuid4().hex}", scraper_type="rezoomo")
+    db.add(website)
+    db.commit()
+    return website.id
+
+
+def test_content_hash_ignores_order_and_volatile_noise():
+    records = [
+        JobRecord(job_id="1", title="Porter"),
+        JobRecord(job_id="2", title="Staff Nurse"),
+    ]
+    noisy = [
+        normalize_record(JobRecord(job_id="2", title="Staff Nurse (5 applicants)")),
+        normalize_record(JobRecord(job_id="1", title="Porter")),
+    ]
+    assert content_hash(records) == content_hash(noisy)
+    assert content_hash(records) != content_hash(records[:1])
+
+
+def test_unique_job_ids_do_not_depend_on_page_order():
+    records = [
+        JobRecord(job_id="nurse", title="Staff Nurse", location="Dublin"),
+        JobRecord(job_id="nurse", title="Staff Nurse", location="Cork"),
+        JobRecord(job_id="porter", title="Porter"),
+    ]
+    forward = {record.location: record.job_id for record in unique_job_ids(records)}
+    backward = {record.location: record.job_id for record in unique_job_ids(records[::-1])}
+    assert forward == backward
+    assert sorted(forward.values()) == ["nurse", "nurse#2", "porter"]
+
+
+def test_job_diff_against_stored_postings(db, website_id):
+    first = [
+        JobRecord(job_id="1", title="Porter"),
+        JobRecord(job_id="2", title="Staff Nurse", location="Dublin"),
+        JobRecord(job_id="3", title="Chef"),
+    ]
+    diff = compute_job_diff(db, website_id, first)
+    assert diff.added == first and not (diff.removed or diff.modified)
+    apply_job_diff(db, website_id, diff)
+    db.commit()
+
+    assert not compute_job_diff(db, website_id, first).has_changes
+
+    second = [
+        JobRecord(job_id="1", title="Porter"),
+        JobRecord(job_id="2", title="Staff Nurse", location="Cork"),
+        JobRecord(job_id="4", title="Radiographer"),
+    ]
+    diff = compute_job_diff(db, website_id, second)
+    assert [record.job_id for record in diff.added] == ["4"]
+    assert [record.job_id for record in diff.modified] == ["2"]
+    assert diff.removed == [JobRecord(job_id="3", title="Chef")]
+    assert "+ Radiographer" in diff.describe()
+    assert "~ Staff Nurse | Cork" in diff.describe()
+    apply_job_diff(db, website_id, diff)
+    db.commit()
+
+    assert not compute_job_diff(db, website_id, second).has_changes
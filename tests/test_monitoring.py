@@ -0,0 +1,62 @@
+# job_monitor/tests/test_monitoring.py
+"""Per-website decision tests, shared by the sequential and async modes."""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+from core.http import FetchResult
+from main import FAILED, UNCHANGED, SiteCheck, check_content
+
+
+class _Updates:
+    """Collects the queued website updates."""
+
+    def __init__(self):
+        self.added = []
+
+    def add(self, website_update):
+        self.added.append(website_update)
+
+
+class _Ledger:
+    """Reports the given notification keys as sent."""
+
+    def __init__(self, *sent):
+        self.sent = set(sent)
+
+    def was_sent(self, key):
+        return key in self.sent
+
+
+def _check(**fields):
+    fields.setdefault("fetched", FetchResult("https://example.com/jobs", 304))
+    return SiteCheck(1, "https://example.com/jobs", "generic", "abc", **fields)
+
+
+def test_unchanged_site_is_done_when_change_driven():
+    updates = _Updates()
+    assert check_content(_check(), None, updates, "1") == UNCHANGED
+    assert updates.added == []
+
+
+def test_unchanged_site_is_notified_once_per_run():
+    assert check_content(_check(), None, _Updates(), "1", change_driven=False) is None
+    # Already sent before the run was interrupted: no screenshot is taken again
+    ledger = _Ledger("unchanged:1")
+    assert check_content(_check(), None, _Updates(), "1", False, ledger) == UNCHANGED
+
+
+def test_new_validators_are_stored():
+    updates = _Updates()
+    fetched = FetchResult("https://example.com/jobs", 304, etag='"v2"')
+    check_content(_check(fetched=fetched), None, updates, "1")
+    [website_update] = updates.added
+    assert (website_update.content_hash, website_update.etag) == ("abc", '"v2"')
+
+
+def test_empty_page_fails():
+    fetched = FetchResult("https://example.com/jobs", 200, b"<html></html>")
+    assert check_content(_check(fetched=fetched), [], _Updates(), "1") == FAILED
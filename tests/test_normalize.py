@@ -0,0 +1,56 @@
+# job_monitor/tests/test_normalize.py
+"""Job record normalization tests."""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from core.jobs import JobRecord
+from core.normalize import DEFAULT_RULES, normalize_record, normalize_text, normalize_url
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Staff Nurse (14 applicants)", "Staff Nurse"),
+        ("Staff Nurse - Posted 2 days ago", "Staff Nurse"),
+        ("Closes in 3 days: Porter", "Porter"),
+        ("  Clinical Nurse \n Manager  ", "Clinical Nurse Manager"),
+        ("Ｃhef Grade II", "Chef Grade II"),
+        ("", ""),
+    ],
+)
+def test_normalize_text_removes_volatile_tokens(text, expected):
+    assert normalize_text(text) == expected
+
+
+def test_normalize_url_removes_tracking_parameters():
+    url = "https://example.com/job/1?id=7&utm_source=mail&fbclid=abc#apply"
+    assert normalize_url(url) == "https://example.com/job/1?id=7"
+    assert normalize_url(" https://example.com/job/1 ") == "https://example.com/job/1"
+
+
+def test_normalize_url_matches_tracking_names_exactly():
+    url = "https://example.com/jobs?side=left&sidx=2&sid=abc&_gaq=1&_ga=2&id=1"
+    assert normalize_url(url) == "https://example.com/jobs?side=left&sidx=2&_gaq=1&id=1"
+
+
+def test_normalize_url_keeps_route_fragments():
+    assert normalize_url("https://x.com/app#/job/123") == "https://x.com/app#/job/123"
+    assert normalize_url("https://x.com/app?utm_id=1#!/job/456") == "https://x.com/app#!/job/456"
+    assert normalize_url("https://x.com/job/1#apply") == "https://x.com/job/1"
+
+
+def test_normalize_record_keeps_link_ids_in_step():
+    url = "https://example.com/job/1?utm_campaign=x"
+    record = JobRecord(job_id=url, title="Porter (3 views)", date="Today", url=url)
+    normalized = normalize_record(record, DEFAULT_RULES.extend(volatile_fields=("date",)))
+    assert normalized == JobRecord(
+        job_id="https://example.com/job/1",
+        title="Porter",
+        url="https://example.com/job/1",
+    )
@@ -0,0 +1,135 @@
+# job_monitor/tests/test_notifiers.py
+"""Telegram notifier tests."""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import telegram
+
+from core.jobs import JobDiff
+from core.subscriptions import send_alerts
+from notifiers import telegram_notifier
+from notifiers.telegram_notifier import MAX_MESSAGE_LENGTH, TelegramNotifier, TokenBucket
+
+
+@pytest.fixture
+def notifier(monkeypatch):
+    async def no_sleep(_):
+        pass
+
+    monkeypatch.setattr(telegram_notifier.asyncio, "sleep", no_sleep)
+    notifier = TelegramNotifier("123:test", "1", chat_rate=1000, max_attempts=3)
+    # Calls are driven directly instead of through the delivery loop thread
+    notifier._global_bucket = telegram_notifier.TokenBucket(1000, 1000)
+    yield notifier
+    notifier.close()
+
+
+def _failing(error, calls):
+    async def method(**kwargs):
+        calls.append(kwargs)
+        raise error
+
+    return method
+
+
+@pytest.mark.parametrize(
+    "error", [telegram.error.BadRequest("Chat not found"), telegram.error.Forbidden("Blocked")]
+)
+def test_rejected_requests_are_not_retried(notifier, error):
+    calls = []
+    with pytest.raises(type(error)):
+        asyncio.run(notifier._call("1", 1, _failing(error, calls), text="hi"))
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize(
+    "error", [telegram.error.TimedOut(), telegram.error.NetworkError("Connection reset")]
+)
+def test_network_errors_are_retried(notifier, error):
+    calls = []
+    with pytest.raises(type(error)):
+        asyncio.run(notifier._call("1", 1, _failing(error, calls), text="hi"))
+    assert len(calls) == notifier.max_attempts
+
+
+class FakeBot:
+    """Records the documents sent, answering uploads with a new file ID."""
+
+    def __init__(self):
+        self.documents = []
+
+    async def shutdown(self):
+        pass
+
+    async def send_message(self, chat_id, text, **kwargs):
+        return SimpleNamespace(document=None)
+
+    async def send_document(self, chat_id, document, **kwargs):
+        self.documents.append((chat_id, document))
+        # Give the other deliveries a chance to run during the upload
+        await asyncio.sleep(0)
+        file_id = document if isinstance(document, str) else f"F{len(self.documents)}"
+        return SimpleNamespace(document=SimpleNamespace(file_id=file_id))
+
+
+def test_fan_out_uploads_a_file_once(tmp_path):
+    screenshot = tmp_path / "screenshot.webp"
+    screenshot.write_bytes(b"RIFF")
+    notifier = TelegramNotifier("123:test", "1", coalesce_seconds=0, chat_rate=1000)
+    notifier.bot = FakeBot()
+    recipients = {chat_id: JobDiff() for chat_id in ("1", "2", "3")}
+    try:
+        delivered = send_alerts(notifier, recipients, lambda diff: "Change", [str(screenshot)])
+        assert delivered.result(timeout=10)
+    finally:
+        notifier.close()
+
+    uploads = [chat for chat, document in notifier.bot.documents if isinstance(document, bytes)]
+    assert len(uploads) == 1
+    assert sorted(chat for chat, _ in notifier.bot.documents) == ["1", "2", "3"]
+
+
+def test_token_bucket_allows_bursts_then_paces(monkeypatch):
+    clock = {"now": 0.0}
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += seconds
+
+    monkeypatch.setattr(telegram_notifier.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(telegram_notifier.asyncio, "sleep", sleep)
+
+    async def acquire_all():
+        bucket = TokenBucket(rate=2, capacity=3)
+        for _ in range(5):
+            await bucket.acquire()
+        # More tokens than the capacity wait for a full bucket only
+        await bucket.acquire(10)
+
+    asyncio.run(acquire_all())
+    # The burst is free, then one token every 1/rate seconds
+    assert sleeps[:2] == [pytest.approx(0.5), pytest.approx(0.5)]
+    assert clock["now"] == pytest.approx(2.5)
+
+
+def test_merge_texts_joins_up_to_the_message_limit():
+    assert TelegramNotifier._merge_texts(["a", "b"]) == ["a\n\nb"]
+    long = "x" * (MAX_MESSAGE_LENGTH - 1)
+    assert TelegramNotifier._merge_texts([long, "b"]) == [long, "b"]
+
+
+def test_merge_texts_splits_long_texts():
+    text = "y" * (2 * MAX_MESSAGE_LENGTH + 10)
+    merged = TelegramNotifier._merge_texts(["a", text])
+    assert all(len(message) <= MAX_MESSAGE_LENGTH for message in merged)
+    assert "".join(merged) == "a" + text
+    assert merged[0] == "a"
@@ -0,0 +1,49 @@
+# job_monitor/tests/test_scheduler.py
+"""Scheduler daemon tests."""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+import scheduler
+from core.config import Settings
+from core.utils import utcnow
+
+
+class _Coordinator:
+    """Grants every claim and records the released websites."""
+
+    heartbeat_interval = 30.0
+
+    def __init__(self):
+        self.released = []
+
+    def claim(self, website_ids):
+        return list(website_ids)
+
+    def release(self, website_ids=None):
+        self.released.extend(website_ids or [])
+
+
+def _failing_run(website_ids, send_summary=True):
+    raise RuntimeError("database is locked")
+
+
+def test_failed_batch_is_requeued_and_released(monkeypatch):
+    monkeypatch.setattr(scheduler, "run_monitoring", _failing_run)
+    coordinator = _Coordinator()
+    daemon = scheduler.Scheduler(settings=Settings(), coordinator=coordinator)
+    daemon._heap = [(utcnow() - timedelta(seconds=1), 1), (utcnow(), 2)]
+
+    assert daemon.run_once() is None
+
+    assert coordinator.released == [1, 2]
+    assert sorted(website_id for _, website_id in daemon._heap) == [1, 2]
+    # Retried later rather than immediately
+    assert daemon.pop_due(utcnow()) == []
+    retry_at = utcnow() + timedelta(seconds=scheduler.FAILED_BATCH_RETRY_SECONDS)
+    assert sorted(daemon.pop_due(retry_at)) == [1, 2]
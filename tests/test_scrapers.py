@@ -0,0 +1,46 @@
+# job_monitor/tests/test_scrapers.py
+"""Scraper and parse backend tests."""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from scrapers.occupop_scraper import OccupopScraper
+from scrapers.rezoomo_scraper import RezoomoScraper
+
+BACKENDS = ("bs4", "strainer", "lxml", "selectolax")
+# Optional package each backend needs
+BACKEND_MODULES = {"lxml": "lxml.cssselect", "selectolax": "selectolax"}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize(
+    "scraper, fixture",
+    [
+        (RezoomoScraper, "rezoomo.html"),
+        (RezoomoScraper, "rezoomo_initdata.html"),
+        (OccupopScraper, "occupop.html"),
+    ],
+)
+def test_backends_return_the_same_records(
+    monkeypatch, read_fixture, backend, scraper, fixture
+):
+    if backend in BACKEND_MODULES:
+        pytest.importorskip(BACKEND_MODULES[backend])
+    content = read_fixture(fixture)
+    monkeypatch.setenv("PARSER_BACKEND", "bs4")
+    expected = scraper().parse(content)
+    monkeypatch.setenv("PARSER_BACKEND", backend)
+    assert expected
+    assert scraper().parse(content) == expected
+
+
+def test_occupop_postings_have_location_and_job_type(read_fixture):
+    records = OccupopScraper().parse(read_fixture("occupop.html"))
+    assert records[0].title == "Clinical Midwife Manager 2"
+    assert (records[0].location, records[0].job_type) == ("Dublin 2", "Full time")
+    assert all(record.location and record.job_type for record in records)
@@ -0,0 +1,52 @@
+# job_monitor/tests/test_sharding.py
+"""Consistent hash ring tests."""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+from core.sharding import HashRing
+
+WEBSITE_IDS = range(1, 2001)
+
+
+def _owners(ring):
+    return {website_id: ring.owner(website_id) for website_id in WEBSITE_IDS}
+
+
+def test_empty_ring_has_no_owner():
+    assert HashRing([]).owner(1) is None
+
+
+def test_shards_partition_the_websites():
+    ring = HashRing(["a", "b", "c"])
+    shards = [ring.shard(WEBSITE_IDS, worker_id) for worker_id in ("a", "b", "c")]
+    assert sorted(website_id for shard in shards for website_id in shard) == list(WEBSITE_IDS)
+    # Virtual nodes spread the websites roughly evenly
+    assert all(len(shard) > len(WEBSITE_IDS) / 6 for shard in shards)
+
+
+def test_ring_does_not_depend_on_worker_order():
+    assert _owners(HashRing(["a", "b", "c"])) == _owners(HashRing(["c", "a", "b", "a"]))
+
+
+def test_joining_worker_only_takes_websites():
+    before = _owners(HashRing(["a", "b", "c"]))
+    after = _owners(HashRing(["a", "b", "c", "d"]))
+    moved = [website_id for website_id in WEBSITE_IDS if before[website_id] != after[website_id]]
+    assert moved
+    assert all(after[website_id] == "d" for website_id in moved)
+    # About a quarter of the websites move, not a reshuffle
+    assert len(moved) < len(WEBSITE_IDS) / 2
+
+
+def test_leaving_worker_only_hands_off_its_websites():
+    before = _owners(HashRing(["a", "b", "c"]))
+    after = _owners(HashRing(["a", "c"]))
+    for website_id in WEBSITE_IDS:
+        if before[website_id] == "b":
+            assert after[website_id] in ("a", "c")
+        else:
+            assert after[website_id] == before[website_id]
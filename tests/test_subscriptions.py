@@ -0,0 +1,80 @@
+# job_monitor/tests/test_subscriptions.py
+"""Subscription matcher tests."""
+
+# Add future imports here if needed
+from __future__ import annotations
+
+# Set encode as utf-8
+# -*- coding: utf-8 -*-
+
+from core.jobs import JobDiff, JobRecord
+from core.subscriptions import SubscriptionFilter, SubscriptionMatcher
+from data_models import Subscription
+
+NURSE_DUBLIN = JobRecord(
+    job_id="1", title="Registered General Nurse", location="Dublin 8", job_type="Full time"
+)
+NURSE_CORK = JobRecord(job_id="2", title="Staff Nurse", location="Cork", job_type="Part time")
+PORTER = JobRecord(job_id="3", title="Porter", location="Dublin 2", job_type="Full time")
+
+
+def _subscription(id, chat_id, **filters):
+    return SubscriptionFilter.from_row(Subscription(id=id, chat_id=chat_id, **filters), {})
+
+
+def test_from_row_compiles_phrases_and_websites():
+    row = Subscription(
+        id=1, chat_id=10, keywords="Staff Nurse, , porter", tags="Ireland", website_ids="7"
+    )
+    subscription = SubscriptionFilter.from_row(row, {"ireland": {3, 4}})
+    assert subscription.chat_id == "10"
+    assert subscription.keywords == (("staff", "nurse"), ("porter",))
+    assert subscription.website_ids == frozenset({3, 4, 7})
+
+
+def test_phrases_match_whole_words_in_order():
+    matcher = SubscriptionMatcher([_subscription(1, "a", keywords="general nurse")])
+    assert matcher.match(NURSE_DUBLIN, 1) == [1]
+    assert matcher.match(NURSE_CORK, 1) == []
+    # Words, not substrings
+    nursery = JobRecord(job_id="4", title="Nursery Assistant")
+    assert SubscriptionMatcher([_subscription(1, "a", keywords="Nurse")]).match(nursery, 1) == []
+
+
+def test_every_filter_must_match():
+    matcher = SubscriptionMatcher(
+        [
+            _subscription(1, "a", keywords="nurse", locations="dublin"),
+            _subscription(2, "b", locations="dublin", job_types="full time"),
+            _subscription(3, "c", keywords="nurse", website_ids="9"),
+        ]
+    )
+    assert sorted(matcher.match(NURSE_DUBLIN, 1)) == [1, 2]
+    assert matcher.match(NURSE_CORK, 1) == []
+    assert matcher.match(PORTER, 1) == [2]
+    assert sorted(matcher.match(NURSE_CORK, 9)) == [3]
+
+
+def test_recipients_get_only_their_postings():
+    matcher = SubscriptionMatcher(
+        [
+            _subscription(1, "all"),
+            _subscription(2, "site", website_ids="5"),
+            _subscription(3, "dublin", locations="dublin"),
+            _subscription(4, "dublin", keywords="porter"),
+            _subscription(5, "midwives", keywords="midwife"),
+        ]
+    )
+    diff = JobDiff(added=[NURSE_DUBLIN, PORTER], removed=[NURSE_CORK])
+
+    recipients = matcher.recipients(5, diff)
+    assert recipients["all"] is diff and recipients["site"] is diff
+    # Matched by two subscriptions, the porter is listed once
+    assert recipients["dublin"] == JobDiff(added=[NURSE_DUBLIN, PORTER])
+    assert "midwives" not in recipients
+
+    assert set(matcher.recipients(6, diff)) == {"all", "dublin"}
+
+
+def test_no_subscriptions_no_recipients():
+    assert SubscriptionMatcher().recipients(1, JobDiff(added=[PORTER])) == {}